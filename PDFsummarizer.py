@@ -5,6 +5,8 @@ import platform
 import os
 import argparse
 import logging
+import gc
+import time
 import multiprocessing as mp
 from multiprocessing import freeze_support
 
@@ -14,88 +16,270 @@ import pdfparser
 import pdfparser.summarizer as pdfsummarizer
 import pdfparser.text_extractor as text_extractor
 from pdfparser import logger, _config
+from pdfparser.manifest import JobManifest, DocumentStatus, file_stats
+from pdfparser.scheduler import chunk_by_cost
+from pdfparser.budget import DocumentTimeout, time_limit, limit_memory
+from pdfparser.extraction_cache import default_cache
+from pdfparser import font_cache
+from pdfparser.work_queue import LeaseQueue, serve, connect, parse_address, read_authkey, run_worker_node
 
 PDF_ROOT_FOLDER = _config.get('SUMMARIZER', 'PDF_ROOT_FOLDER')
 OUTPUT_FOLDER = _config.get('SUMMARIZER', 'OUTPUT_FOLDER')
 REST_OUTPUT_FOLDER = _config.get('REST', 'OUTPUT_FOLDER')
 EXTRACT_MODE = text_extractor.ExtractMode.LAYOUT
+DEGRADED_EXTRACT_MODE = text_extractor.ExtractMode.TEXT  # used when retrying quarantined documents
 EXTRACT_SUMMARY = _config.getboolean('SUMMARIZER', 'EXTRACT_SUMMARY')
+# the only fragments read by get_text_from_json
+WANTED_FRAGMENTS = [text_extractor.FragmentType.SUMMARY if EXTRACT_SUMMARY else text_extractor.FragmentType.TEXT]
 NB_PROCESSES = _config.getint('SUMMARIZER', 'NB_PROCESSES')
 CHUNK_SIZE = _config.getint('SUMMARIZER', 'CHUNK_SIZE')
+CHUNK_FACTOR = _config.getint('SUMMARIZER', 'CHUNK_FACTOR')
+DOCUMENT_TIMEOUT = _config.getint('SUMMARIZER', 'DOCUMENT_TIMEOUT')
+DOCUMENT_MAX_MEMORY = _config.getint('SUMMARIZER', 'DOCUMENT_MAX_MEMORY')
+WORKER_MAX_TASKS = _config.getint('SUMMARIZER', 'WORKER_MAX_TASKS')
 FAILED_SUMMARY_FOLDER = _config.get('SUMMARIZER', 'FAILED_SUMMARY_FOLDER')
+MANIFEST_FILE = _config.get('SUMMARIZER', 'MANIFEST_FILE')
+MANIFEST_COMMIT_INTERVAL = 1000
+QUEUE_HOST = _config.get('WORK_QUEUE', 'HOST')
+QUEUE_PORT = _config.getint('WORK_QUEUE', 'PORT')
+QUEUE_AUTHKEY_FILE = _config.get('WORK_QUEUE', 'AUTHKEY_FILE')  # local file of the key, see read_authkey
+QUEUE_NB_NODES = _config.getint('WORK_QUEUE', 'NB_NODES')
+LEASE_DURATION = _config.getint('WORK_QUEUE', 'LEASE_DURATION')
+LEASE_BATCH_SIZE = _config.getint('WORK_QUEUE', 'LEASE_BATCH_SIZE')
+POLL_INTERVAL = _config.getfloat('WORK_QUEUE', 'POLL_INTERVAL')
 
-target, source, root_folder, year = 'rest', 'olis', None, None
+target, source, root_folder, year, rescan, retry_failed, retry_quarantined = ('rest', 'olis', None, None,
+                                                                              False, False, False)
+mode, coordinator = 'local', None
+
+# Pipeline objects of the worker process, built once by init_worker and reused for every document
+worker_logger, worker_extractor, worker_summarizer, worker_cache = None, None, None, None
 
 
 def generate_summaries():
     """
     Generate PDF summaries in parallel mode using NB_PROCESSES concurrent processes
 
-    PDFs to summarize are "produced" by the generator function parse_folders
+    PDFs to summarize are "produced" by the generator function generate_files_list,
+    which queries the job manifest for the documents still pending, largest first.
+    \nThey are grouped into chunks of decreasing cost (see pdfparser.scheduler) so the long documents
+    are dispatched first and the last chunks are small enough to keep every process busy until the end.
     \nThe use of imap ensures the file generator is not loaded completely in memory
     \nunordered since the order of the results does not matter
-    \nCHUNK_SIZE controls the number of files to prepare in advance per process
+    \nCHUNK_SIZE controls the maximum number of files per chunk
+    \nThe outcome of each summary is recorded in the manifest by the main process only.
+    \nWorker processes are replaced after WORKER_MAX_TASKS chunks, to release any memory they hold on to.
     :return: None
     """
+    manifest = JobManifest(MANIFEST_FILE, logger=logger)
+    try:
+        scan_documents(manifest)
+        manifest_filter = get_manifest_filter()
+        total_size = manifest.total_size(**manifest_filter)
+        logger.info('{} documents to process, {} bytes'.format(manifest.count(**manifest_filter), total_size))
+        logger.info('Creating a pool of {} processes'.format(NB_PROCESSES))
+        pool = mp.Pool(processes=NB_PROCESSES, initializer=init_worker,
+                       maxtasksperchild=WORKER_MAX_TASKS if WORKER_MAX_TASKS > 0 else None)
+        try:
+            logger.info('Begin processing files. Max chunk size = {}'.format(CHUNK_SIZE))
+            chunks = chunk_by_cost(generate_files_list(manifest), total_size, NB_PROCESSES, CHUNK_SIZE,
+                                   chunk_factor=CHUNK_FACTOR)
+            for results in pool.imap_unordered(generate_summaries_chunk, chunks):
+                for result in results:
+                    manifest.record(*result)
+        finally:
+            #  Always good practice to do a little cleanup
+            pool.close()
+            pool.join()
+    finally:
+        manifest.close()
+
+
+def coordinate_summaries():
+    """
+    Hand out the documents to summarize to worker nodes running on other machines (coordinator mode)
+
+    Documents still pending in the manifest are grouped into batches of decreasing cost, at most
+    LEASE_BATCH_SIZE documents each, and served by a LeaseQueue on the address of the coordinator argument,
+    QUEUE_HOST:QUEUE_PORT by default. The coordinator does not start without an authentication key (see
+    read_authkey).
+    \nWorker nodes lease a batch, renew the lease while processing it and report the results. Batches whose
+    lease expired (node stopped or unreachable) are handed out again.
+    \nThe coordinator is the only process writing in the manifest. PDF_ROOT_FOLDER and OUTPUT_FOLDER are
+    expected to be shared by all the nodes.
+    :return: None, 1 if not started
+    """
+    try:
+        authkey = read_authkey(QUEUE_AUTHKEY_FILE)
+    except ValueError as ex:
+        logger.error('Coordinator not started: {}'.format(ex))
+        return 1
+    address = parse_address(coordinator) if coordinator else (QUEUE_HOST, QUEUE_PORT)
+    manifest = JobManifest(MANIFEST_FILE, logger=logger)
+    try:
+        scan_documents(manifest)
+        manifest_filter = get_manifest_filter()
+        total_size = manifest.total_size(**manifest_filter)
+        logger.info('{} documents to process, {} bytes'.format(manifest.count(**manifest_filter), total_size))
+        queue = LeaseQueue(LEASE_DURATION)
+        serve(queue, address, authkey)
+        logger.info('Coordinator listening on {}:{}'.format(*address))
+        batches = chunk_by_cost(generate_files_list(manifest), total_size, QUEUE_NB_NODES * NB_PROCESSES,
+                                LEASE_BATCH_SIZE, chunk_factor=CHUNK_FACTOR)
+        while not queue.finished():
+            # keep a few batches ready per node, the manifest is read lazily
+            while not queue.closed and queue.nb_waiting() < 2 * QUEUE_NB_NODES:
+                batch = next(batches, None)
+                if batch is None:
+                    queue.close()
+                else:
+                    queue.put(batch)
+            nb_expired = queue.requeue_expired()
+            if nb_expired:
+                logger.warning('{} expired leases, batches queued again'.format(nb_expired))
+            for result in queue.pop_results():
+                manifest.record(*result)
+            time.sleep(POLL_INTERVAL)
+        for result in queue.pop_results():
+            manifest.record(*result)
+        logger.info('All batches completed')
+    finally:
+        manifest.close()
+
+
+def work_for_coordinator():
+    """
+    Summarize the batches leased from the coordinator with NB_PROCESSES concurrent processes (worker mode)
+
+    :return: None, 1 if not started
+    """
+    try:
+        authkey = read_authkey(QUEUE_AUTHKEY_FILE)
+    except ValueError as ex:
+        logger.error('Worker not started: {}'.format(ex))
+        return 1
+    address = parse_address(coordinator) if coordinator else (QUEUE_HOST, QUEUE_PORT)
+    worker_id = '{}:{}'.format(platform.node(), os.getpid())
     logger.info('Creating a pool of {} processes'.format(NB_PROCESSES))
-    pool = mp.Pool(processes=NB_PROCESSES)
+    # pool created before connecting, so the worker processes do not inherit the coordinator connection
+    pool = mp.Pool(processes=NB_PROCESSES, initializer=init_worker,
+                   maxtasksperchild=WORKER_MAX_TASKS if WORKER_MAX_TASKS > 0 else None)
     try:
-        logger.info('Begin processing files. Chunk size = {}'.format(CHUNK_SIZE))
-        # TODO: there's got to be a better way than this!!!
-        for _ in pool.imap_unordered(generate_summary, generate_files_list(), chunksize=CHUNK_SIZE):
-            pass
+        logger.info('Worker {} connecting to coordinator {}:{}'.format(worker_id, *address))
+        queue = connect(address, authkey)
+        nb_batches = run_worker_node(queue, lambda documents: pool.map(generate_summary, documents, chunksize=1),
+                                     worker_id, LEASE_DURATION, POLL_INTERVAL, logger=logger)
+        logger.info('{} batches processed'.format(nb_batches))
     finally:
-        #  Always good practice to do a little cleanup
         pool.close()
         pool.join()
 
 
+def generate_summaries_chunk(chunk):
+    """
+
+    :param chunk: list of details about the PDF files to summarize
+    :return: list of results to record in the manifest
+    """
+    return [generate_summary(info) for info in chunk]
+
+
+def init_worker():
+    """
+    Pool initializer: build the heavy, read-only pipeline objects once per worker process
+
+    The logger (and its file handler), the text extractor, the summarizer (tokenizers, stemmer
+    and stop words) and the extraction cache are then reused for every document handled by the process.
+    :return: None
+    """
+    global worker_logger, worker_cache
+    worker_logger, _ = configure_logger()
+    worker_cache = default_cache(logger=worker_logger)
+    build_pipeline()
+
+
+def build_pipeline():
+    global worker_extractor, worker_summarizer
+    worker_extractor = text_extractor.PDFTextExtractor(logger=worker_logger)
+    worker_summarizer = pdfsummarizer.PDFSummarizer()
+
+
+def release_pipeline():
+    """
+    Drop the pipeline objects of the worker after a budget breach, they are rebuilt for the next document
+
+    :return: None
+    """
+    global worker_extractor, worker_summarizer
+    worker_extractor, worker_summarizer = None, None
+    gc.collect()
+
+
 def generate_summary(info):
     """
     Generate summary for given pdf file
 
     First, "clean" text is extracted, then individual sentences are passed to
     PDFSummarizer library to produce the summary
+    \nDocuments exceeding their time (DOCUMENT_TIMEOUT) or memory budget are quarantined. The memory a document
+    may allocate is capped to DOCUMENT_MAX_MEMORY MB on top of what the process uses when it starts.
 
     :param info: contains details about PDF file to summarize
-    :return:
+    :return: Tuple (pdf_path, status, output_file, started, finished, error) to record in the manifest
     """
     jt, folder_structure, pdf_path = info[0], info[1], info[2]
-    proc_logger, log_file_handler = configure_logger()
+    if not worker_logger:
+        init_worker()
+    elif not worker_extractor:
+        build_pipeline()
+    extract_mode = DEGRADED_EXTRACT_MODE if retry_quarantined else EXTRACT_MODE
     output_file = get_output_file(info)
+    status, error = DocumentStatus.DONE, None
+    started = time.time()
+    # re-armed per document: the memory kept by the process, or left after a breach, does not count against the budget
+    limit_memory(DOCUMENT_MAX_MEMORY)
     with open(output_file, mode='wb') as out_file:
-        log_begin_process(jt, pdf_path, proc_logger)
+        log_begin_process(jt, pdf_path, worker_logger)
         try:
             pdf_file_path = os.path.join(PDF_ROOT_FOLDER, pdf_path)
 
-            extractor = text_extractor.PDFTextExtractor(logger=proc_logger)
-            json_result = extractor.extract_text(pdf_file_path, mode=EXTRACT_MODE)
-            pdf_txt = get_text_from_json(json_result)
-            sentences = extract_sentences(pdf_txt)
-            proc_logger.debug("Nb sentences extracted: {}".format(len(sentences)))
-            summarizer = pdfsummarizer.PDFSummarizer()
-            results = summarizer.generate_summary(sentences)
+            with time_limit(DOCUMENT_TIMEOUT):
+                # fresh per-document state
+                worker_extractor.reset()
+                json_result = worker_extractor.extract_text(pdf_file_path, mode=extract_mode, cache=worker_cache,
+                                                            wanted=WANTED_FRAGMENTS)
+                pdf_txt = get_text_from_json(json_result)
+                sentences = extract_sentences(pdf_txt, worker_summarizer)
+                worker_logger.debug("Nb sentences extracted: {}".format(len(sentences)))
+                results = worker_summarizer.generate_summary(sentences)
             out_file.write(results)
 
-            log_end_process(jt, proc_logger)
+            log_end_process(jt, worker_logger)
+            worker_logger.debug("Font cache: {}".format(font_cache.font_cache.stats()))
+        except (DocumentTimeout, MemoryError) as ex:
+            worker_logger.error("[QUARANTINE] file {} exceeded its budget - {!r}".format(jt, ex))
+            status, error = DocumentStatus.QUARANTINED, repr(ex)
+            release_pipeline()
         except Exception as ex:
             print('exception!!!')
-            proc_logger.exception("[EXCEPTION] while processing file {} - {}".format(jt, ex.message))
+            worker_logger.exception("[EXCEPTION] while processing file {} - {}".format(jt, ex.message))
+            status, error = DocumentStatus.FAILED, repr(ex)
         finally:
-            # Required to avoid race conditions where the next "iteration" of the process tries to write
-            # in the log file before the previous process is done working with it...
-            log_file_handler.flush()
-            log_file_handler.close()
-            proc_logger.removeHandler(log_file_handler)
+            for handler in worker_logger.handlers:
+                handler.flush()
+    return pdf_path, status, output_file, started, time.time(), error
 
 
-def get_output_file(info):
+def get_output_file(info, make_dirs=True):
     jt, folder_structure, pdf_path = info[0], info[1], info[2]
     logger.debug('[get_output_file] target: {}, jt: {}, folder_structure: {}, pdf_path: {}'.format(target, jt, folder_structure, pdf_path))
     if target == 'bulk':
         output_file = OUTPUT_FOLDER + 'summary_' + folder_structure + '_' + jt + '.json'
     elif target == 'rest':
-        complete_folder = create_folders(folder_structure)
+        if make_dirs:
+            complete_folder = create_folders(folder_structure)
+        else:
+            complete_folder = os.path.join(REST_OUTPUT_FOLDER, *folder_structure.split('_'))
         output_file = os.path.join(complete_folder, jt + '.pdf')
     else:
         raise Exception('Invalid target value. Unable to generate output file')
@@ -116,9 +300,84 @@ def create_folders(pdf_path):
     return complete_folder
 
 
-def generate_files_list():
+def generate_files_list(manifest):
+    """
+    Generator function which produces the documents still to process, as recorded in the manifest,
+    by decreasing file size
+
+    :param manifest: JobManifest
+    :return: Tuple ((jt, folder_structure, pdf_path), size)
+    """
+    return manifest.iter_documents(largest_first=True, with_size=True, **get_manifest_filter())
+
+
+def get_manifest_filter():
+    """
+    Selection of the manifest documents matching the command line arguments
+
+    :return: dict of keyword arguments for JobManifest.count and JobManifest.iter_documents
+    """
+    if retry_quarantined:
+        statuses = [DocumentStatus.QUARANTINED]
+    else:
+        statuses = [DocumentStatus.PENDING]
+        if retry_failed:
+            statuses.append(DocumentStatus.FAILED)
+    if source == 'olis':
+        return dict(statuses=statuses, source=source, path_prefix=get_pdf_folder())
+    else:
+        return dict(statuses=statuses, source=source, year=year)
+
+
+def get_scan_scope():
+    if source == 'olis':
+        return '{}:{}'.format(source, get_pdf_folder())
+    else:
+        return '{}:{}'.format(source, year if year else '*')
+
+
+def scan_documents(manifest):
+    """
+    Register in the manifest the pdf files not yet known.
+
+    The file system is only walked when the scope (source and folder or year) was never scanned before,
+    or when a rescan is explicitly requested. Summaries already available are recorded as done.
+    :param manifest: JobManifest
+    :return: None
+    """
+    scope = get_scan_scope()
+    if manifest.is_scanned(scope) and not rescan:
+        logger.info('Scope {} already scanned. Resuming from manifest'.format(scope))
+        return
+    logger.info('Scanning scope {}'.format(scope))
+    nb_new_files = 0
+    for info, file_year in parse_source():
+        pdf_path = info[2]
+        if manifest.contains(pdf_path):
+            continue
+        size, mtime = file_stats(os.path.join(PDF_ROOT_FOLDER, pdf_path))
+        if summary_available(info):
+            manifest.register(info, source, status=DocumentStatus.DONE,
+                              output_file=get_output_file(info, make_dirs=False), size=size, mtime=mtime,
+                              year=file_year)
+        else:
+            manifest.register(info, source, size=size, mtime=mtime, year=file_year)
+        nb_new_files += 1
+        if nb_new_files % MANIFEST_COMMIT_INTERVAL == 0:
+            manifest.commit()
+            logger.info('{} new files registered...'.format(nb_new_files))
+    manifest.commit()
+    manifest.mark_scanned(scope)
+    logger.info('Scan complete. {} new files registered'.format(nb_new_files))
+
+
+def parse_source():
+    """
+
+    :return: Tuple ((jt, folder_structure, pdf_path), year)
+    """
     if source == 'olis':
-        return parse_folders()
+        return ((info, None) for info in parse_folders())
     else:
         return parse_files()
 
@@ -142,15 +401,11 @@ def parse_files():
                 logger.debug('jt: {}'.format(jt))
                 folder_structure = '_'.join(components[:3])
                 logger.debug('folder_structure: {}'.format(folder_structure))
-                if summary_available((jt, folder_structure, file_path)):
-                    logger.info('Summary file found. Ignoring...')
-                    continue
-                logger.info('Generating summary for file: {}'.format(file_path))
-                yield (jt, folder_structure, file_path)
+                yield (jt, folder_structure, file_path), file_year
 
 
 def summary_available(info):
-    if os.path.isfile(get_output_file(info)):
+    if os.path.isfile(get_output_file(info, make_dirs=False)):
         logger.debug('Summary file found')
         return True
     logger.debug('Summary file not found')
@@ -184,8 +439,6 @@ def parse_folders():
                 nb_processed_files += 1
                 if nb_processed_files % 100 == 0:
                     logger.info('{} files analyzed...'.format(nb_processed_files))
-                if summary_available((jt, folder_structure, pdf_path)):
-                    continue
                 yield (jt, folder_structure, pdf_path)
             else:
                 logger.debug('{}/{} is not a file'.format(root, pdf_file))
@@ -210,6 +463,9 @@ def configure_logger():
         raise ValueError('Invalid log level: %s' % _config.get('LOGGING', 'level'))
     proc_logger = logging.getLogger(str(os.getpid()))
     proc_logger.setLevel(logging_level)
+    if proc_logger.handlers:
+        # already configured for this process
+        return proc_logger, proc_logger.handlers[0]
 
     # create file handler which logs even debug messages
     fh = logging.FileHandler(os.path.join(_config.get('LOGGING', 'output_dir'), 'summarizer_'+str(os.getpid())+'.log'),
@@ -230,7 +486,9 @@ def get_arguments():
     Folder: appended to the PDF_ROOT_FOLDER to allow for more "selective" runs
     :return:
     """
-    target, source, root_folder, year = None, None, None, None
+    target, source, root_folder, year, rescan, retry_failed, retry_quarantined = (None, None, None, None,
+                                                                                  False, False, False)
+    mode, coordinator = 'local', None
     parser = argparse.ArgumentParser(
         description='Generate summaries for pdf files in specified folder and sub-folders'
     )
@@ -250,6 +508,27 @@ def get_arguments():
     parser.add_argument(
         '-y', '--year', type=int, help='Restrict processing to given year', required=False
     )
+    # Manifest
+    parser.add_argument(
+        '--rescan', action='store_true', help='Scan the pdf files again to register new documents in the manifest'
+    )
+    parser.add_argument(
+        '--retry_failed', action='store_true', help='Process again the documents recorded as failed in the manifest'
+    )
+    parser.add_argument(
+        '--retry_quarantined', action='store_true',
+        help='Process only the quarantined documents, using raw text extraction'
+    )
+    # Multi-node processing
+    parser.add_argument(
+        '-m', '--mode', type=str, help='Bulk processing mode: local (default), coordinator or worker', required=False,
+        default='local'
+    )
+    parser.add_argument(
+        '-c', '--coordinator', type=str, required=False,
+        help='host:port the coordinator listens on (coordinator mode) or connects to (worker mode), '
+             'HOST:PORT of the WORK_QUEUE section by default'
+    )
     args = parser.parse_args()
     if args.root_folder:
         root_folder = args.root_folder
@@ -263,7 +542,22 @@ def get_arguments():
     if args.year:
         year = args.year
         logger.info("Year argument: {}".format(year))
-    return target, source, root_folder, year
+    if args.rescan:
+        rescan = args.rescan
+        logger.info("Rescan argument: {}".format(rescan))
+    if args.retry_failed:
+        retry_failed = args.retry_failed
+        logger.info("Retry failed argument: {}".format(retry_failed))
+    if args.retry_quarantined:
+        retry_quarantined = args.retry_quarantined
+        logger.info("Retry quarantined argument: {}".format(retry_quarantined))
+    if args.mode:
+        mode = args.mode
+        logger.info("Mode argument: {}".format(mode))
+    if args.coordinator:
+        coordinator = args.coordinator
+        logger.info("Coordinator argument: {}".format(coordinator))
+    return target, source, root_folder, year, rescan, retry_failed, retry_quarantined, mode, coordinator
 
 
 def log_end_process(jt, proc_logger):
@@ -340,8 +634,11 @@ def concat_with_punctuation(frag):
     return frag
 
 
-def extract_sentences(pdf_text):
-    pdf_sentences = pdfparser.summarizer.extract_sentences(pdf_text)
+def extract_sentences(pdf_text, summarizer=None):
+    if summarizer:
+        pdf_sentences = summarizer.extract_sentences(pdf_text)
+    else:
+        pdf_sentences = pdfparser.summarizer.extract_sentences(pdf_text)
     for sentence in pdf_sentences:
         sentence = sentence.strip()  # Todo: is this correct?
     return pdf_sentences
@@ -351,5 +648,9 @@ if __name__ == '__main__':
     if platform.system() == 'Windows':
         freeze_support()  # required on windows platform to allow multi-processing
 
-    target, source, root_folder, year = get_arguments()
+    target, source, root_folder, year, rescan, retry_failed, retry_quarantined, mode, coordinator = get_arguments()
+    if mode == 'coordinator':
+        sys.exit(coordinate_summaries())
+    elif mode == 'worker':
+        sys.exit(work_for_coordinator())
     sys.exit(generate_summaries())
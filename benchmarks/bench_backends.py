@@ -0,0 +1,104 @@
+# -*- coding: utf8 -*-
+"""
+Speed and quality benchmark of the summarizer backends over a folder of extracted texts.
+
+Each backend of pdfparser.summarizer.BACKENDS summarizes every .txt file of the folder, the text of a PDF as
+extracted by the pipeline, in its own Python process. Reported by backend:
+    - sentences/s: sentences summarized per second, the split of the texts in sentences excluded
+    - peak (MB): peak resident memory of the process, and its increase over the process before summarizing
+    - overlap: share of the sentences of the summaries of the reference backend (lsa) found in the summaries
+
+Texts of fewer than SENTENCES_COUNT sentences are returned whole by every backend, they count in the speed only.
+
+Usage: python benchmarks/bench_backends.py folder [backend ...]
+"""
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pdfparser.summarizer as summarizer
+
+REFERENCE = 'lsa'
+STOP_WORDS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'stopwords')
+
+
+def peak_memory():
+    """
+
+    :return: peak resident memory of the process, in MB
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def read_texts(folder):
+    texts = []
+    for path in sorted(glob.glob(os.path.join(folder, '*.txt'))):
+        with open(path, mode='rb') as text_file:
+            texts.append((os.path.basename(path), text_file.read().decode('utf-8')))
+    return texts
+
+
+def run_backend(backend, folder):
+    """
+    Summarize the texts with a backend, in the current process
+
+    :param backend: name of a backend of BACKENDS
+    :param folder: folder of the texts
+    :return: dict of the measures and of the summaries by file name
+    """
+    if not os.path.isdir(summarizer.STOP_WORDS_FOLDER):
+        summarizer.STOP_WORDS_FOLDER = STOP_WORDS_FOLDER
+    pdf_summarizer = summarizer.PDFSummarizer(backend=backend)
+    documents = [(name, summarizer.extract_sentences(text)) for name, text in read_texts(folder)]
+    base = peak_memory()
+    summaries, seconds = dict(), 0.0
+    for name, sentences in documents:
+        start = time.time()
+        summary = pdf_summarizer.generate_summary(sentences)
+        seconds += time.time() - start
+        summaries[name] = summary.decode('utf-8').split('\n')
+    return {'sentences': sum(len(sentences) for _, sentences in documents), 'seconds': seconds,
+            'peak': peak_memory(), 'base': base, 'summaries': summaries}
+
+
+def overlap(summaries, reference):
+    """
+
+    :param summaries: dict of the summaries by file name, lists of sentences
+    :param reference: dict of the reference summaries by file name
+    :return: share of the sentences of the reference summaries found in the summaries
+    """
+    found = sum(len(set(summaries[name]) & set(sentences)) for name, sentences in reference.items())
+    return found / float(max(1, sum(len(set(sentences)) for sentences in reference.values())))
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    if sys.argv[1] == '--worker':
+        json.dump(run_backend(sys.argv[2], sys.argv[3]), sys.stdout)
+        return
+    folder = sys.argv[1]
+    backends = sys.argv[2:] or sorted(summarizer.BACKENDS)
+    results = dict()
+    for backend in [REFERENCE] + [backend for backend in backends if backend != REFERENCE]:
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--worker', backend, folder])
+        # the results are the last line, after the logging of the package
+        results[backend] = json.loads(output.splitlines()[-1])
+    print('{:<10}{:>11}{:>13}{:>11}{:>11}{:>10}'.format('backend', 'sentences', 'sentences/s', 'peak (MB)',
+                                                        'added (MB)', 'overlap'))
+    for backend in backends:
+        result = results[backend]
+        print('{:<10}{:>11}{:>13.0f}{:>11.1f}{:>11.1f}{:>10.2f}'.format(
+            backend, result['sentences'], result['sentences'] / max(result['seconds'], 1e-6), result['peak'],
+            result['peak'] - result['base'], overlap(result['summaries'], results[REFERENCE]['summaries'])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# -*- coding: utf8 -*-
+"""
+Scaling benchmark of the LSA summarizers on synthetic documents.
+
+Compares, for documents of increasing numbers of sentences:
+    - before: LsaSummarizer of sumy, dense |words| x |sentences| matrix filled cell by cell, full SVD
+    - after: SparseLsaSummarizer, non-zero counts only, ranks from the column norms (all the dimensions, as sumy)
+    - truncated: SparseLsaSummarizer keeping TRUNCATED_RATIO of the dimensions, randomized SVD
+
+The documents draw their words from a few topics, by a Zipf law over a vocabulary of pseudo-words. The dense matrix
+of sumy weighs 8 bytes per word and sentence: sumy is skipped beyond MAX_LEGACY_SENTENCES sentences. The summaries
+are compared on their ranks, sentences of equal ranks may be picked in a different order.
+
+Timings in seconds, summary of 10 sentences:
+    sentences   words   before   after   truncated (1%)
+         1000    7732    27.52    0.26     0.30
+         5000   16852   507.87    0.63     1.41
+        20000   19739        -    1.73    13.77
+The exact ranks need no decomposition: the truncated one only pays off to rank on fewer dimensions than sumy.
+
+Usage: python benchmarks/bench_lsa.py [max_legacy_sentences]
+"""
+import os
+import random
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from sumy.nlp.stemmers import Stemmer
+from sumy.nlp.tokenizers import Tokenizer
+from sumy.parsers.plaintext import PlaintextParser
+from sumy.summarizers.lsa import LsaSummarizer
+
+from pdfparser.lsa import SparseLsaSummarizer
+from pdfparser.summarizer import parse_stop_words
+
+STOP_WORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'stopwords', 'english.txt')
+MAX_LEGACY_SENTENCES = 5000
+SIZES = [1000, 5000, 20000]
+SENTENCES_COUNT = 10
+TOPICS = 20
+TRUNCATED_RATIO = 0.01
+
+
+def document(nb_sentences, seed=0):
+    generator = random.Random(seed)
+    vocabulary = [''.join(generator.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(generator.randint(3, 10)))
+                  for _ in range(20000)]
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    cumulative = np.cumsum(weights) / weights.sum()
+    topics = [generator.sample(vocabulary, len(vocabulary)) for _ in range(TOPICS)]
+    lines = []
+    for _ in range(nb_sentences):
+        topic = generator.choice(topics)
+        ranks = np.searchsorted(cumulative, [generator.random() for _ in range(generator.randint(5, 30))])
+        lines.append(' '.join(topic[rank] for rank in ranks) + '.')
+    return PlaintextParser.from_string('\n'.join(lines), Tokenizer('english')).document
+
+
+def timed(summarizer, doc):
+    start = time.time()
+    summary = summarizer(doc, SENTENCES_COUNT)
+    return time.time() - start, summary
+
+
+def main():
+    max_legacy_sentences = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_LEGACY_SENTENCES
+    with open(STOP_WORDS_FILE) as stop_words_file:
+        stop_words = parse_stop_words(stop_words_file.read())
+    stemmer = Stemmer('english')
+    before, after = LsaSummarizer(stemmer), SparseLsaSummarizer(stemmer)
+    truncated = SparseLsaSummarizer(stemmer, TRUNCATED_RATIO)
+    before.stop_words = after.stop_words = truncated.stop_words = stop_words
+    print('{:>10}{:>8}{:>14}{:>12}{:>16}{:>8}{:>10}'.format('sentences', 'words', 'before (s)', 'after (s)',
+                                                           'truncated (s)', 'same', 'overlap'))
+    for nb_sentences in SIZES:
+        doc = document(nb_sentences)
+        words = after.term_frequencies(doc).shape[0]
+        after_time, summary = timed(after, doc)
+        truncated_time, truncated_summary = timed(truncated, doc)
+        overlap = len(set(summary) & set(truncated_summary))
+        if nb_sentences <= max_legacy_sentences:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                before_time, legacy_summary = timed(before, doc)
+            ranks = after.rank_sentences(doc)
+            selected = [i for i, sentence in enumerate(doc.sentences) if sentence in legacy_summary]
+            same = np.allclose(np.sort(ranks)[-len(selected):], np.sort(ranks[selected]))
+            before_time = '{:.2f}'.format(before_time)
+        else:
+            before_time, same = '-', '-'
+        print('{:>10}{:>8}{:>14}{:>12.2f}{:>16.2f}{:>8}{:>10}'.format(nb_sentences, words, before_time, after_time,
+                                                                     truncated_time, str(same), overlap))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf8 -*-
+"""
+Micro-benchmark of the page filters and of the reading order on dense pages.
+
+Compares, for a page of random text boxes and two tables:
+    - before: loops over the items of the page dict, sort of (round(-y0), round(x0), text) tuples
+    - after: masks and sorts over the columnar view of PageText
+and for the same page, the grouping of the text boxes into rows and tables of filter_text_tables:
+    - before: text cells sorted, then walked one by one through Row and Table
+    - after: table_cells_mask over the coordinates
+
+Usage: python benchmarks/bench_page_geometry.py [nb_boxes] [nb_runs]
+"""
+import logging
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pdfparser.page_geometry as page_geometry
+import pdfparser.table_edges_extractor as table_extractor
+import pdfparser.text_table_extractor as text_table_extractor
+from pdfparser.page_geometry import PageText
+from pdfparser.pdf_page_filter import PDFPageFilter
+
+TABLES = [table_extractor.Cell(60.0, 100.0, 400.0, 500.0, rows=4, columns=4),
+          table_extractor.Cell(300.0, 450.0, 560.0, 800.0, rows=4, columns=4)]
+
+
+def dense_page(nb_boxes):
+    generator = random.Random(0)
+    page_txt = PageText()
+    for i in range(nb_boxes):
+        x0, y0 = generator.uniform(50, 500), generator.uniform(40, 800)
+        page_txt[(x0, y0, x0 + generator.uniform(5, 60), y0 + 8)] = u'{:.2f}'.format(generator.uniform(0, 100))
+    return page_txt
+
+
+def before(page_txt, page_filter):
+    page_txt = dict(page_txt)
+    for coord, _ in page_txt.items():
+        if page_filter.text_is_within_table(coord, TABLES):
+            page_txt.pop(coord)
+    return [text for _, _, text in sorted((round(-coord[1], 0), round(coord[0], 0), text)
+                                          for coord, text in page_txt.items())]
+
+
+def after(page_txt):
+    page_txt = PageText(page_txt)
+    _, coords, _ = page_txt.columns()
+    within_tables = TABLES[0].contains_fractions(coords) | TABLES[1].contains_fractions(coords)
+    page_geometry.remove_boxes(page_txt, within_tables)
+    return page_geometry.reading_order(page_txt)
+
+
+def text_tables_before(page_txt):
+    text_cells = sorted((text_table_extractor.Cell(*coord) for coord in page_txt),
+                        key=text_table_extractor.compare_cells, reverse=True)
+    return set(cell.coord for cell in text_table_extractor.find_table_cells_sequential(text_cells))
+
+
+def text_tables_after(page_txt):
+    keys, coords, _ = PageText(page_txt).columns()
+    return set(key for key, selected in zip(keys, text_table_extractor.table_cells_mask(coords)) if selected)
+
+
+def main():
+    nb_boxes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    nb_runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    logger = logging.getLogger('bench_page_geometry')
+    logger.setLevel(logging.WARNING)
+    page_filter = PDFPageFilter(logger=logger)
+    page_txt = dense_page(nb_boxes)
+    assert before(page_txt, page_filter) == after(page_txt)
+
+    assert text_tables_before(page_txt) == text_tables_after(page_txt)
+
+    print('{} boxes per page, best of 5 runs of {} pages'.format(nb_boxes, nb_runs))
+    for name, case in [('before', lambda: before(page_txt, page_filter)), ('after', lambda: after(page_txt)),
+                       ('text tables, before', lambda: text_tables_before(page_txt)),
+                       ('text tables, after', lambda: text_tables_after(page_txt))]:
+        best = min(timeit.repeat(case, number=nb_runs, repeat=5))
+        print('{:<22}{:>10.2f} ms per page'.format(name, best / nb_runs * 1e3))
+
+
+if __name__ == '__main__':
+    main()
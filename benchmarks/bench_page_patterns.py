@@ -0,0 +1,72 @@
+# -*- coding: utf8 -*-
+"""
+Micro-benchmark of the section matchers run on each page.
+
+Compares the cost per page of:
+    - before: the detectors called one after the other, each pattern compiled on every call (re module cache
+      warm, or emptied before each page as happens once more than a hundred patterns have been compiled)
+    - after: PDFPageFilter.classify_page with the precompiled patterns and the title prefilters
+
+Usage: python benchmarks/bench_page_patterns.py [nb_fragments] [nb_pages]
+"""
+import logging
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pdfparser import patterns
+from pdfparser.pdf_fragment_type import FragmentType
+from pdfparser.pdf_page_filter import PDFPageFilter
+
+# patterns applied to each fragment of a plain text page by is_toc, is_summary, is_glossary, is_bibliography,
+# is_participants_list and is_annex, with the re function applying them
+LEGACY_MATCHERS = [(patterns.TOC_TITLE, re.search), (patterns.TOC_EXACT, re.search),
+                   (patterns.SUMMARY_TITLE, re.search), (patterns.GLOSSARY_TITLE, re.search),
+                   (patterns.BIBLIOGRAPHY_TITLE, re.search), (patterns.PARTICIPANTS_EXACT_1, re.match),
+                   (patterns.PARTICIPANTS_EXACT_2, re.match), (patterns.PARTICIPANTS_FIND_1, re.search),
+                   (patterns.PARTICIPANTS_FIND_2, re.search), (patterns.ANNEX_TITLE, re.search)]
+
+WORDS = ('economic growth policy trade agriculture members committee report countries development finance '
+         'ministers energy investment tax labour market education health').split()
+
+
+def text_page(nb_fragments):
+    page_txt = {}
+    for i in range(nb_fragments):
+        line = ' '.join(WORDS[(i * 7 + j) % len(WORDS)] for j in range(12))
+        page_txt[(72.0, 780.0 - i * 14, 520.0, 790.0 - i * 14)] = '{}.\n{}\n'.format(line.capitalize(), line)
+    return page_txt
+
+
+def legacy_page(page_txt, purge):
+    if purge:
+        re.purge()
+    for pattern, apply in LEGACY_MATCHERS:
+        for _, fragment in page_txt.items():
+            txt = fragment.strip()
+            apply(re.compile(pattern.pattern, pattern.flags), txt)
+
+
+def main():
+    nb_fragments = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    nb_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    logger = logging.getLogger('bench_page_patterns')
+    logger.setLevel(logging.WARNING)
+    page_filter = PDFPageFilter(logger=logger)
+    page_txt = text_page(nb_fragments)
+    assert page_filter.classify_page(page_txt, FragmentType.TEXT, cover_allowed=False) == (None, None)
+
+    cases = [('before, warm re cache', lambda: legacy_page(page_txt, False)),
+             ('before, cold re cache', lambda: legacy_page(page_txt, True)),
+             ('after', lambda: page_filter.classify_page(page_txt, FragmentType.TEXT, cover_allowed=False))]
+    print('{} fragments per page, best of 5 runs of {} pages'.format(nb_fragments, nb_pages))
+    for name, case in cases:
+        best = min(timeit.repeat(case, number=nb_pages, repeat=5))
+        print('{:<24}{:>10.1f} us per page'.format(name, best / nb_pages * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+# -*- coding: utf8 -*-
+"""
+Scaling benchmark of find_outer_edges on synthetic tables.
+
+Compares, for grids of cells and for tables drawn with lines, of increasing sizes:
+    - before: each cell compared to all the others, the collapsed cells compared again until convergence
+    - after: same passes, on the groups of cells close vertically, skipping the cells collapsed or too far
+
+The pages hold two tables, the second one above the first. The legacy version is skipped beyond
+MAX_LEGACY_CELLS cells.
+
+Usage: python benchmarks/bench_table_edges.py [max_legacy_cells]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pdfparser.table_edges_extractor import (Cell, adjacent, same_cell, collapse_east, collapse_north,
+                                             collapse_overlapping, collapse_south, collapse_west, find_outer_edges)
+
+MAX_RECURSION = 100
+MAX_LEGACY_CELLS = 2000
+SIZES = [(5, 5), (10, 10), (20, 15), (30, 20), (40, 25), (80, 40), (160, 50)]
+
+
+def log(log_text):
+    pass
+
+
+def legacy_find_outer_edges(cells, nth_recursion=0):
+    nth_recursion += 1
+    log('{n}th recursion step'.format(n=nth_recursion))
+    if nth_recursion > MAX_RECURSION:
+        return cells
+    log('Initial nb cells found: {ntables}'.format(ntables=len(cells)))
+
+    converged = True
+    neighbor_cells = cells[:]  # deep copy to ensure no side effects (really useful?)
+    collapsed_cells = list()
+    ignored_cells = list()
+
+    for cell in cells:
+        log('Trying to collapse cell: {cell}'.format(cell=cell))
+        # collapsed = False
+        if cell in ignored_cells:
+            continue
+        collapsed_cell = cell
+
+        for neighbor_cell in neighbor_cells:
+            collapsed = False
+            if neighbor_cell in ignored_cells or same_cell(cell, neighbor_cell):
+                log('neighbor cell ignored')
+                continue
+
+            log('neighbor cell {neighbor_cell}'.format(neighbor_cell=neighbor_cell))
+
+            # Collapse adjacent cell on West side
+            if ((adjacent(collapsed_cell.x0, neighbor_cell.x1)) and
+                    (adjacent(neighbor_cell.y0, collapsed_cell.y0) or adjacent(neighbor_cell.y1, collapsed_cell.y1))):
+                log('[W] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
+                                                                             neighbor_cell=neighbor_cell))
+                collapsed_cell = collapse_west(collapsed_cell, neighbor_cell)
+                log('[W] resulting cell {cell}'.format(cell=collapsed_cell))
+                collapsed = True
+
+            # Collapse adjacent cell on East side
+            if ((adjacent(neighbor_cell.x0, collapsed_cell.x1)) and
+                    (adjacent(neighbor_cell.y0, collapsed_cell.y0) or adjacent(neighbor_cell.y1, collapsed_cell.y1))):
+                log('[E] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
+                                                                             neighbor_cell=neighbor_cell))
+                collapsed_cell = collapse_east(collapsed_cell, neighbor_cell)
+                log('[E] resulting cell {cell}'.format(cell=collapsed_cell))
+                collapsed = True
+
+            # Collapse adjacent cell on South side
+            if ((adjacent(collapsed_cell.y0, neighbor_cell.y1)) and
+                    (adjacent(neighbor_cell.x0, collapsed_cell.x0) or adjacent(neighbor_cell.x1, collapsed_cell.x1))):
+                log('[S] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
+                                                                             neighbor_cell=neighbor_cell))
+                collapsed_cell = collapse_south(collapsed_cell, neighbor_cell)
+                log('[S] resulting cell {cell}'.format(cell=collapsed_cell))
+                collapsed = True
+
+            # Collapse adjacent cell on North side
+            if ((adjacent(neighbor_cell.y0, collapsed_cell.y1)) and
+                    (adjacent(neighbor_cell.x0, collapsed_cell.x0) or
+                     adjacent(neighbor_cell.x1, collapsed_cell.x1))):
+                log('[N] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
+                                                                             neighbor_cell=neighbor_cell))
+                collapsed_cell = collapse_north(collapsed_cell, neighbor_cell)
+                log('[N] resulting cell {cell}'.format(cell=collapsed_cell))
+                collapsed = True
+
+            # Collapse inner cell
+            if ((collapsed_cell.x0 <= neighbor_cell.x0 <= neighbor_cell.x1 <= collapsed_cell.x1) and
+                    (collapsed_cell.y0 <= neighbor_cell.y0 <= neighbor_cell.y1 <= collapsed_cell.y1)):
+                log('[INNER] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
+                                                                                 neighbor_cell=neighbor_cell))
+                log('[INNER] resulting cell {cell}'.format(cell=collapsed_cell))
+                collapsed_cell.columns += neighbor_cell.columns
+                collapsed_cell.rows += neighbor_cell.rows
+                collapsed = True
+
+            # Collapse outer cell
+            if ((neighbor_cell.x0 <= collapsed_cell.x0 <= collapsed_cell.x1 <= neighbor_cell.x1) and
+                    (neighbor_cell.y0 <= collapsed_cell.y0 <= collapsed_cell.y1 <= neighbor_cell.y1)):
+                log('[OUTER] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
+                                                                                 neighbor_cell=neighbor_cell))
+                log('[OUTER] resulting cell {cell}'.format(cell=neighbor_cell))
+                neighbor_cell.columns += collapsed_cell.columns
+                neighbor_cell.rows += collapsed_cell.rows
+                collapsed_cell = neighbor_cell
+                collapsed = True
+
+            # Collapse overlapping cell on the right
+            if (neighbor_cell.x0 <= collapsed_cell.x1 and
+                    (collapsed_cell.y0 <= neighbor_cell.y0 <= collapsed_cell.y1 or
+                     collapsed_cell.y0 <= neighbor_cell.y1 <= collapsed_cell.y1)):
+                log('[OE] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
+                                                                              neighbor_cell=neighbor_cell))
+                collapsed_cell = collapse_overlapping(collapsed_cell, neighbor_cell)
+                log('[OE] resulting cell {cell}'.format(cell=collapsed_cell))
+                collapsed = True
+
+            # Collapse overlapping cell on the left
+            if (neighbor_cell.x1 >= collapsed_cell.x0 and
+                    (collapsed_cell.y0 <= neighbor_cell.y0 <= collapsed_cell.y1 or
+                     collapsed_cell.y0 <= neighbor_cell.y1 <= collapsed_cell.y1)):
+                log('[OW] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
+                                                                              neighbor_cell=neighbor_cell))
+                collapsed_cell = collapse_overlapping(collapsed_cell, neighbor_cell)
+                log('[OW] resulting cell {cell}'.format(cell=collapsed_cell))
+                collapsed = True
+
+            if collapsed:
+                ignored_cells.append(cell)
+                ignored_cells.append(neighbor_cell)
+                converged = False
+            else:
+                log('No match found for neighbor cell {cell}'.format(cell=neighbor_cell))
+
+        collapsed_cells.append(collapsed_cell)
+
+    if converged:
+        log('Converged. All cells collapsed....')
+        return collapsed_cells
+    else:
+        log('Final nb cells found: {ntables}'.format(ntables=len(collapsed_cells)))
+        for cell in collapsed_cells:
+            log(cell)
+        # Not converged yet, make a recursive call to ourselves with cells collapsed so far.
+        return legacy_find_outer_edges(collapsed_cells, nth_recursion=nth_recursion)
+
+
+def table(rows, columns, x, lines=False, y=40.0, width=6.0, height=4.0):
+    cells = []
+    if lines:
+        for i in range(rows + 1):
+            cells.append(Cell(x, y + i * height, x + columns * width, y + i * height + 0.5))
+        for j in range(columns + 1):
+            cells.append(Cell(x + j * width, y, x + j * width + 0.5, y + rows * height))
+    else:
+        for i in range(rows):
+            for j in range(columns):
+                cells.append(Cell(x + j * width, y + i * height, x + (j + 1) * width, y + (i + 1) * height))
+    return cells
+
+
+def page(rows, columns, lines):
+    # cells in drawing order: each table from its bottom row to its top row
+    return table(rows, columns, 20.0, lines) + table(rows, columns, 40.0, lines, y=50.0 + rows * 4.0)
+
+
+def outline(tables):
+    return sorted((table.x0, table.y0, table.x1, table.y1, table.rows, table.columns) for table in tables)
+
+
+def best_time(function, cells):
+    number = max(1, int(2000 / len(cells)))
+    return min(timeit.repeat(lambda: function(cells), number=number, repeat=3)) / number
+
+
+def main():
+    max_legacy_cells = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_LEGACY_CELLS
+    print('{:<8}{:>10}{:>8}{:>14}{:>14}{:>8}'.format('tables', 'size', 'cells', 'before (ms)', 'after (ms)', 'same'))
+    for lines in (False, True):
+        for rows, columns in SIZES:
+            cells = page(rows, columns, lines)
+            after = best_time(find_outer_edges, cells)
+            if len(cells) <= max_legacy_cells:
+                before = '{:.2f}'.format(best_time(legacy_find_outer_edges, page(rows, columns, lines)) * 1e3)
+                same = outline(legacy_find_outer_edges(page(rows, columns, lines))) == outline(find_outer_edges(cells))
+            else:
+                before, same = '-', '-'
+            print('{:<8}{:>10}{:>8}{:>14}{:>14.2f}{:>8}'.format('lines' if lines else 'cells',
+                                                                 '{}x{}'.format(rows, columns), len(cells), before,
+                                                                 after * 1e3, str(same)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# -*- coding: utf8 -*-
+"""
+Resource budget of the processing of a single document.
+
+A malformed pdf can make pdfminer loop or allocate memory without bounds. The helpers below turn such
+situations into exceptions the caller can handle, so that a worker process is never stuck on one document.
+Both limits rely on POSIX facilities and are silently disabled on other platforms.
+"""
+import os
+import signal
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MEGABYTE = 1024 * 1024
+
+
+class DocumentTimeout(BaseException):
+    """
+    Raised when the processing of a document exceeds its wall-clock budget
+
+    Not an Exception subclass so the "except Exception" clauses of the pdf libraries can not swallow it.
+    """
+    pass
+
+
+@contextmanager
+def time_limit(seconds):
+    """
+    Raise DocumentTimeout if the enclosed block runs for more than the given number of seconds.
+
+    Relies on SIGALRM, hence must be used from the main thread of the process.
+    :param seconds: wall-clock budget, 0 or None to disable
+    :return:
+    """
+    if not seconds or not hasattr(signal, 'SIGALRM'):
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        raise DocumentTimeout('Processing exceeded {} seconds'.format(seconds))
+
+    previous_handler = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def virtual_memory():
+    """
+
+    :return: virtual memory size of the current process in MB, None if not available
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            size_pages = int(statm.read().split()[0])
+    except (IOError, OSError, IndexError, ValueError):
+        return None
+    return size_pages * os.sysconf('SC_PAGE_SIZE') / MEGABYTE
+
+
+def limit_memory(megabytes):
+    """
+    Cap the memory the current process may allocate on top of what it uses already.
+
+    Allocations beyond the cap raise MemoryError. To be called again before each document, so that the memory kept
+    by the process across documents does not count against the budget of the next one.
+    :param megabytes: additional memory allowed, 0 or None to disable
+    :return: the limit set in bytes, None if no limit was set
+    """
+    if not megabytes or not resource:
+        return None
+    used = virtual_memory()
+    if used is None:
+        return None
+    limit = int((used + megabytes) * MEGABYTE)
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+    if hard_limit != resource.RLIM_INFINITY:
+        limit = min(limit, hard_limit)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard_limit))
+    return limit
+
+
+if __name__ == '__main__':
+    pass
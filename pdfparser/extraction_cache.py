@@ -0,0 +1,158 @@
+# -*- coding: utf8 -*-
+"""
+On-disk cache of the text extracted from pdf files.
+
+Entries are addressed by the hash of the pdf content, so a document stored under several JT numbers is
+parsed only once. The key also covers the extraction mode, the extractor version and the configuration
+options the extraction depends on: changing any of them invalidates the cache.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+
+from pdfparser import _config
+from pdfparser.text_extractor import EXTRACTOR_VERSION
+
+EXTRACTION_CACHE_FOLDER = _config.get('MAIN', 'EXTRACTION_CACHE_FOLDER')
+BLOCK_SIZE = 1024 * 1024  # bytes read at once when hashing a pdf file
+# options of the MAIN section the extracted text depends on
+EXTRACTION_OPTIONS = ['filter_tables', 'PAGE_Y_MIN', 'PAGE_Y_MAX', 'TEXT_MIN_FRACTION_SIZE', 'MIN_NUMBER_ROWS',
+                      'MIN_NUMBER_COLS', 'CELL_MIN_HEIGHT', 'CELL_MIN_WIDTH', 'MAX_RECURSION', 'ADJ_DISTANCE']
+
+
+def file_hash(file_path):
+    """
+
+    :param file_path: path of the file, or file object open for reading in binary mode, read from its start and
+    left at its position
+    :return: sha1 hex digest of the content of the file
+    """
+    if hasattr(file_path, 'read'):
+        position = file_path.tell()
+        file_path.seek(0)
+        try:
+            return _hash_blocks(file_path)
+        finally:
+            file_path.seek(position)
+    with open(file_path, 'rb') as in_file:
+        return _hash_blocks(in_file)
+
+
+def _hash_blocks(in_file):
+    sha1 = hashlib.sha1()
+    for block in iter(lambda: in_file.read(BLOCK_SIZE), ''):
+        sha1.update(block)
+    return sha1.hexdigest()
+
+
+def extraction_fingerprint(mode, wanted=None):
+    """
+
+    :param mode: extraction mode
+    :param wanted: fragment types wanted, None for all
+    :return: string identifying the extractor version and configuration for the given mode
+    """
+    options = ['{}={}'.format(option, _config.get('MAIN', option)) for option in EXTRACTION_OPTIONS]
+    wanted = ','.join(sorted(wanted)) if wanted else '*'
+    return '|'.join([EXTRACTOR_VERSION, mode, wanted] + options)
+
+
+class ExtractionCache:
+    """
+    Compressed extraction results, i.e. the contents fragment dict of PDFTextExtractor, one file per entry
+    """
+
+    def __init__(self, folder, logger=None):
+        """
+
+        :param folder: root folder of the cache, created if needed
+        :param logger:
+        """
+        if not logger:
+            from pdfparser import logger
+        self.logger = logger
+        self.folder = folder
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+
+    def key(self, pdf_file_path, mode, wanted=None, content_hash=None):
+        """
+
+        :param pdf_file_path: path of the pdf file, or pdf file object
+        :param mode: extraction mode
+        :param wanted: fragment types wanted, None for all
+        :param content_hash: file_hash of the file if known, the file is not read then
+        :return: cache key of the extraction of the given file
+        """
+        fingerprint = hashlib.sha1(extraction_fingerprint(mode, wanted)).hexdigest()
+        return '{}-{}'.format(content_hash or file_hash(pdf_file_path), fingerprint[:12])
+
+    def path(self, key):
+        # entries spread over sub folders named after the first hash characters
+        return os.path.join(self.folder, key[:2], key + '.json.z')
+
+    def get(self, key):
+        """
+
+        :param key:
+        :return: contents fragment dict, None if not cached
+        """
+        try:
+            with open(self.path(key), 'rb') as in_file:
+                data = in_file.read()
+        except IOError:
+            return None
+        try:
+            contents = json.loads(zlib.decompress(data))
+        except (zlib.error, ValueError) as ex:
+            self.logger.warning('Ignoring corrupted cache entry {} - {}'.format(key, ex))
+            return None
+        # fragment types are plain strings
+        return dict((str(fragment_type), fragments) for fragment_type, fragments in contents.items())
+
+    def put(self, key, contents):
+        """
+        Store the extraction result. The entry is written to a temporary file first, then renamed, so that
+        concurrent readers never see a partial entry.
+
+        :param key:
+        :param contents: contents fragment dict
+        :return: None
+        """
+        entry_path = self.path(key)
+        entry_folder = os.path.dirname(entry_path)
+        if not os.path.isdir(entry_folder):
+            try:
+                os.makedirs(entry_folder)
+            except OSError:
+                pass  # created concurrently
+        data = zlib.compress(json.dumps(contents))
+        fd, tmp_path = tempfile.mkstemp(dir=entry_folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out_file:
+                out_file.write(data)
+            if os.path.exists(entry_path):
+                os.remove(tmp_path)  # stored concurrently, renaming over it fails on Windows
+            else:
+                os.rename(tmp_path, entry_path)
+        except OSError as ex:
+            self.logger.warning('Unable to store cache entry {} - {}'.format(key, ex))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def default_cache(logger=None):
+    """
+
+    :param logger:
+    :return: ExtractionCache located in EXTRACTION_CACHE_FOLDER, None if no folder is configured
+    """
+    if not EXTRACTION_CACHE_FOLDER:
+        return None
+    return ExtractionCache(EXTRACTION_CACHE_FOLDER, logger=logger)
+
+
+if __name__ == '__main__':
+    pass
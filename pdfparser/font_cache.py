@@ -0,0 +1,121 @@
+# -*- coding: utf8 -*-
+"""
+Fonts shared by all the documents handled by a process.
+
+pdfminer caches the fonts of a document by object id, which only identifies a font within its document.
+Across documents, fonts are identified here by a digest of their specification, including the content of the
+embedded font files and ToUnicode maps: documents produced from the same templates then reuse the fonts
+decoded for the previous documents. CMaps are already cached process-wide by pdfminer CMapDB.
+"""
+import hashlib
+
+from pdfminer.pdfinterp import PDFResourceManager
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from pdfminer.psparser import PSLiteral, PSKeyword
+
+from pdfparser import _config
+from pdfparser.lru_cache import LRUCache
+
+FONT_CACHE_SIZE = _config.getint('MAIN', 'FONT_CACHE_SIZE')
+MAX_SPEC_DEPTH = 16  # font specifications nested deeper are not cached
+
+font_cache = LRUCache(FONT_CACHE_SIZE)
+
+
+class UnhashableSpec(Exception):
+    pass
+
+
+def font_key(spec):
+    """
+
+    :param spec: font specification, i.e. Font dictionary
+    :return: digest of the specification, None if it can not be computed
+    """
+    sha1 = hashlib.sha1()
+    try:
+        _update_digest(sha1, spec, 0)
+    except UnhashableSpec:
+        return None
+    return sha1.hexdigest()
+
+
+def _update_digest(sha1, obj, depth):
+    if depth > MAX_SPEC_DEPTH:
+        raise UnhashableSpec()
+    if isinstance(obj, PDFObjRef):
+        try:
+            obj = obj.resolve()
+        except Exception:
+            raise UnhashableSpec()
+    if isinstance(obj, dict):
+        sha1.update('d{}'.format(len(obj)))
+        for key in sorted(obj.keys()):
+            sha1.update('k{}:{}'.format(len(key), key))
+            _update_digest(sha1, obj[key], depth + 1)
+    elif isinstance(obj, (list, tuple)):
+        sha1.update('l{}'.format(len(obj)))
+        for item in obj:
+            _update_digest(sha1, item, depth + 1)
+    elif isinstance(obj, PDFStream):
+        _update_digest(sha1, obj.attrs, depth + 1)
+        # raw data until the stream is decoded, decoded data afterwards
+        if obj.rawdata is not None:
+            sha1.update('r{}:'.format(len(obj.rawdata)))
+            sha1.update(obj.rawdata)
+        else:
+            data = obj.data if obj.data is not None else ''
+            sha1.update('s{}:'.format(len(data)))
+            sha1.update(data)
+    elif isinstance(obj, PSLiteral):
+        sha1.update('n{!r}'.format(obj.name))
+    elif isinstance(obj, PSKeyword):
+        sha1.update('w{!r}'.format(obj.name))
+    elif obj is None or isinstance(obj, (bool, int, long, float, str, unicode)):
+        sha1.update('v{!r}'.format(obj))
+    else:
+        raise UnhashableSpec()
+
+
+def detach(font):
+    """
+    Drop the attributes only used to build the font, which keep references to the document and its parser
+
+    :param font: PDFFont
+    :return: font
+    """
+    font.descriptor = {}
+    if hasattr(font, 'fontfile'):
+        font.fontfile = None
+    return font
+
+
+class CachingResourceManager(PDFResourceManager):
+    """
+    Resource manager of one document, which reuses the fonts of the documents processed before
+    """
+
+    def __init__(self, cache=None):
+        """
+
+        :param cache: LRUCache of the fonts, shared process-wide by default
+        """
+        PDFResourceManager.__init__(self, caching=True)
+        self.cache = cache if cache is not None else font_cache
+
+    def get_font(self, objid, spec):
+        if objid and objid in self._cached_fonts:
+            return self._cached_fonts[objid]
+        key = font_key(spec) if self.cache.max_size > 0 else None
+        font = self.cache.get(key) if key else None
+        if font is None:
+            font = PDFResourceManager.get_font(self, None, spec)
+            if key:
+                self.cache.put(key, detach(font))
+        if objid:
+            self._cached_fonts[objid] = font
+        return font
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,59 @@
+# -*- coding: utf8 -*-
+"""
+Word frequency summarizer, in a single pass over the words of the document.
+
+A sentence is rated by the mean frequency in the document of its stemmed words out of the stop words, the
+frequencies divided by the highest one. The summary holds the sentences made of the words the document repeats most,
+as the first dimension of the LSA does, at the cost of counting the words: it serves the interactive calls, where the
+quadratic TextRank and LexRank or the LSA are too slow on long documents.
+"""
+from collections import defaultdict
+
+from sumy.summarizers._summarizer import AbstractSummarizer
+
+
+class FrequencySummarizer(AbstractSummarizer):
+    _stop_words = frozenset()
+
+    @property
+    def stop_words(self):
+        return self._stop_words
+
+    @stop_words.setter
+    def stop_words(self, words):
+        self._stop_words = frozenset(map(self.normalize_word, words))
+
+    def __call__(self, document, sentences_count):
+        ratings = iter(self.rate_sentences(document))
+        return self._get_best_sentences(document.sentences, sentences_count, lambda sentence: next(ratings))
+
+    def rate_sentences(self, document):
+        """
+
+        :param document: sumy document
+        :return: list of the ratings of the sentences of the document
+        """
+        stems = dict()
+        frequencies = defaultdict(int)
+        sentences_stems = []
+        for sentence in document.sentences:
+            sentence_stems = []
+            for word in sentence.words:
+                word = self.normalize_word(word)
+                if word in self._stop_words:
+                    continue
+                stem = stems.get(word)
+                if stem is None:
+                    stem = stems[word] = self._stemmer(word)
+                frequencies[stem] += 1
+                sentence_stems.append(stem)
+            sentences_stems.append(sentence_stems)
+        if not frequencies:
+            return [0.0] * len(sentences_stems)
+        highest = float(max(frequencies.itervalues()))
+        return [sum(frequencies[stem] for stem in sentence_stems) / highest / len(sentence_stems)
+                if sentence_stems else 0.0 for sentence_stems in sentences_stems]
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,338 @@
+# -*- coding: utf8 -*-
+"""
+Jobs run by a bounded pool of worker processes, on behalf of the REST service.
+
+A request submits a job and gets its id back at once: the job runs in a worker process, out of the threads of the
+web server where the CPU bound extraction and summary would compete for the GIL. The client then polls the status
+and the progress of the job and fetches its result.
+The number of jobs queued or running is bounded: beyond it submit() raises QueueFull, for the service to ask the
+clients to come back later instead of piling up requests. Finished jobs are kept for polling, up to a given number,
+the oldest ones dropped first.
+Jobs computing the same thing are coalesced (single-flight): a job submitted while a job of the same key is queued
+or running is that job, all the callers get its result from a single computation.
+"""
+import collections
+import multiprocessing as mp
+import threading
+import time
+import uuid
+
+from pdfparser.budget import DocumentTimeout
+
+
+class JobStatus:
+    """
+    Status of a job
+    """
+
+    def __init__(self):
+        pass
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class QueueFull(Exception):
+    """
+    Raised when a job is submitted while the maximum number of jobs are queued or running
+    """
+    pass
+
+
+class PoolUnavailable(Exception):
+    """
+    Raised when a job is submitted to a stopped manager
+    """
+    pass
+
+
+# State of the worker process: queue of the progress reports, id of the job being run
+_progress_queue, _job_id = None, None
+
+
+def _init_worker(progress_queue, initializer, initargs):
+    global _progress_queue
+    _progress_queue = progress_queue
+    if initializer:
+        initializer(*initargs)
+
+
+def report_progress(stage, progress=None):
+    """
+    Report the progress of the job run by the current process, does nothing out of a job
+
+    :param stage: name of the current step of the job
+    :param progress: share of the job done, between 0 and 1, None if unknown
+    :return: None
+    """
+    if _progress_queue is not None and _job_id is not None:
+        _progress_queue.put((_job_id, stage, progress))
+
+
+def _run_job(job_id, function, args):
+    """
+    Run a job in a worker process
+
+    :return: Tuple (True, result) or (False, error)
+    """
+    global _job_id
+    _job_id = job_id
+    try:
+        report_progress(JobStatus.RUNNING, 0.0)
+        return True, function(*args)
+    except (Exception, DocumentTimeout) as ex:
+        return False, repr(ex)
+    finally:
+        _job_id = None
+
+
+class Job:
+    """
+    Job submitted to a JobManager
+
+    The attributes are updated by the manager, under its lock.
+    """
+
+    def __init__(self, job_id, args, submitted, key=None):
+        self.id = job_id
+        self.args = args
+        self.key = key
+        self.status = JobStatus.QUEUED
+        self.stage = JobStatus.QUEUED
+        self.progress = 0.0
+        self.submitted = submitted
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def as_dict(self):
+        """
+
+        :return: dict of the status of the job, without its result
+        """
+        return {'id': self.id, 'status': self.status, 'stage': self.stage, 'progress': self.progress,
+                'submitted': self.submitted, 'started': self.started, 'finished': self.finished, 'error': self.error}
+
+
+class JobManager:
+    """
+    Jobs calling a function in a pool of worker processes
+
+    All methods are thread safe. The pool is started by start(), or by the first job submitted: a web server
+    should start it before its threads, the worker processes being forked from the server process.
+    """
+
+    def __init__(self, function, nb_processes, max_jobs, keep_finished=1000, job_timeout=None, job_key=None,
+                 initializer=None, initargs=(), maxtasksperchild=None, clock=None, logger=None):
+        """
+
+        :param function: module level function run by the jobs
+        :param nb_processes: number of worker processes
+        :param max_jobs: maximum number of jobs queued or running
+        :param keep_finished: number of finished jobs kept for polling
+        :param job_timeout: number of seconds after which a running job is deemed lost with its worker process,
+         None to wait for ever. The function is expected to enforce a shorter budget itself
+        :param job_key: function of the arguments of a job returning the key of its computation, None if the job
+         is never coalesced with another one. None to run every job submitted
+        :param initializer: function called at the start of each worker process
+        :param initargs: arguments of the initializer
+        :param maxtasksperchild: number of jobs run by a worker process before it is replaced, None for no limit
+        :param clock: function returning the current time, for testing purposes
+        :param logger:
+        """
+        if not logger:
+            from pdfparser import logger
+        self.logger = logger
+        self.function = function
+        self.nb_processes = nb_processes
+        self.max_jobs = max_jobs
+        self.keep_finished = keep_finished
+        self.job_timeout = job_timeout
+        self.initializer = initializer
+        self.initargs = initargs
+        self.maxtasksperchild = maxtasksperchild
+        self.clock = clock if clock else time.time
+        self.lock = threading.Lock()
+        self.job_finished = threading.Condition(self.lock)
+        self.jobs = dict()  # k=job id, v=Job
+        self.finished = collections.deque()  # ids of the finished jobs, oldest first
+        self.nb_pending = 0  # jobs queued or running
+        self.job_key = job_key
+        self.in_flight = dict()  # k=job key, v=job of the key queued or running
+        self.nb_coalesced = 0
+        self.pool = None
+        self.progress_queue = None
+        self.listener = None
+        self.stopped = False
+
+    def start(self):
+        """
+        Start the worker processes, if not started yet
+
+        :return: None
+        """
+        with self.lock:
+            self._start()
+
+    def _start(self):
+        if self.pool is not None:
+            return
+        if self.stopped:
+            raise PoolUnavailable('Job manager stopped')
+        self.progress_queue = mp.Queue()
+        self.pool = mp.Pool(processes=self.nb_processes, initializer=_init_worker,
+                            initargs=(self.progress_queue, self.initializer, self.initargs),
+                            maxtasksperchild=self.maxtasksperchild)
+        self.listener = threading.Thread(target=self._listen, name='job-progress')
+        self.listener.daemon = True
+        self.listener.start()
+        self.logger.info('Job manager started, {} processes'.format(self.nb_processes))
+
+    def stop(self):
+        """
+        Stop the worker processes, the jobs queued or running are lost
+
+        :return: None
+        """
+        with self.lock:
+            self.stopped = True
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+            self.progress_queue.put(None)
+            self.listener.join()
+
+    def submit(self, *args):
+        """
+        Queue a job calling the function with the given arguments
+
+        :param args: arguments of the function, picklable
+        :return: Job, the job queued or running with the same key if any
+        """
+        key = self.job_key(*args) if self.job_key else None
+        with self.lock:
+            self._start()
+            if key is not None and key in self.in_flight:
+                self.nb_coalesced += 1
+                return self.in_flight[key]
+            if self.nb_pending >= self.max_jobs:
+                raise QueueFull('{} jobs queued or running'.format(self.nb_pending))
+            job = Job(uuid.uuid4().hex, args, self.clock(), key)
+            self.jobs[job.id] = job
+            if key is not None:
+                self.in_flight[key] = job
+            self.nb_pending += 1
+            self.pool.apply_async(_run_job, (job.id, self.function, args),
+                                  callback=lambda outcome: self._finish(job.id, *outcome))
+        return job
+
+    def get(self, job_id):
+        """
+
+        :param job_id:
+        :return: Job, None if unknown or dropped
+        """
+        with self.lock:
+            self._expire()
+            return self.jobs.get(job_id)
+
+    def wait(self, job, timeout=None):
+        """
+        Wait for a job to finish
+
+        :param job: Job
+        :param timeout: number of seconds, None to wait for ever
+        :return: True if the job is finished
+        """
+        return job.done.wait(timeout)
+
+    def wait_any(self, jobs, timeout=None):
+        """
+        Wait for the first of several jobs to finish
+
+        :param jobs: list of Job
+        :param timeout: number of seconds, None to wait for ever
+        :return: list of the jobs finished, empty if none finished within the timeout
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self.lock:
+            while True:
+                # a job lost with its worker process never finishes by itself
+                self._expire()
+                finished = [job for job in jobs if job.done.is_set()]
+                remaining = 1.0 if deadline is None else min(1.0, deadline - time.time())
+                if finished or not jobs or remaining <= 0:
+                    return finished
+                self.job_finished.wait(remaining)
+
+    def stats(self):
+        """
+
+        :return: dict of the number of jobs by status, and of the number of submissions coalesced with a job
+        """
+        with self.lock:
+            self._expire()
+            counts = collections.Counter(job.status for job in self.jobs.values())
+            stats = {status: counts[status] for status in (JobStatus.QUEUED, JobStatus.RUNNING, JobStatus.DONE,
+                                                           JobStatus.FAILED)}
+            stats['coalesced'] = self.nb_coalesced
+            return stats
+
+    def _finish(self, job_id, succeeded, value):
+        # called by the result handler thread of the pool
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.done.is_set():
+                return  # deemed lost already
+            if succeeded:
+                job.status, job.result = JobStatus.DONE, value
+            else:
+                job.status, job.error = JobStatus.FAILED, value
+            self._close(job)
+
+    def _close(self, job):
+        job.stage, job.progress, job.finished = job.status, 1.0, self.clock()
+        self.nb_pending -= 1
+        if self.in_flight.get(job.key) is job:
+            del self.in_flight[job.key]
+        self.finished.append(job.id)
+        while len(self.finished) > self.keep_finished:
+            self.jobs.pop(self.finished.popleft(), None)
+        job.done.set()
+        self.job_finished.notify_all()
+
+    def _expire(self):
+        if not self.job_timeout:
+            return
+        deadline = self.clock() - self.job_timeout
+        for job in self.jobs.values():
+            if job.status == JobStatus.RUNNING and job.started < deadline:
+                self.logger.error('Job {} lost, running for more than {} seconds'.format(job.id, self.job_timeout))
+                job.status, job.error = JobStatus.FAILED, 'Lost with its worker process'
+                self._close(job)
+
+    def _listen(self):
+        # progress reports of the worker processes
+        while True:
+            report = self.progress_queue.get()
+            if report is None:
+                return
+            job_id, stage, progress = report
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if job is None or job.done.is_set():
+                    continue
+                if job.status == JobStatus.QUEUED:
+                    job.status, job.started = JobStatus.RUNNING, self.clock()
+                job.stage = stage
+                if progress is not None:
+                    job.progress = progress
+
+
+if __name__ == '__main__':
+    pass
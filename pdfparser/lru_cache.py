@@ -0,0 +1,105 @@
+# -*- coding: utf8 -*-
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Mapping bounded in size: the least recently used entries are evicted first.
+
+    The cache is bounded in number of entries, and optionally in total size of the values, as given by a function of
+    the values (len by default, for strings). A value larger than the whole byte bound is not cached.
+    Thread safe, since the REST service handles requests in several threads.
+    Hits, misses and evictions are counted to measure the benefit of the cache.
+    """
+
+    def __init__(self, max_size, max_bytes=None, sizeof=len):
+        """
+
+        :param max_size: maximum number of entries, 0 disables the cache
+        :param max_bytes: maximum total size of the values, None for no bound
+        :param sizeof: function returning the size of a value, used if max_bytes is given
+        """
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.entries = OrderedDict()
+        self.sizes = dict()  # k=key, v=size of the value, 0 without byte bound
+        self.nbytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """
+
+        :param key:
+        :param default: value returned if the key is not cached
+        :return: cached value, which becomes the most recently used one
+        """
+        with self.lock:
+            try:
+                value = self.entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.entries[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used entries beyond max_size or max_bytes
+
+        :param key:
+        :param value:
+        :return: None
+        """
+        with self.lock:
+            self._remove(key)
+            if self.max_size <= 0:
+                return
+            size = self.sizeof(value) if self.max_bytes is not None else 0
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self.entries[key] = value
+            self.sizes[key] = size
+            self.nbytes += size
+            while len(self.entries) > self.max_size or (self.max_bytes is not None and self.nbytes > self.max_bytes):
+                oldest, _ = self.entries.popitem(last=False)
+                self.nbytes -= self.sizes.pop(oldest)
+                self.evictions += 1
+
+    def remove(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.nbytes = 0
+
+    def _remove(self, key):
+        if key in self.entries:
+            del self.entries[key]
+            self.nbytes -= self.sizes.pop(key)
+
+    def stats(self):
+        """
+
+        :return: dict with the size of the cache, in entries and bytes, and its hit/miss/eviction counters
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self.entries), 'max_size': self.max_size, 'bytes': self.nbytes,
+                    'max_bytes': self.max_bytes, 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'hit_ratio': float(self.hits) / lookups if lookups else 0.0}
+
+
+if __name__ == '__main__':
+    pass
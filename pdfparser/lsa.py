@@ -0,0 +1,227 @@
+# -*- coding: utf8 -*-
+"""
+Latent semantic analysis of a document on its sparse term by sentence matrix.
+
+The LSA summarizer of sumy fills a dense |words| x |sentences| matrix cell by cell in Python, then computes its full
+singular value decomposition: for a document of a few thousand sentences the matrix weighs hundreds of megabytes and
+the decomposition takes minutes. The summarizer below ranks the sentences the same way from the non-zero counts only:
+    - the counts of the stemmed words are kept as coordinates (word, sentence, count), a few per sentence
+    - the smoothed term frequencies of a sentence are 0.4 + 0.6 * count / max count, for all the words of the
+      dictionary, i.e. a constant matrix plus a sparse one: the products by the matrix never build it
+    - the rank of a sentence is the norm of its column in the singular vectors space, scaled by the singular values,
+      on the first dimensions of the decomposition. When all the dimensions are kept, which is what sumy does, the
+      rotation by the left singular vectors preserves the norms: the rank is the norm of the column of the term
+      frequencies matrix, computed without any decomposition
+    - when fewer dimensions are kept, only these are computed, by a randomized truncated decomposition
+      (Halko, Martinsson, Tropp, 2011) on the products by the matrix
+
+SciPy is not a dependency of the project: the sparse products are NumPy reductions over the sorted coordinates.
+"""
+import numpy as np
+
+from sumy.summarizers._summarizer import AbstractSummarizer
+
+SMOOTH = 0.4
+OVERSAMPLING = 10
+POWER_ITERATIONS = 2
+SEED = 0
+# columns of the blocks multiplied at once, bounding the memory of the products to non-zero counts x BLOCK_COLUMNS
+BLOCK_COLUMNS = 16
+
+
+class TermFrequencies:
+    """
+    Smoothed term frequencies of a |words| x |sentences| matrix held by its non-zero counts
+
+    The frequency of a word in a sentence is smooth + (1 - smooth) * count / max count of the sentence, zero in the
+    sentences without any word of the dictionary.
+    """
+
+    def __init__(self, rows, columns, counts, shape, smooth=SMOOTH):
+        """
+
+        :param rows: array of the word indexes of the non-zero counts
+        :param columns: array of the sentence indexes of the non-zero counts, one count per (row, column)
+        :param counts: array of the counts
+        :param shape: tuple (number of words, number of sentences)
+        :param smooth: smoothing of the frequencies
+        """
+        self.shape = shape
+        self.smooth = smooth
+        self.rows = rows
+        self.columns = columns
+        max_counts = np.zeros(shape[1])
+        np.maximum.at(max_counts, columns, counts)
+        # frequencies above the smoothing constant
+        self.values = (1.0 - smooth) * counts / max_counts[columns]
+        # sentences with words
+        self.filled = (max_counts > 0).astype(float)
+        self._by_row = _grouping(rows)
+        self._by_column = _grouping(columns)
+
+    def column_norms(self):
+        """
+
+        :return: array of the euclidean norms of the columns
+        """
+        squares = np.bincount(self.columns, weights=(self.smooth + self.values) ** 2 - self.smooth ** 2,
+                              minlength=self.shape[1])
+        return np.sqrt(self.filled * (self.shape[0] * self.smooth ** 2 + squares))
+
+    def dot(self, block):
+        """
+
+        :param block: array |sentences| x k
+        :return: matrix product, array |words| x k
+        """
+        product = np.empty((self.shape[0], block.shape[1]))
+        product[:] = self.smooth * self.filled.dot(block)
+        for start in range(0, block.shape[1], BLOCK_COLUMNS):
+            columns = slice(start, start + BLOCK_COLUMNS)
+            product[:, columns] += _reduce(self._by_row, self.values[:, None] * block[self.columns, columns],
+                                           self.shape[0])
+        return product
+
+    def tdot(self, block):
+        """
+
+        :param block: array |words| x k
+        :return: product of the transposed matrix, array |sentences| x k
+        """
+        product = self.smooth * np.outer(self.filled, block.sum(axis=0))
+        for start in range(0, block.shape[1], BLOCK_COLUMNS):
+            columns = slice(start, start + BLOCK_COLUMNS)
+            product[:, columns] += _reduce(self._by_column, self.values[:, None] * block[self.rows, columns],
+                                           self.shape[1])
+        return product
+
+
+def _grouping(indexes):
+    """
+
+    :param indexes: array of the index of each non-zero count
+    :return: tuple (permutation sorting the indexes, distinct indexes, start of each one in the sorted indexes)
+    """
+    order = np.argsort(indexes, kind='mergesort')
+    unique, starts = np.unique(indexes[order], return_index=True)
+    return order, unique, starts
+
+
+def _reduce(grouping, values, size):
+    """
+    Sum the rows of values by index
+
+    :param grouping: grouping of the indexes of the rows
+    :param values: 2-D array, one row per non-zero count
+    :param size: number of indexes
+    :return: array size x values.shape[1]
+    """
+    order, unique, starts = grouping
+    reduced = np.zeros((size, values.shape[1]))
+    if len(order):
+        reduced[unique] = np.add.reduceat(values[order], starts, axis=0)
+    return reduced
+
+
+def truncated_svd(matrix, dimensions, oversampling=OVERSAMPLING, power_iterations=POWER_ITERATIONS, seed=SEED):
+    """
+    First singular values and right singular vectors, by a randomized range finder
+
+    :param matrix: TermFrequencies
+    :param dimensions: number of singular values
+    :param oversampling: number of additional random directions
+    :param power_iterations: number of power iterations, sharpening the range on slowly decaying spectra
+    :param seed: seed of the random directions, the ranks of a document do not change from one call to another
+    :return: tuple (singular values, right singular vectors as rows)
+    """
+    size = min(dimensions + oversampling, min(matrix.shape))
+    directions = np.random.RandomState(seed).standard_normal((matrix.shape[1], size))
+    basis = np.linalg.qr(matrix.dot(directions))[0]
+    for _ in range(power_iterations):
+        basis = np.linalg.qr(matrix.dot(np.linalg.qr(matrix.tdot(basis))[0]))[0]
+    # projection on the basis: the transpose of basis.T * matrix
+    _, sigma, v_matrix = np.linalg.svd(matrix.tdot(basis).T, full_matrices=False)
+    return sigma[:dimensions], v_matrix[:dimensions]
+
+
+class SparseLsaSummarizer(AbstractSummarizer):
+    """
+    LSA summarizer of sumy on the sparse term by sentence matrix
+    """
+    MIN_DIMENSIONS = 3
+    REDUCTION_RATIO = 1.0
+    _stop_words = frozenset()
+
+    def __init__(self, stemmer, reduction_ratio=REDUCTION_RATIO):
+        AbstractSummarizer.__init__(self, stemmer)
+        self.reduction_ratio = reduction_ratio
+
+    @property
+    def stop_words(self):
+        return self._stop_words
+
+    @stop_words.setter
+    def stop_words(self, words):
+        self._stop_words = frozenset(map(self.normalize_word, words))
+
+    def __call__(self, document, sentences_count):
+        ranks = self.rank_sentences(document)
+        if ranks is None:
+            return ()
+        ranks = iter(ranks)
+        return self._get_best_sentences(document.sentences, sentences_count, lambda sentence: next(ranks))
+
+    def rank_sentences(self, document):
+        """
+
+        :param document: sumy document
+        :return: array of the ranks of the sentences of the document, None if it has no word out of the stop words
+        """
+        matrix = self.term_frequencies(document)
+        if matrix is None:
+            return None
+        dimensions = max(self.MIN_DIMENSIONS, int(min(matrix.shape) * self.reduction_ratio))
+        if dimensions >= min(matrix.shape):
+            return matrix.column_norms()
+        sigma, v_matrix = truncated_svd(matrix, dimensions)
+        return np.sqrt(((sigma[:, None] * v_matrix) ** 2).sum(axis=0))
+
+    def term_frequencies(self, document):
+        """
+        Term frequencies of the stemmed words of the document, the dictionary holding the words out of the stop words
+        (of the sentences and of the headings)
+
+        :param document: sumy document
+        :return: TermFrequencies, None if the dictionary is empty
+        """
+        stems = dict()
+        dictionary = dict()
+        for word in document.words:
+            word = self.normalize_word(word)
+            if word not in self._stop_words:
+                stem = stems.get(word)
+                if stem is None:
+                    stem = stems[word] = self._stemmer(word)
+                dictionary.setdefault(stem, len(dictionary))
+        if not dictionary:
+            return None
+
+        rows, columns = [], []
+        for column, sentence in enumerate(document.sentences):
+            for word in sentence.words:
+                word = self.normalize_word(word)
+                stem = stems.get(word)
+                if stem is None:
+                    stem = stems[word] = self._stemmer(word)
+                row = dictionary.get(stem)
+                if row is not None:
+                    rows.append(row)
+                    columns.append(column)
+        shape = len(dictionary), len(document.sentences)
+        cells, counts = np.unique(np.array(columns, dtype=np.int64) * shape[0] + np.array(rows, dtype=np.int64),
+                                  return_counts=True)
+        return TermFrequencies(cells % shape[0], cells // shape[0], counts.astype(float), shape)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,245 @@
+# -*- coding: utf8 -*-
+import os
+import sqlite3
+import time
+
+PAGE_SIZE = 500  # number of rows fetched at once when iterating over the manifest
+
+
+class DocumentStatus:
+    """
+    Processing status of a document recorded in the manifest
+    """
+
+    def __init__(self):
+        pass
+
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    QUARANTINED = 'quarantined'  # exceeded its time or memory budget
+
+
+class JobManifest:
+    """
+    Persistent record of the documents handled by the bulk summarizer.
+
+    Documents are keyed by their pdf path. Once a folder has been scanned, resuming a run only requires
+    a query on the manifest instead of probing the file system for every single pdf.
+    """
+
+    def __init__(self, db_path, logger=None):
+        """
+
+        :param db_path: location of the sqlite database file
+        :param logger:
+        """
+        if not logger:
+            from pdfparser import logger
+        self.logger = logger
+        self.db_path = db_path
+        self.connection = self.connect()
+        self.create_schema()
+
+    def connect(self):
+        """
+        Open a new connection on the manifest.
+
+        sqlite connections can not be shared between threads, hence generators consumed by
+        the multiprocessing task handler open their own connection.
+        :return: sqlite3 connection
+        """
+        connection = sqlite3.connect(self.db_path, timeout=60)
+        connection.text_factory = str
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def create_schema(self):
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS documents (
+                pdf_path TEXT PRIMARY KEY,
+                jt TEXT NOT NULL,
+                folder_structure TEXT NOT NULL,
+                source TEXT NOT NULL,
+                year INTEGER,
+                status TEXT NOT NULL,
+                output_file TEXT,
+                size INTEGER,
+                mtime REAL,
+                started REAL,
+                finished REAL,
+                duration REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_documents_status ON documents (status, source, year);
+            CREATE INDEX IF NOT EXISTS idx_documents_size ON documents (status, size);
+            CREATE TABLE IF NOT EXISTS scans (
+                scope TEXT PRIMARY KEY,
+                finished REAL NOT NULL
+            );
+        ''')
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def is_scanned(self, scope):
+        """
+
+        :param scope: identifies the set of documents scanned, e.g. source and root folder
+        :return: True if the scope was already completely scanned
+        """
+        row = self.connection.execute('SELECT 1 FROM scans WHERE scope = ?', (scope,)).fetchone()
+        return row is not None
+
+    def mark_scanned(self, scope):
+        self.connection.execute('INSERT OR REPLACE INTO scans (scope, finished) VALUES (?, ?)', (scope, time.time()))
+        self.connection.commit()
+
+    def contains(self, pdf_path):
+        row = self.connection.execute('SELECT 1 FROM documents WHERE pdf_path = ?', (pdf_path,)).fetchone()
+        return row is not None
+
+    def register(self, info, source, status=DocumentStatus.PENDING, output_file=None, size=None, mtime=None,
+                 year=None):
+        """
+        Add a new document to the manifest. Documents already known are left untouched.
+
+        :param info: tuple (jt, folder_structure, pdf_path)
+        :param source: olis or report
+        :param status: initial status
+        :param output_file:
+        :param size: size of the pdf file in bytes
+        :param mtime: last modification time of the pdf file
+        :param year: year of the failed summaries list (report source only)
+        :return: None
+        """
+        jt, folder_structure, pdf_path = info[0], info[1], info[2]
+        self.connection.execute('INSERT OR IGNORE INTO documents '
+                                '(pdf_path, jt, folder_structure, source, year, status, output_file, size, mtime) '
+                                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                (pdf_path, jt, folder_structure, source, year, status, output_file, size, mtime))
+
+    def commit(self):
+        self.connection.commit()
+
+    def record(self, pdf_path, status, output_file=None, started=None, finished=None, error=None):
+        """
+        Store the outcome of the processing of a document
+
+        :param pdf_path:
+        :param status: done or failed
+        :param output_file:
+        :param started: timestamp
+        :param finished: timestamp
+        :param error: error message, if any
+        :return: None
+        """
+        duration = finished - started if started and finished else None
+        self.connection.execute('UPDATE documents SET status = ?, output_file = COALESCE(?, output_file), '
+                                'started = ?, finished = ?, duration = ?, attempts = attempts + 1, error = ? '
+                                'WHERE pdf_path = ?',
+                                (status, output_file, started, finished, duration, error, pdf_path))
+        self.connection.commit()
+
+    def get(self, pdf_path):
+        cursor = self.connection.execute('SELECT pdf_path, jt, folder_structure, status, output_file, size, mtime, '
+                                         'duration, attempts, error FROM documents WHERE pdf_path = ?', (pdf_path,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def count(self, statuses, source=None, year=None, path_prefix=None):
+        where, parameters = self.build_filter(statuses, source, year, path_prefix)
+        return self.connection.execute('SELECT COUNT(*) FROM documents WHERE ' + where, parameters).fetchone()[0]
+
+    def total_size(self, statuses, source=None, year=None, path_prefix=None):
+        where, parameters = self.build_filter(statuses, source, year, path_prefix)
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM documents WHERE ' + where,
+                                       parameters).fetchone()[0]
+
+    def iter_documents(self, statuses, source=None, year=None, path_prefix=None, largest_first=False,
+                       with_size=False):
+        """
+        Generator function which produces the documents matching the given status.
+
+        Rows are fetched page by page with a dedicated connection so the whole list is never loaded in memory.
+        Each page is a short query resuming after the last row produced (keyset paging): no read transaction stays
+        open between pages, which would keep the WAL from being checkpointed for the whole run.
+        :param statuses: list of statuses to select
+        :param source: olis or report
+        :param year: restrict to the given year (report source only)
+        :param path_prefix: restrict to pdf paths under given folder
+        :param largest_first: order the documents by decreasing file size instead of registration order, documents
+        of unknown size last
+        :param with_size: produce the size of the pdf file along with the document details
+        :return: Tuple (jt, folder_structure, pdf_path), or ((jt, folder_structure, pdf_path), size)
+        """
+        where, parameters = self.build_filter(statuses, source, year, path_prefix)
+        # documents of unknown size sort after the empty ones
+        sort_size = 'COALESCE(size, -1)'
+        connection = self.connect()
+        try:
+            last_size, last_rowid = None, 0
+            while True:
+                if not largest_first:
+                    after, after_parameters = 'rowid > ?', [last_rowid]
+                    order = 'rowid'
+                elif last_size is None:
+                    after, after_parameters = '1', []
+                    order = sort_size + ' DESC, rowid'
+                else:
+                    after = '({size} < ? OR ({size} = ? AND rowid > ?))'.format(size=sort_size)
+                    after_parameters = [last_size, last_size, last_rowid]
+                    order = sort_size + ' DESC, rowid'
+                rows = connection.execute('SELECT rowid, jt, folder_structure, pdf_path, size FROM documents '
+                                          'WHERE ' + after + ' AND ' + where + ' ORDER BY ' + order + ' LIMIT ?',
+                                          after_parameters + parameters + [PAGE_SIZE]).fetchall()
+                if not rows:
+                    break
+                for rowid, jt, folder_structure, pdf_path, size in rows:
+                    last_size, last_rowid = -1 if size is None else size, rowid
+                    if with_size:
+                        yield (jt, folder_structure, pdf_path), size
+                    else:
+                        yield (jt, folder_structure, pdf_path)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def build_filter(statuses, source=None, year=None, path_prefix=None):
+        clauses = ['status IN ({})'.format(', '.join('?' * len(statuses)))]
+        parameters = list(statuses)
+        if source:
+            clauses.append('source = ?')
+            parameters.append(source)
+        if year:
+            clauses.append('year = ?')
+            parameters.append(year)
+        if path_prefix:
+            # the documents of the folder, not of its siblings sharing the prefix (2014/1 is not 2014/10)
+            folder = path_prefix.rstrip(os.sep) + os.sep
+            # range condition rather than LIKE so the primary key index can be used
+            clauses.append('pdf_path >= ? AND pdf_path < ?')
+            parameters.extend([folder, folder + '\xff'])
+        return ' AND '.join(clauses), parameters
+
+
+def file_stats(file_path):
+    """
+
+    :param file_path:
+    :return: size and modification time of given file, (None, None) if not available
+    """
+    try:
+        stats = os.stat(file_path)
+    except OSError:
+        return None, None
+    return stats.st_size, stats.st_mtime
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,184 @@
+# -*- coding: utf8 -*-
+"""
+Columnar geometry of the text boxes of a page.
+
+The text of a page is a dict of texts keyed by the (x0, y0, x1, y1) coordinates of their boxes. Next to the dict,
+the coordinates are held in a NumPy array with one row per box and the texts in a parallel list, in the iteration
+order of the dict: the page filters and the reading order then run as masks and sorts over all the boxes at once.
+
+The rectangles handled one by one, e.g. the cells of the table extractors, are Box objects: a page holds thousands
+of them, they only store their coordinates.
+"""
+import numpy as np
+
+X0, Y0, X1, Y1 = 0, 1, 2, 3
+
+
+class Box(object):
+    """
+    Rectangle of a page, (x0, y0) its bottom left corner and (x1, y1) its top right corner
+    """
+    __slots__ = ('x0', 'y0', 'x1', 'y1')
+
+    def __init__(self, x0, y0, x1, y1):
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+
+    @property
+    def width(self):
+        return abs(self.x0 - self.x1)
+
+    @property
+    def height(self):
+        return abs(self.y0 - self.y1)
+
+    @property
+    def coord(self):
+        return self.x0, self.y0, self.x1, self.y1
+
+
+class PageText(dict):
+    """
+    Texts of a page by box coordinates, with their columnar view
+
+    The view is built on first use, then kept in sync when boxes are removed with remove().
+    Any other change to the dict drops it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self._columns = None
+
+    def columns(self):
+        """
+
+        :return: Tuple (keys, coordinates array, texts) in the iteration order of the dict
+        """
+        if self._columns is None:
+            self._columns = build_columns(self)
+        return self._columns
+
+    def remove(self, mask):
+        """
+        Remove the boxes selected by the mask, keeping the columnar view
+
+        :param mask: boolean array, one value per box of the view
+        :return: None
+        """
+        keys, coords, texts = self.columns()
+        for i in np.flatnonzero(mask):
+            dict.__delitem__(self, keys[i])
+        # removing keys does not change the iteration order of the remaining ones
+        kept = ~mask
+        self._columns = ([key for key, keep in zip(keys, kept) if keep], coords[kept],
+                         [text for text, keep in zip(texts, kept) if keep])
+
+    def __setitem__(self, key, value):
+        self._columns = None
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._columns = None
+        dict.__delitem__(self, key)
+
+    def pop(self, *args):
+        self._columns = None
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self._columns = None
+        return dict.popitem(self)
+
+    def setdefault(self, *args):
+        self._columns = None
+        return dict.setdefault(self, *args)
+
+    def update(self, *args, **kwargs):
+        self._columns = None
+        dict.update(self, *args, **kwargs)
+
+    def clear(self):
+        self._columns = None
+        dict.clear(self)
+
+
+def build_columns(page_txt):
+    """
+
+    :param page_txt: dict of texts by box coordinates
+    :return: Tuple (keys, coordinates array with one row per box, texts) in the iteration order of the dict
+    """
+    keys, texts = page_txt.keys(), page_txt.values()
+    if not keys:
+        return keys, np.empty((0, 4)), texts
+    return keys, np.array(keys, dtype=float).reshape(len(keys), -1), texts
+
+
+def columns(page_txt):
+    """
+
+    :param page_txt: PageText, or plain dict of texts by box coordinates
+    :return: Tuple (keys, coordinates array, texts) in the iteration order of the dict
+    """
+    if isinstance(page_txt, PageText):
+        return page_txt.columns()
+    return build_columns(page_txt)
+
+
+def remove_boxes(page_txt, mask):
+    """
+
+    :param page_txt: PageText, or plain dict of texts by box coordinates
+    :param mask: boolean array selecting the boxes to remove, in the order of columns(page_txt)
+    :return: None
+    """
+    if isinstance(page_txt, PageText):
+        page_txt.remove(mask)
+    else:
+        keys = columns(page_txt)[0]
+        for i in np.flatnonzero(mask):
+            page_txt.pop(keys[i])
+
+
+def round_half_away(values):
+    """
+    Round to the unit like round(x, 0) of Python 2, halfway values away from zero (NumPy rounds them to even)
+
+    :param values: array
+    :return: array of rounded values
+    """
+    magnitude = np.abs(values)
+    floor = np.floor(magnitude)
+    return np.copysign(floor + (magnitude - floor >= 0.5), values)
+
+
+def reading_order(page_txt, mask=None):
+    """
+    Texts from the top to the bottom of the page then from left to right, on coordinates rounded to the unit.
+    The order is that of sorting the tuples (round(-y0, 0), round(x0, 0), text).
+
+    :param page_txt: PageText, or plain dict of texts by box coordinates
+    :param mask: boolean array selecting the boxes to order, None for all boxes
+    :return: list of texts
+    """
+    _, coords, texts = columns(page_txt)
+    indexes = np.arange(len(texts)) if mask is None else np.flatnonzero(mask)
+    if not len(indexes):
+        return []
+    top = round_half_away(-coords[indexes, Y0])
+    left = round_half_away(coords[indexes, X0])
+    order = np.lexsort((left, top))
+    same_position = (top[order][1:] == top[order][:-1]) & (left[order][1:] == left[order][:-1])
+    if same_position.any():
+        # boxes at the same rounded position are ordered by their text
+        selected = [texts[i] for i in indexes]
+        ranks = np.empty(len(selected), dtype=int)
+        ranks[sorted(range(len(selected)), key=selected.__getitem__)] = np.arange(len(selected))
+        order = np.lexsort((ranks, left, top))
+    return [texts[i] for i in indexes[order]]
+
+
+if __name__ == '__main__':
+    pass
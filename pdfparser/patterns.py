@@ -0,0 +1,170 @@
+# -*- coding: utf8 -*-
+"""
+Regular expressions of the page filter and of the text extractor, compiled once at import.
+
+The matchers run on every fragment of every page: compiling the patterns on each call relied on the cache
+of the re module, which is emptied whenever it holds more than a hundred patterns.
+"""
+import re
+
+# Cover page
+OCDE = re.compile('Organisation de Coop.{1,2}ration et de D.{1,2}veloppement .{1,2}conomiques'
+                  '|Forum International des Transports|'
+                  'Conf.{1,2}rence Europ.{1,2}enne des Ministres des Transports|'
+                  'Organisations Coordonn.{1,2}es')
+OCDE_TELEX = re.compile(('.*ORGANISATION DE COOP.{1,2}RATION.*\s?.*'
+                         'ET DE D.{1,2}VELOPPEMENT .{1,2}CONOMIQUES.*'),
+                        re.MULTILINE)
+OCDE_TELEX_START = re.compile('.*ORGANISATION DE COOP.{1,2}RATION.*\s?.*')
+OCDE_TELEX_END = re.compile('.*ET DE D.{1,2}VELOPPEMENT .{1,2}CONOMIQUES.*')
+OECD = re.compile('Organisation for Economic Co-operation and Development'
+                  '|International Transport Forum|'
+                  'European Conference of Ministers of Transport|'
+                  'Co-ordinated Organisations')
+OECD_TELEX = re.compile('.*ORGANISATION FOR ECONOMIC.*\s?.*CO.*?OPERATION AND DEVELOPMENT.*',
+                        re.MULTILINE)
+OECD_TELEX_START = re.compile('.*ORGANISATION FOR ECONOMIC.*\s?.*')
+OECD_TELEX_END = re.compile('.*CO.*?OPERATION AND DEVELOPMENT.*')
+CLASSIFICATION = re.compile('[^a-zA-Z0-9_]?For Official Use[^a-zA-Z0-9_]?'
+                            '|[^a-zA-Z0-9_]?Confidential[^a-zA-Z0-9_]?|'
+                            '[^a-zA-Z0-9_]?Unclassified[^a-zA-Z0-9_]?|'
+                            '[^a-zA-Z0-9_]?A Usage Officiel[^a-zA-Z0-9_]?'
+                            '[^a-zA-Z0-9_]?|Confidentiel[^a-zA-Z0-9_]?|'
+                            '[^a-zA-Z0-9_]?Non classifi.{1,2}[^a-zA-Z0-9_]?|'
+                            '[^a-zA-Z0-9_]?Diffusion Restreinte[^a-zA-Z0-9_]?|'
+                            '[^a-zA-Z0-9_]?Restricted Diffusion[^a-zA-Z0-9_]?'
+                            '|[^a-zA-Z0-9_]?Restricted[^a-zA-Z0-9_]?'
+                            '|[^a-zA-Z0-9_]?general distribution[^a-zA-Z0-9_]?')
+COTE = re.compile('([A-Z]+?[\(\)/0-9]+[A-Z]*?)+  # e.g. AGP/HR/VAC(94)5', re.VERBOSE)
+
+# Section titles
+SUMMARY_TITLE = re.compile('^\s*?SUMMARY\s*?$|'
+                           '^\s*?ABSTRACT\s*?$|'
+                           '^\s*?R.{1,2}SUM.{1,2}\s*?$|'
+                           '\s*?ABSTRACT/R.{1,2}SUM.{1,2}\s*?$|'
+                           '^\s*?EXECUTIVE SUMMARY\s*?$|'
+                           '^\s*?SUMMARY\s{0,2}/\s{0,2}ACTION REQUIRED\s*?$', re.IGNORECASE)
+TOC_TITLE = re.compile('TABLE OF CONTENTS|TABLE DES MATI.{1,2}RES|SOMMAIRE')  # Expected text in uppercase
+TOC_EXACT = re.compile('Table des mati.{1,2}res')  # Expected text in lowercase
+GLOSSARY_TITLE = re.compile('^\W*?LIST OF ABBREVIATIONS|'
+                            '^\W*?GLOSSARY|'
+                            '^\W*?Glossary\W*?$|'
+                            '^\W*?LIST OF ACRONYMS|'
+                            '^\W*?Abbreviations\s*?$|'
+                            '^[\W\w]*?ACRONYMES\s*?$')
+BIBLIOGRAPHY_TITLE = re.compile('^\s*?bibliograph(y|ie)\s*?$|'
+                                '^\s*?r.{1,2}f.{1,2}rence(?:s)?\s*?$|'
+                                '^\s*?lit(?:t)?erature\s*?$', re.IGNORECASE)
+PARTICIPANTS_EXACT_1 = re.compile('Participants list|LIST OF PARTICIPANTS|Liste des participants', re.IGNORECASE)
+PARTICIPANTS_EXACT_2 = re.compile('^\W*?PRESENT(S)?\W*?$')
+PARTICIPANTS_FIND_1 = re.compile('(List of Participants|Liste des Participants) ?/ ?(Liste des Participants'
+                                 '|List of Participants|List of Presence)', re.IGNORECASE)
+PARTICIPANTS_FIND_2 = re.compile('LIST OF PARTICIPANTS')
+ANNEX_TITLE = re.compile('^\W*ANNEX(E)?\s*[0-9]?[A-Z]?\.?\s*$|'
+                         '^\W*ANNEX(E)?\s*[0-9]?[A-Z]?\.?\s*?-?\s*?:?[\W\w]*?$|'
+                         '^\W*Annex(e)?\s{1,2}[0-9]?[a-z]?\s*$|'
+                         '^\W*APPENDI(X|CE)\s*[0-9]?[A-Z]?\s*$|'
+                         '^\s*TECHNICAL ANNEX\s*$|'
+                         '^\s*FIGURE AND TABLE ANNEX\s*$')
+
+# Section contents
+TOC_CONTINUED = re.compile('([\.]{10,}?\s[0-9]{1,4})')
+# "ATM – Agriculture Trade and Markets division of TAD"
+GLOSSARY_STRUCTURE = re.compile('(?:[A-Z]{3,10}\s+?–\s+?[A-Z])')
+# "OECD (2010c), The OECD Innovation Strategy: Getting a Head Start on Tomorrow, Paris: OECD."
+BIBLIOGRAPHY_STRUCTURE = re.compile('((?:[A-Z].*[A-Z])?(?:OECD)?.*\([0-9]{4}.*\).*)')
+# "Mr. Christian HEDERER, Counsellor for Energy, Trade, Industry and Science"
+PARTICIPANTS_NAMES = re.compile('(?:M[r]?|Mme|M[i|r]?s[s]?|Dr)'
+                                '\.?'
+                                '(?: [A-Z][a-z\s]*?[- ]?[[A-Z][a-z\s]*?]? ?[A-Z ]+)')
+# "j.a.f.vandewijnboom@minez.nl"
+PARTICIPANTS_EMAILS = re.compile('\w*?\.?\w*@\w*\.\w*')
+NUMBER = re.compile('^\s*?[0-9\.,]+\s*?$')
+
+
+def combine(*alternatives):
+    """
+    Alternation of patterns compiled with the same flags, each one in a named group.
+    Searching (or matching) the alternation succeeds if and only if searching (or matching) one of the patterns does,
+    the name of the group matched identifies the pattern.
+
+    :param alternatives: tuples (group name, compiled pattern)
+    :return: compiled pattern
+    """
+    sources, flags = [], None
+    for name, pattern in alternatives:
+        if flags is not None and pattern.flags != flags:
+            raise ValueError('Patterns with different flags can not be combined')
+        flags = pattern.flags
+        sources.append('(?P<{}>{})'.format(name, pattern.pattern))
+    return re.compile('|'.join(sources), flags)
+
+
+# Prefilter of the section titles: a fragment passing none of the checks has no title, which is the case of
+# most fragments.
+# Title patterns whose alternatives all start with ^ can only match at the start of the text: they are combined
+# and applied once with match(), grouped by flags, the summary title being split into its anchored alternatives
+# and the other one. The title patterns matching anywhere are searched one by one: searching an alternation of
+# them is slower than searching each of them, the re module only scans quickly for the prefix of a single literal.
+_SUMMARY_TITLE_START = re.compile('^\s*?SUMMARY\s*?$|'
+                                  '^\s*?ABSTRACT\s*?$|'
+                                  '^\s*?R.{1,2}SUM.{1,2}\s*?$|'
+                                  '^\s*?EXECUTIVE SUMMARY\s*?$|'
+                                  '^\s*?SUMMARY\s{0,2}/\s{0,2}ACTION REQUIRED\s*?$', re.IGNORECASE)
+_SUMMARY_TITLE_ANYWHERE = re.compile('ABSTRACT/R.{1,2}SUM.{1,2}\s*?$', re.IGNORECASE)
+TITLE_STARTS = combine(('glossary_title', GLOSSARY_TITLE), ('participants_exact_2', PARTICIPANTS_EXACT_2),
+                       ('annex_title', ANNEX_TITLE))
+TITLE_STARTS_IGNORECASE = combine(('summary_title', _SUMMARY_TITLE_START), ('bibliography_title', BIBLIOGRAPHY_TITLE),
+                                  ('participants_exact_1', PARTICIPANTS_EXACT_1))
+TITLES_ANYWHERE = [('toc_title', TOC_TITLE), ('toc_exact', TOC_EXACT), ('summary_title', _SUMMARY_TITLE_ANYWHERE),
+                   ('participants_find_1', PARTICIPANTS_FIND_1), ('participants_find_2', PARTICIPANTS_FIND_2)]
+
+
+def section_title(txt):
+    """
+    Find whether the text matches one of the section title patterns.
+
+    A text may match several title patterns, only one of them is returned.
+    :param txt: stripped fragment text
+    :return: name of the title pattern matched, None if the text matches no title pattern
+    """
+    match = TITLE_STARTS.match(txt) or TITLE_STARTS_IGNORECASE.match(txt)
+    if match:
+        return match.lastgroup
+    for name, pattern in TITLES_ANYWHERE:
+        if pattern.search(txt):
+            return name
+    return None
+
+
+# Fragment text
+PARAGRAPH_CONTINUED = re.compile('^(?<!\n)([a-zéèêçàù]|[A-Z]{2,})', re.UNICODE)
+# TODO: add all french capitalized accentuated
+PUNCTUATION = re.compile('([\.]+|[\?!:])', re.UNICODE)
+USELESS_CRLF = re.compile('(?<!\.)\n(?![A-Z][a-z])', re.UNICODE)
+CRLF = re.compile('(?<!\.)\n(?![A-Z])')
+SPACES = re.compile(' +')
+LEADING_SPACES = re.compile('^\s*')
+SENTENCE_END = re.compile('[\.\!\?\]]')
+START_WITH_NUMBER = re.compile('[0-9]+ \w+.*')
+PARAGRAPH_LEAD_NUMBERS = re.compile('((^|\n)([0-9]+\.)+[0-9]{0,3}\W?)')
+PARAGRAPH_INSERTED_NUMBERS = re.compile('((?<=\n)\W?([0-9]+\.)+(?![A-Z]))')
+HEADER_CLASSIFICATION = re.compile('^\W*For Official Use\W*$|'
+                                   '^\W*Confidential\W*$|'
+                                   '^\W*Unclassified\W*$|'
+                                   '^\W*A Usage Officiel\W*$|'
+                                   '^\W*Confidentiel\W*$|'
+                                   '^\W*Non classifi.{1,2}\W*$|'
+                                   '^\W*Diffusion Restreinte\W*$|'
+                                   '^\W*Restricted Diffusion\W*$|'
+                                   '^\W*Restricted\W*$|'
+                                   '^\W*general distribution\W*$', re.IGNORECASE)
+HEADER_COTE = re.compile('^\W*([A-Z]+?[\(\)/0-9]+[A-Z]*?)+\W*$')
+LEADING_CLASSIFICATION = re.compile('For Official Use|Confidential|Unclassified|A Usage Officiel|'
+                                    'Confidentiel|Non classifié', re.IGNORECASE)
+LEADING_COTE = re.compile('([\w]+?[\(\)/0-9]+[\w]*?)+')
+PAGE_NUMBER = re.compile('\s*?\d+\s*?')
+
+
+if __name__ == '__main__':
+    pass
@@ -1,15 +1,21 @@
 # -*- coding: utf8 -*-
-import re
+import numpy as np
 
-from pdfparser import _log_level, _config
+from pdfparser import _log_level, _config, patterns
 import pdfparser.table_edges_extractor as table_extractor
+import pdfparser.page_geometry as page_geometry
 import pdfparser.text_table_extractor as text_table_extractor
 from pdfparser.pdf_fragment_type import FragmentType
 from pdfparser.report import Report
-from pdfparser.text_table_extractor import Cell, compare_cells
 
 X0, Y0, X1, Y1 = 0, 1, 2, 3
 
+# Sections detected by classify_page, by decreasing priority, and the report flag of each section
+SECTIONS = (FragmentType.COVER_PAGE, FragmentType.TABLE_OF_CONTENTS, FragmentType.SUMMARY, FragmentType.GLOSSARY,
+            FragmentType.BIBLIOGRAPHY, FragmentType.PARTICIPANTS_LIST, FragmentType.ANNEX)
+REPORT_FLAGS = ('cover_page', 'toc', 'summary', 'glossary', 'bibliography', 'participants_list', 'annex')
+COVER, TOC, SUMMARY, GLOSSARY, BIBLIOGRAPHY, PARTICIPANTS_LIST, ANNEX = range(len(SECTIONS))
+
 
 class PDFPageFilter:
     """
@@ -33,6 +39,100 @@ class PDFPageFilter:
         self.report = report if report else Report()
         self.tables_text = list()
 
+    def reset(self, report=None):
+        """
+        Clear the per-document state so the same filter can be reused for another document
+
+        :param report:
+        :return: None
+        """
+        self.report = report if report else Report()
+        self.tables_text = list()
+
+    def classify_page(self, page_txt, previous_fragment_type, cover_allowed=True, summary_allowed=True):
+        """
+        Find the section the page belongs to, walking through the fragments of the page only once.
+
+        The decision is that of is_cover, is_toc, is_summary, is_glossary, is_bibliography, is_participants_list
+        and is_annex called in that order, keeping the first match: only the report flag of that match is set.
+        Sections of lower priority than the best match so far are not evaluated on the remaining fragments.
+        :param page_txt:
+        :param previous_fragment_type:
+        :param cover_allowed: False to skip the cover detection, the cover being expected on the first page only
+        :param summary_allowed: False to skip the summary detection
+        :return: Tuple (fragment type of the section or None if no section is found, coordinates of the title
+                 fragment splitting the page or None)
+        """
+        best, section_coord, report_section = len(SECTIONS), None, False
+        first = COVER if cover_allowed else TOC
+        nb_cover, nb_toc, nb_glossary, nb_biblio, nb_names, nb_emails = 0, 0, 0, 0, 0, 0
+        for coord, fragment in page_txt.items():
+            if best <= first:
+                break
+            txt = fragment.strip()
+            # most fragments have no title: one search rules out all the title patterns
+            has_title = patterns.section_title(txt) is not None
+
+            if cover_allowed and best > COVER:
+                nb_cover += self.match_cote(txt) + self.match_classification(txt) + self.match_oecd(txt) + \
+                    self.match_ocde(txt)
+                if nb_cover > 2:
+                    best, section_coord, report_section = COVER, None, True
+
+            if best > TOC:
+                if has_title and (self.match_toc_title(txt) or self.match_toc_exact(txt)):
+                    best, section_coord, report_section = TOC, None, True
+                elif previous_fragment_type == FragmentType.TABLE_OF_CONTENTS:
+                    nb_toc += len(self.match_toc_continued(txt))
+                    if nb_toc > 2:
+                        self.logger.debug(u'T.O.C. continuation found')
+                        best, section_coord, report_section = TOC, None, True
+
+            if summary_allowed and best > SUMMARY and has_title and self.match_summary(txt):
+                best, section_coord, report_section = SUMMARY, None, True
+
+            if best > GLOSSARY:
+                if has_title and self.match_glossary_title(txt):
+                    best, section_coord, report_section = GLOSSARY, None, True
+                elif previous_fragment_type == FragmentType.GLOSSARY:
+                    nb_glossary += len(self.match_glossary_structure(txt))
+                    if nb_glossary > 5:
+                        self.logger.debug(u'Glossary continuation found.')
+                        best, section_coord, report_section = GLOSSARY, None, True
+
+            if best > BIBLIOGRAPHY:
+                if has_title and self.match_bibliography_title(txt):
+                    best, section_coord, report_section = BIBLIOGRAPHY, coord, True
+                elif previous_fragment_type == FragmentType.BIBLIOGRAPHY:
+                    nb_biblio += len(self.match_bibliography_structure(txt))
+                    if nb_biblio > 2:
+                        self.logger.debug(u'Bibliography "pattern" found.')
+                        best, section_coord, report_section = BIBLIOGRAPHY, None, True
+
+            if best > PARTICIPANTS_LIST:
+                if has_title and self.match_participants_title(txt):
+                    self.logger.debug(u'participants title found. {frag}'.format(frag=txt))
+                    best, section_coord, report_section = PARTICIPANTS_LIST, coord, False
+                elif previous_fragment_type == FragmentType.PARTICIPANTS_LIST:
+                    nb_names += len(self.match_participants_names(txt))
+                    if nb_names > 2:
+                        self.logger.debug(u'continued participants found. nb: {nb}'.format(nb=nb_names))
+                        best, section_coord, report_section = PARTICIPANTS_LIST, coord, True
+                    else:
+                        nb_emails += len(self.match_participants_emails(txt))
+                        if nb_emails > 2:
+                            self.logger.debug(u'continued participants found. nb: {nb}'.format(nb=nb_emails))
+                            best, section_coord, report_section = PARTICIPANTS_LIST, coord, True
+
+            if best > ANNEX and has_title and self.match_annex_title(txt):
+                best, section_coord, report_section = ANNEX, None, True
+
+        if best == len(SECTIONS):
+            return None, None
+        if report_section:
+            setattr(self.report, REPORT_FLAGS[best], 1)
+        return SECTIONS[best], section_coord
+
     def is_cover(self, page_txt):
         """
 
@@ -62,19 +162,10 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_ocde = re.compile('Organisation de Coop.{1,2}ration et de D.{1,2}veloppement .{1,2}conomiques'
-                               '|Forum International des Transports|'
-                               'Conf.{1,2}rence Europ.{1,2}enne des Ministres des Transports|'
-                               'Organisations Coordonn.{1,2}es')
-        ptrn_ocde_telex = re.compile(('.*ORGANISATION DE COOP.{1,2}RATION.*\s?.*'
-                                  'ET DE D.{1,2}VELOPPEMENT .{1,2}CONOMIQUES.*'),
-                                 re.MULTILINE)
-        ptrn_ocde_telex_start = re.compile('.*ORGANISATION DE COOP.{1,2}RATION.*\s?.*')
-        ptrn_ocde_telex_end = re.compile('.*ET DE D.{1,2}VELOPPEMENT .{1,2}CONOMIQUES.*')
-        if re.search(ptrn_ocde, txt) or re.search(ptrn_ocde_telex, txt):
+        if patterns.OCDE.search(txt) or patterns.OCDE_TELEX.search(txt):
             self.logger.debug(u'OCDE found: {frag}'.format(frag=txt))
             return 1
-        elif re.search(ptrn_ocde_telex_start, txt) or re.search(ptrn_ocde_telex_end, txt):
+        elif patterns.OCDE_TELEX_START.search(txt) or patterns.OCDE_TELEX_END.search(txt):
             self.logger.debug(u'OCDE part found: {frag}'.format(frag=txt))
             return 0.5
         else:
@@ -86,18 +177,10 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_oecd = re.compile('Organisation for Economic Co-operation and Development'
-                               '|International Transport Forum|'
-                               'European Conference of Ministers of Transport|'
-                               'Co-ordinated Organisations')
-        ptrn_oecd_telex = re.compile('.*ORGANISATION FOR ECONOMIC.*\s?.*CO.*?OPERATION AND DEVELOPMENT.*',
-                                     re.MULTILINE)
-        ptrn_oecd_telex_start = re.compile('.*ORGANISATION FOR ECONOMIC.*\s?.*')
-        ptrn_oecd_telex_end = re.compile('.*CO.*?OPERATION AND DEVELOPMENT.*')
-        if re.search(ptrn_oecd, txt) or re.search(ptrn_oecd_telex, txt):
+        if patterns.OECD.search(txt) or patterns.OECD_TELEX.search(txt):
             self.logger.debug(u'OECD found: {frag}'.format(frag=txt))
             return 1
-        elif re.search(ptrn_oecd_telex_start, txt) or re.search(ptrn_oecd_telex_end, txt):
+        elif patterns.OECD_TELEX_START.search(txt) or patterns.OECD_TELEX_END.search(txt):
             self.logger.debug(u'OECD part found: {frag}'.format(frag=txt))
             return 0.5
         else:
@@ -109,17 +192,7 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_classif = re.compile('[^a-zA-Z0-9_]?For Official Use[^a-zA-Z0-9_]?'
-                                  '|[^a-zA-Z0-9_]?Confidential[^a-zA-Z0-9_]?|'
-                                  '[^a-zA-Z0-9_]?Unclassified[^a-zA-Z0-9_]?|'
-                                  '[^a-zA-Z0-9_]?A Usage Officiel[^a-zA-Z0-9_]?'
-                                  '[^a-zA-Z0-9_]?|Confidentiel[^a-zA-Z0-9_]?|'
-                                  '[^a-zA-Z0-9_]?Non classifi.{1,2}[^a-zA-Z0-9_]?|'
-                                  '[^a-zA-Z0-9_]?Diffusion Restreinte[^a-zA-Z0-9_]?|'
-                                  '[^a-zA-Z0-9_]?Restricted Diffusion[^a-zA-Z0-9_]?'
-                                  '|[^a-zA-Z0-9_]?Restricted[^a-zA-Z0-9_]?'
-                                  '|[^a-zA-Z0-9_]?general distribution[^a-zA-Z0-9_]?')
-        if re.search(ptrn_classif, txt):
+        if patterns.CLASSIFICATION.search(txt):
             self.logger.debug(u'Classification found: {frag}'.format(frag=txt))
             return 1
         else:
@@ -131,9 +204,7 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_cote = re.compile('([A-Z]+?[\(\)/0-9]+[A-Z]*?)+  # e.g. AGP/HR/VAC(94)5', re.VERBOSE)
-
-        if re.search(ptrn_cote, txt):
+        if patterns.COTE.search(txt):
             self.logger.debug(u'Cote found: {frag}'.format(frag=txt))
             return 1
         else:
@@ -161,14 +232,7 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_summary = re.compile('^\s*?SUMMARY\s*?$|'
-                                  '^\s*?ABSTRACT\s*?$|'
-                                  '^\s*?R.{1,2}SUM.{1,2}\s*?$|'
-                                  '\s*?ABSTRACT/R.{1,2}SUM.{1,2}\s*?$|'
-                                  '^\s*?EXECUTIVE SUMMARY\s*?$|'
-                                  '^\s*?SUMMARY\s{0,2}/\s{0,2}ACTION REQUIRED\s*?$', re.IGNORECASE)
-
-        if re.search(ptrn_summary, txt):
+        if patterns.SUMMARY_TITLE.search(txt):
             self.logger.debug(u'Summary "Title" found: {frag}'.format(frag=txt))
             return 1
         else:
@@ -211,8 +275,7 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_toc_title = re.compile('TABLE OF CONTENTS|TABLE DES MATI.{1,2}RES|SOMMAIRE')  # Expected text in uppercase
-        if re.search(ptrn_toc_title, txt):
+        if patterns.TOC_TITLE.search(txt):
             self.logger.debug(u'T.O.C. "Title" found: {frag}'.format(frag=txt))
             return 1
         else:
@@ -224,8 +287,7 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_toc_exact = re.compile('Table des mati.{1,2}res')  # Expected text in lowercase
-        if re.search(ptrn_toc_exact, txt):
+        if patterns.TOC_EXACT.search(txt):
             self.logger.debug(u'T.O.C. "Title" found: {frag}'.format(frag=txt))
             return 1
         else:
@@ -237,8 +299,7 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_toc_cont = re.compile('([\.]{10,}?\s[0-9]{1,4})')
-        return re.findall(ptrn_toc_cont, txt)
+        return patterns.TOC_CONTINUED.findall(txt)
 
     def is_glossary(self, page_txt, current_fragment_type):
         """
@@ -274,13 +335,7 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_glossary_title = re.compile('^\W*?LIST OF ABBREVIATIONS|'
-                                         '^\W*?GLOSSARY|'
-                                         '^\W*?Glossary\W*?$|'
-                                         '^\W*?LIST OF ACRONYMS|'
-                                         '^\W*?Abbreviations\s*?$|'
-                                         '^[\W\w]*?ACRONYMES\s*?$')
-        if re.search(ptrn_glossary_title, txt):
+        if patterns.GLOSSARY_TITLE.search(txt):
             self.logger.debug(u'Glossary "Title" found: {frag}'.format(frag=txt))
             return 1
         else:
@@ -296,8 +351,7 @@ class PDFPageFilter:
         # Some examples of patterns usually found in glossaries:
         # "ATM – Agriculture Trade and Markets division of TAD"
         # "COAG – Committee for Agriculture of the OECD"
-        ptrn_glossary_struct = re.compile('(?:[A-Z]{3,10}\s+?–\s+?[A-Z])')
-        return re.findall(ptrn_glossary_struct, txt)
+        return patterns.GLOSSARY_STRUCTURE.findall(txt)
 
     def is_bibliography(self, page_txt, current_fragment_type):
         """
@@ -333,10 +387,7 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_biblio = re.compile('^\s*?bibliograph(y|ie)\s*?$|'
-                                 '^\s*?r.{1,2}f.{1,2}rence(?:s)?\s*?$|'
-                                 '^\s*?lit(?:t)?erature\s*?$', re.IGNORECASE)
-        if re.search(ptrn_biblio, txt):
+        if patterns.BIBLIOGRAPHY_TITLE.search(txt):
             self.logger.debug(u'Bibliography "Title" found: {frag}'.format(frag=txt))
             return 1
         else:
@@ -351,8 +402,7 @@ class PDFPageFilter:
         # Some examples of patterns usually found in bibliographies:
         # "Baumol, W. (1967), “Macroeconomics of unbalanced growth: the anatomy of urban crisis”, American"
         # "OECD (2010c), The OECD Innovation Strategy: Getting a Head Start on Tomorrow, Paris: OECD."
-        ptrn_biblio_cont = re.compile('((?:[A-Z].*[A-Z])?(?:OECD)?.*\([0-9]{4}.*\).*)')
-        return re.findall(ptrn_biblio_cont, txt)
+        return patterns.BIBLIOGRAPHY_STRUCTURE.findall(txt)
 
     def is_participants_list(self, page_txt, current_fragment_type):
         """
@@ -395,22 +445,16 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_part_exact_1 = re.compile('Participants list|LIST OF PARTICIPANTS|Liste des participants',
-                                       re.IGNORECASE)
-        ptrn_part_exact_2 = re.compile('^\W*?PRESENT(S)?\W*?$')
-        ptrn_part_find_1 = re.compile('(List of Participants|Liste des Participants) ?/ ?(Liste des Participants'
-                                      '|List of Participants|List of Presence)', re.IGNORECASE)
-        ptrn_part_find_2 = re.compile('LIST OF PARTICIPANTS')
-        if re.match(ptrn_part_exact_1, txt):
+        if patterns.PARTICIPANTS_EXACT_1.match(txt):
             self.logger.debug(u'participants section title found. Match:{match}'.format(match='ptrn_part_exact_1'))
             return True
-        elif re.match(ptrn_part_exact_2, txt):
+        elif patterns.PARTICIPANTS_EXACT_2.match(txt):
             self.logger.debug(u'participants section title found. Match:{match}'.format(match='ptrn_part_exact_2'))
             return True
-        elif re.search(ptrn_part_find_1, txt):
+        elif patterns.PARTICIPANTS_FIND_1.search(txt):
             self.logger.debug(u'participants section title found. Match:{match}'.format(match='ptrn_part_find_1'))
             return True
-        elif re.search(ptrn_part_find_2, txt):
+        elif patterns.PARTICIPANTS_FIND_2.search(txt):
             self.logger.debug(u'participants section title found. Match:{match}'.format(match='ptrn_part_find_2'))
             return True
         else:
@@ -424,11 +468,7 @@ class PDFPageFilter:
         """
         # "Mr. Christian HEDERER, Counsellor for Energy, Trade, Industry and Science"
         # "Ms. Maria-Antoinetta SIMONS, Permanent Delegation of Belgium to the OECD"
-#        ptrn_participants_names = re.compile('(?:M[r]?|Mme|M[i|r]?s[s]?|Dr)\.?(?: [[A-Z][a-z\s]*?]*? [A-Z ]+)')
-        ptrn_participants_names = re.compile('(?:M[r]?|Mme|M[i|r]?s[s]?|Dr)'
-                                             '\.?'
-                                             '(?: [A-Z][a-z\s]*?[- ]?[[A-Z][a-z\s]*?]? ?[A-Z ]+)')
-        return re.findall(ptrn_participants_names, txt)
+        return patterns.PARTICIPANTS_NAMES.findall(txt)
 
     def match_participants_emails(self, txt):
         """
@@ -442,8 +482,7 @@ class PDFPageFilter:
         # "dbalinska@ijhars.gov.pl\n"
         # "aszymanska@ijhars.gov.pl\n"
         # 'Marta.Dziubiak@minrol.gov.pl\n'
-        ptrn_participants_emails = re.compile('\w*?\.?\w*@\w*\.\w*')
-        return re.findall(ptrn_participants_emails, txt)
+        return patterns.PARTICIPANTS_EMAILS.findall(txt)
 
     def is_annex(self, page_txt):
         """
@@ -465,13 +504,7 @@ class PDFPageFilter:
         :param txt:
         :return:
         """
-        ptrn_annex = re.compile('^\W*ANNEX(E)?\s*[0-9]?[A-Z]?\.?\s*$|'
-                                '^\W*ANNEX(E)?\s*[0-9]?[A-Z]?\.?\s*?-?\s*?:?[\W\w]*?$|'
-                                '^\W*Annex(e)?\s{1,2}[0-9]?[a-z]?\s*$|'
-                                '^\W*APPENDI(X|CE)\s*[0-9]?[A-Z]?\s*$|'
-                                '^\s*TECHNICAL ANNEX\s*$|'
-                                '^\s*FIGURE AND TABLE ANNEX\s*$')
-        if re.search(ptrn_annex, txt):
+        if patterns.ANNEX_TITLE.search(txt):
             return True
         else:
             return False
@@ -485,27 +518,14 @@ class PDFPageFilter:
         if _log_level > 1:
             self.logger.debug('[Enter filter_text_tables]')
 
-        text_cells = [Cell(x0, y0, x1, y1) for x0, y0, x1, y1 in page_txt.keys()]
-        text_cells.sort(key=compare_cells, reverse=True)
+        keys, coords, _ = page_geometry.columns(page_txt)
+        removed = text_table_extractor.table_cells_mask(coords)
 
-        if _log_level > 1:
-            self.logger.debug('text cells\n{tc}'.format(tc=text_cells))
-
-        outer_edges = text_table_extractor.find_table_cells(text_cells) if len(text_cells) > 1 else []
-
-        '''
-        if _log_level > 1:
-            self.logger.debug('outer edges\n{oe}'.format(oe=outer_edges))
-            self.logger.debug(u'nb candidate cells found: {nb}'.format(nb=len(outer_edges)))
-            self.logger.debug(u'Before table filtering, length of page text:{len}'.format(len=len(page_txt)))
-        '''
-
-        #if len(outer_edges):
-        for cell in outer_edges:
+        if removed.any():
             if _log_level > 1:
-                self.logger.debug((u'removing cell: {cell.x0} {cell.y0} {cell.x1} {cell.y1} - {c}')
-                             .format(cell=cell, c=page_txt[(cell.x0, cell.y0, cell.x1, cell.y1)]))
-            page_txt.pop((cell.x0, cell.y0, cell.x1, cell.y1))
+                for i in np.flatnonzero(removed):
+                    self.logger.debug(u'removing cell: {c} - {t}'.format(c=keys[i], t=page_txt[keys[i]]))
+            page_geometry.remove_boxes(page_txt, removed)
 
         if _log_level > 1:
             self.logger.debug(u'After table filtering, length of page text:{len}'.format(len=len(page_txt)))
@@ -547,13 +567,11 @@ class PDFPageFilter:
                                                                                            ncolumns=table.columns))
                 self.logger.debug(u'Before table filtering, length of page text:{len}'.format(len=len(page_txt)))
 
-            for coord, _ in page_txt.items():
-                # cell_content = page_txt[coord].strip()
-                if self.text_is_within_table(coord, outer_edges):
-                    page_txt.pop(coord)
-                    # cell_content = self.filter_number(cell_content)
-                    # cell_content = self.filter_repetition(cell_content)
-                    # page_txt[coord] = cell_content
+            _, coords, _ = page_geometry.columns(page_txt)
+            within_tables = np.zeros(len(coords), dtype=bool)
+            for table in outer_edges:
+                within_tables |= table.contains_fractions(coords)
+            page_geometry.remove_boxes(page_txt, within_tables)
             if _log_level > 1:
                 self.logger.debug(u'After table filtering, length of page text:{len}'.format(len=len(page_txt)))
         if _log_level > 1:
@@ -598,10 +616,11 @@ class PDFPageFilter:
                 break
 
         if separator:
-            for coord, _ in page_txt.items():
-                if self.text_below_notes_separator(coord, separator):
-                    self.logger.debug(u'Stripping out note: {n}'.format(n=page_txt[coord]))
-                    page_txt.pop(coord)
+            keys, coords, texts = page_geometry.columns(page_txt)
+            below_separator = coords[:, Y0] < separator.y0
+            for i in np.flatnonzero(below_separator):
+                self.logger.debug(u'Stripping out note: {n}'.format(n=texts[i]))
+            page_geometry.remove_boxes(page_txt, below_separator)
 
     def filter_repetition(self, cell_content):
         """
@@ -633,7 +652,7 @@ class PDFPageFilter:
         if _log_level > 2:
             self.logger.debug(u'Looking if {txt} is a number'.format(txt=cell_content))
 
-        if re.match('^\s*?[0-9\.,]+\s*?$', cell_content):
+        if patterns.NUMBER.match(cell_content):
             if _log_level > 1:
                 self.logger.debug(u'[Table inner text] - number found: {nb}'.format(nb=cell_content))
             return ''
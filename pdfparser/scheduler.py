@@ -0,0 +1,52 @@
+# -*- coding: utf8 -*-
+"""
+Cost based scheduling of the documents handed out to the bulk summarizer workers.
+
+Documents are expected largest first. They are grouped into chunks following a guided self-scheduling
+policy: each chunk costs a fixed fraction of the cost still left per worker, so the first chunks hold
+the expensive documents one at a time while the chunks of small documents get shorter as the queue drains.
+The last chunks being small and cheap, all the workers finish at roughly the same time.
+"""
+
+DEFAULT_COST = 1  # cost of a document whose size is unknown
+
+
+def document_cost(size):
+    """
+    Estimated cost of the summary of a document
+
+    :param size: size of the pdf file in bytes, None if unknown
+    :return: cost, in arbitrary units
+    """
+    return size if size else DEFAULT_COST
+
+
+def chunk_by_cost(documents, total_cost, nb_workers, max_chunk_size, chunk_factor=4):
+    """
+    Generator function which groups documents into chunks of decreasing cost
+
+    :param documents: iterable of tuples (info, size), sorted by decreasing size
+    :param total_cost: sum of the cost of all the documents
+    :param nb_workers: number of processes sharing the work
+    :param max_chunk_size: maximum number of documents per chunk
+    :param chunk_factor: number of chunks per worker the remaining cost is split into
+    :return: list of document infos
+    """
+    remaining_cost = max(total_cost, 0)
+    chunk, chunk_cost, budget = [], 0, None
+    for info, size in documents:
+        cost = document_cost(size)
+        if budget is None:
+            budget = float(remaining_cost) / (chunk_factor * nb_workers)
+        chunk.append(info)
+        chunk_cost += cost
+        if chunk_cost >= budget or len(chunk) >= max_chunk_size:
+            yield chunk
+            remaining_cost -= chunk_cost
+            chunk, chunk_cost, budget = [], 0, None
+    if chunk:
+        yield chunk
+
+
+if __name__ == '__main__':
+    pass
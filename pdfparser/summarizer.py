@@ -1,14 +1,21 @@
 # -*- coding: utf8 -*-
 import os
+import threading
+
+import nltk.data
 from nltk import PunktSentenceTokenizer
 
 from sumy.nlp.stemmers import Stemmer
 from sumy.nlp.tokenizers import Tokenizer
 from sumy.parsers.plaintext import PlaintextParser
-# from sumy.summarizers.text_rank import TextRankSummarizer as Summarizer
-from sumy.summarizers.lsa import LsaSummarizer as Summarizer
+from sumy.summarizers.lex_rank import LexRankSummarizer
+from sumy.summarizers.lsa import LsaSummarizer
+from sumy.summarizers.luhn import LuhnSummarizer
+from sumy.summarizers.text_rank import TextRankSummarizer
 
 from pdfparser import _config
+from pdfparser.frequency_summarizer import FrequencySummarizer
+from pdfparser.lsa import SparseLsaSummarizer
 
 
 PROJECT_FOLDER = _config.get('MAIN', 'project_folder')
@@ -16,32 +23,145 @@ PDF_ROOT_FOLDER = os.path.join(PROJECT_FOLDER, 'pdfs')
 LANGUAGE = "english"  # TODO: identify pdf language
 SENTENCES_COUNT = _config.getfloat('MAIN', 'SENTENCES_COUNT')  # TODO: make parameter based on length of submitted text
 STOP_WORDS_FOLDER = _config.get('SUMMARIZER', 'STOP_WORDS_FOLDER')
+PUNKT_MODEL = 'tokenizers/punkt/{language}.pickle'
+# name of the backend of BACKENDS summarizing the documents, unless another one is asked for
+BACKEND = _config.get('SUMMARIZER', 'BACKEND')
+# share of the singular dimensions ranking the sentences with the lsa backend, below 1 by a truncated SVD
+LSA_REDUCTION_RATIO = _config.getfloat('SUMMARIZER', 'LSA_REDUCTION_RATIO')
+
+# Summarizers by backend name, built from the stemmer of the language. The summarizers take the stop words of the
+# language and are called with a sumy document and a number of sentences.
+BACKENDS = {
+    # LSA on the sparse term by sentence matrix
+    'lsa': lambda stemmer: SparseLsaSummarizer(stemmer, LSA_REDUCTION_RATIO),
+    # LSA of sumy on the dense matrix, same ranks as lsa, kept as reference
+    'lsa-sumy': LsaSummarizer,
+    # graphs of the sentences, quadratic in the number of sentences
+    'textrank': TextRankSummarizer,
+    'lexrank': LexRankSummarizer,
+    # clusters of significant words
+    'luhn': LuhnSummarizer,
+    # mean frequency of the words, linear in the number of words
+    'fast': FrequencySummarizer,
+}
+
+_resources = dict()
+_resources_lock = threading.Lock()
+
+
+class LanguageResources:
+    """
+    Read-only resources of a language, shared by all the documents summarized in the process
+    """
+
+    def __init__(self, language):
+        self.language = language
+        self.tokenizer = Tokenizer(language)
+        self.stemmer = Stemmer(language)
+        self.stop_words = get_stop_words(language)
+        self.sentence_tokenizer = load_sentence_tokenizer(language)
+        self.summarizers = dict()
+        self.summarizer = self.get_summarizer(BACKEND)
+
+    def get_summarizer(self, backend):
+        """
+        Summarizer of a backend, built on first use
+
+        :param backend: name of a backend of BACKENDS
+        :return: summarizer
+        """
+        summarizer = self.summarizers.get(backend)
+        if summarizer is None:
+            if backend not in BACKENDS:
+                raise ValueError('Unknown summarizer backend: {}'.format(backend))
+            summarizer = BACKENDS[backend](self.stemmer)
+            summarizer.stop_words = self.stop_words
+            # a summarizer built twice by concurrent threads is the same, the first one stored is kept
+            summarizer = self.summarizers.setdefault(backend, summarizer)
+        return summarizer
+
+
+def register_backend(name, factory):
+    """
+    Make a summarizer available by name
+
+    :param name: backend name
+    :param factory: callable building the summarizer from the stemmer of the language
+    :return: None
+    """
+    BACKENDS[name] = factory
+
+
+def get_resources(language=LANGUAGE):
+    """
+    Resources of a language, loaded on first use
+
+    :param language:
+    :return: LanguageResources
+    """
+    resources = _resources.get(language)
+    if resources is None:
+        with _resources_lock:
+            resources = _resources.get(language)
+            if resources is None:
+                resources = _resources[language] = LanguageResources(language)
+    return resources
+
+
+def load_sentence_tokenizer(language):
+    """
+
+    :param language:
+    :return: Punkt sentence tokenizer trained for the language, untrained if nltk has no model for it
+    """
+    try:
+        return nltk.data.load(PUNKT_MODEL.format(language=language))
+    except LookupError:
+        from pdfparser import logger
+        logger.warning('No Punkt model for {}, sentences split by an untrained tokenizer'.format(language))
+        return PunktSentenceTokenizer()
 
 
 class PDFSummarizer:
 
-    def __init__(self):
-        pass
-
-    def generate_summary(self, pdf_sentences):
+    def __init__(self, language=LANGUAGE, backend=None):
+        """
+
+        :param language:
+        :param backend: name of a backend of BACKENDS, None for the BACKEND of the configuration
+        """
+        resources = get_resources(language)
+        self.language = language
+        self.resources = resources
+        self.tokenizer = resources.tokenizer
+        self.summarizer = resources.get_summarizer(backend) if backend else resources.summarizer
+        self.sentence_tokenizer = resources.sentence_tokenizer
+
+    def generate_summary(self, pdf_sentences, backend=None):
+        """
+
+        :param pdf_sentences: list of sentences
+        :param backend: name of a backend of BACKENDS, None for the backend of the summarizer
+        :return: summary, utf-8 encoded
+        """
+        summarizer = self.resources.get_summarizer(backend) if backend else self.summarizer
         if len(pdf_sentences) < SENTENCES_COUNT:
             print('Less than {} sentences extracted, returning entire text'.format(SENTENCES_COUNT))
             summary = '\n'.join([sentence.encode('utf-8') for sentence in pdf_sentences])
             return summary
         pdf_string = '\n'.join((sentence.encode('utf-8') for sentence in pdf_sentences))
-        parser = PlaintextParser.from_string(pdf_string, Tokenizer(LANGUAGE))
-        stemmer = Stemmer(LANGUAGE)
-
-        summarizer = Summarizer(stemmer)
-        summarizer.stop_words = get_stop_words(LANGUAGE)
+        parser = PlaintextParser.from_string(pdf_string, self.tokenizer)
         summary = summarizer(parser.document, SENTENCES_COUNT)
         summary = remove_repetition(summary)
         summary = '\n'.join([sentence._text.encode('utf-8') for sentence in summary])
         return summary
 
+    def extract_sentences(self, pdf_text):
+        return self.sentence_tokenizer.tokenize(pdf_text)
+
 
 def get_stop_words(language):
-    with open(os.path.join(STOP_WORDS_FOLDER, "english.txt")) as open_file:
+    with open(os.path.join(STOP_WORDS_FOLDER, '{}.txt'.format(language))) as open_file:
         return parse_stop_words(open_file.read())
 
 
@@ -54,8 +174,8 @@ def remove_repetition(summary):
     return results
 
 
-def extract_sentences(pdf_text):
-    pdf_sentences = PunktSentenceTokenizer().tokenize(pdf_text)
+def extract_sentences(pdf_text, language=LANGUAGE):
+    pdf_sentences = get_resources(language).sentence_tokenizer.tokenize(pdf_text)
     return pdf_sentences
 
 
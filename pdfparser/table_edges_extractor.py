@@ -1,29 +1,25 @@
-from pdfparser import _log_level, _config
+import numpy as np
+
+from pdfparser import _log_level, _config, logger
+from pdfparser.page_geometry import Box
 
 MAX_RECURSION = _config.getint('MAIN', 'MAX_RECURSION')
 ADJ_DISTANCE = _config.getfloat('MAIN', 'ADJ_DISTANCE')
 X0, Y0, X1, Y1 = 0, 1, 2, 3
 
 
-class Cell:
+class Cell(Box):
+
+    __slots__ = ('rows', 'columns')
 
     _MIN_HEIGHT = _config.getfloat('MAIN', 'CELL_MIN_HEIGHT')
     _MIN_WIDTH = _config.getfloat('MAIN', 'CELL_MIN_WIDTH')
     _TEXT_MIN_FRACTION_SIZE = _config.getfloat('MAIN', 'TEXT_MIN_FRACTION_SIZE')
 
-    def __init__(self, x0, y0, x1, y1, rows=1, columns=1, logger=None):
-        # todo: review this dynamic import
-        if not logger:
-            from pdfparser import logger
-        self.logger = logger
-        self.x0 = x0
-        self.y0 = y0
-        self.x1 = x1
-        self.y1 = y1
-        self.height = abs(self.y0 - self.y1)
-        self.rows = rows if self.height > Cell._MIN_HEIGHT else 0
-        self.width = abs(self.x0 - self.x1)
-        self.columns = columns if self.width > Cell._MIN_WIDTH else 0
+    def __init__(self, x0, y0, x1, y1, rows=1, columns=1):
+        Box.__init__(self, x0, y0, x1, y1)
+        self.rows = rows if abs(y0 - y1) > Cell._MIN_HEIGHT else 0
+        self.columns = columns if abs(x0 - x1) > Cell._MIN_WIDTH else 0
 
     def __repr__(self):
         return ('[' + 'x0: ' + str(self.x0) + ', y0: ' + str(self.y0) +
@@ -40,16 +36,28 @@ class Cell:
         fraction = text_width / self.width
 
         if _log_level > 2:
-            self.logger.debug('table x0: {table.x0} - table x1: {table.x1}'.format(table=self))
-            self.logger.debug('table width: {cw}'.format(cw=self.width))
-            self.logger.debug('text x0: {x0} - text x1: {x1}'.format(x0=coord[X0], x1=coord[X1]))
-            self.logger.debug('text width: {tw}'.format(tw=text_width))
-            self.logger.debug('Fraction: {fraction}'.format(fraction=fraction))
+            logger.debug('table x0: {table.x0} - table x1: {table.x1}'.format(table=self))
+            logger.debug('table width: {cw}'.format(cw=self.width))
+            logger.debug('text x0: {x0} - text x1: {x1}'.format(x0=coord[X0], x1=coord[X1]))
+            logger.debug('text width: {tw}'.format(tw=text_width))
+            logger.debug('Fraction: {fraction}'.format(fraction=fraction))
 
         if fraction < Cell._TEXT_MIN_FRACTION_SIZE:
             return True
         return False
 
+    def contains_fractions(self, coords):
+        """
+        contains() and is_fraction() of the boxes of a page at once
+
+        :param coords: array of box coordinates, one row per box
+        :return: boolean array, True for the boxes within the cell and narrower than a fraction of it
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return ((coords[:, X0] >= self.x0) & (coords[:, Y0] >= self.y0) &
+                    (coords[:, X1] <= self.x1) & (coords[:, Y1] <= self.y1) &
+                    (np.abs(coords[:, X0] - coords[:, X1]) / self.width < Cell._TEXT_MIN_FRACTION_SIZE))
+
 
 def adjacent(pt1, pt2):
     if abs(pt1 - pt2) < ADJ_DISTANCE:
@@ -69,129 +77,192 @@ def same_cell(cell, neighbor_cell):
     return True
 
 
-def find_outer_edges(cells, nth_recursion=0):
-    nth_recursion += 1
-    log('{n}th recursion step'.format(n=nth_recursion))
-    if nth_recursion > MAX_RECURSION:
-        return cells
-    log('Initial nb cells found: {ntables}'.format(ntables=len(cells)))
+def find_outer_edges(cells):
+    """
+    Collapse the cells of a page into the outer edges of the tables they draw.
 
-    converged = True
-    neighbor_cells = cells[:]  # deep copy to ensure no side effects (really useful?)
-    collapsed_cells = list()
-    ignored_cells = list()
+    Each pass collapses every cell not collapsed yet with the other cells, in the order of the list, until a pass
+    collapses none or after MAX_RECURSION passes. The rows and columns counted depend on that order.
+    \nCells only collapse when their vertical extents are less than ADJ_DISTANCE apart: the passes run on each group
+    of such cells on its own, and skip the cells already collapsed or too far from the cell collapsed so far.
 
+    :param cells: list of Cell, left unchanged
+    :return: list of Cell, one per table
+    """
+    log('Initial nb cells found: {ntables}'.format(ntables=len(cells)))
+    # the rules add up rows and columns in place, on copies of the cells
+    copies = dict()
     for cell in cells:
-        log('Trying to collapse cell: {cell}'.format(cell=cell))
-        # collapsed = False
-        if cell in ignored_cells:
+        if id(cell) not in copies:
+            copies[id(cell)] = Cell(cell.x0, cell.y0, cell.x1, cell.y1, rows=cell.rows, columns=cell.columns)
+    tables = list()
+    for group in vertical_groups([copies[id(cell)] for cell in cells]):
+        for _ in xrange(MAX_RECURSION):
+            group, converged = collapse_cells(group)
+            if converged:
+                break
+        tables.extend(group)
+    log('Final nb cells found: {ntables}'.format(ntables=len(tables)))
+    return tables
+
+
+def vertical_groups(cells):
+    """
+    Split the cells of a page into groups less than ADJ_DISTANCE apart vertically, sweeping them from the bottom to
+    the top of the page. A cell and the cells collapsed into it stay within the vertical extent of their group.
+
+    :param cells: list of Cell
+    :return: list of lists of Cell, each in the order of the given list
+    """
+    order = sorted(xrange(len(cells)), key=lambda i: min(cells[i].y0, cells[i].y1))
+    groups = list()
+    top = None
+    for i in order:
+        cell = cells[i]
+        if top is None or min(cell.y0, cell.y1) - top >= ADJ_DISTANCE:
+            groups.append(list())
+            top = max(cell.y0, cell.y1)
+        else:
+            top = max(top, cell.y0, cell.y1)
+        groups[-1].append(i)
+    return [[cells[i] for i in sorted(group)] for group in groups]
+
+
+def collapse_cells(cells):
+    """
+    One pass of find_outer_edges: each cell not collapsed yet is collapsed in turn with each other cell not collapsed
+    yet, see collapse(). The cells involved in a collapse are not considered again during the pass.
+
+    :param cells: list of Cell
+    :return: Tuple (list of Cell, True if no cells were collapsed)
+    """
+    # cells not collapsed yet, as a linked list in the order of the cells: following links may pass collapsed
+    # cells, never cells not collapsed yet
+    end = len(cells)
+    following = range(1, end + 1)
+    preceding = range(-1, end - 1)
+    ignored = [False] * end
+    # a cell collapsed into another one twice in a pass is listed twice by the next pass
+    positions = dict()
+    for i, cell in enumerate(cells):
+        positions.setdefault(id(cell), list()).append(i)
+
+    def ignore(cell):
+        for i in positions[id(cell)]:
+            if not ignored[i]:
+                ignored[i] = True
+                if preceding[i] >= 0:
+                    following[preceding[i]] = following[i]
+                if following[i] < end:
+                    preceding[following[i]] = preceding[i]
+
+    first = 0
+    converged = True
+    collapsed_cells = list()
+    for i, cell in enumerate(cells):
+        if ignored[i]:
             continue
         collapsed_cell = cell
-
-        for neighbor_cell in neighbor_cells:
-            collapsed = False
-            if neighbor_cell in ignored_cells or same_cell(cell, neighbor_cell):
-                log('neighbor cell ignored')
-                continue
-
-            log('neighbor cell {neighbor_cell}'.format(neighbor_cell=neighbor_cell))
-
-            # Collapse adjacent cell on West side
-            if ((adjacent(collapsed_cell.x0, neighbor_cell.x1)) and
-                    (adjacent(neighbor_cell.y0, collapsed_cell.y0) or adjacent(neighbor_cell.y1, collapsed_cell.y1))):
-                log('[W] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
-                                                                             neighbor_cell=neighbor_cell))
-                collapsed_cell = collapse_west(collapsed_cell, neighbor_cell)
-                log('[W] resulting cell {cell}'.format(cell=collapsed_cell))
-                collapsed = True
-
-            # Collapse adjacent cell on East side
-            if ((adjacent(neighbor_cell.x0, collapsed_cell.x1)) and
-                    (adjacent(neighbor_cell.y0, collapsed_cell.y0) or adjacent(neighbor_cell.y1, collapsed_cell.y1))):
-                log('[E] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
-                                                                             neighbor_cell=neighbor_cell))
-                collapsed_cell = collapse_east(collapsed_cell, neighbor_cell)
-                log('[E] resulting cell {cell}'.format(cell=collapsed_cell))
-                collapsed = True
-
-            # Collapse adjacent cell on South side
-            if ((adjacent(collapsed_cell.y0, neighbor_cell.y1)) and
-                    (adjacent(neighbor_cell.x0, collapsed_cell.x0) or adjacent(neighbor_cell.x1, collapsed_cell.x1))):
-                log('[S] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
-                                                                             neighbor_cell=neighbor_cell))
-                collapsed_cell = collapse_south(collapsed_cell, neighbor_cell)
-                log('[S] resulting cell {cell}'.format(cell=collapsed_cell))
-                collapsed = True
-
-            # Collapse adjacent cell on North side
-            if ((adjacent(neighbor_cell.y0, collapsed_cell.y1)) and
-                    (adjacent(neighbor_cell.x0, collapsed_cell.x0) or
-                     adjacent(neighbor_cell.x1, collapsed_cell.x1))):
-                log('[N] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
-                                                                             neighbor_cell=neighbor_cell))
-                collapsed_cell = collapse_north(collapsed_cell, neighbor_cell)
-                log('[N] resulting cell {cell}'.format(cell=collapsed_cell))
-                collapsed = True
-
-            # Collapse inner cell
-            if ((collapsed_cell.x0 <= neighbor_cell.x0 <= neighbor_cell.x1 <= collapsed_cell.x1) and
-                    (collapsed_cell.y0 <= neighbor_cell.y0 <= neighbor_cell.y1 <= collapsed_cell.y1)):
-                log('[INNER] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
-                                                                                 neighbor_cell=neighbor_cell))
-                log('[INNER] resulting cell {cell}'.format(cell=collapsed_cell))
-                collapsed_cell.columns += neighbor_cell.columns
-                collapsed_cell.rows += neighbor_cell.rows
-                collapsed = True
-
-            # Collapse outer cell
-            if ((neighbor_cell.x0 <= collapsed_cell.x0 <= collapsed_cell.x1 <= neighbor_cell.x1) and
-                    (neighbor_cell.y0 <= collapsed_cell.y0 <= collapsed_cell.y1 <= neighbor_cell.y1)):
-                log('[OUTER] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
-                                                                                 neighbor_cell=neighbor_cell))
-                log('[OUTER] resulting cell {cell}'.format(cell=neighbor_cell))
-                neighbor_cell.columns += collapsed_cell.columns
-                neighbor_cell.rows += collapsed_cell.rows
-                collapsed_cell = neighbor_cell
-                collapsed = True
-
-            # Collapse overlapping cell on the right
-            if (neighbor_cell.x0 <= collapsed_cell.x1 and
-                    (collapsed_cell.y0 <= neighbor_cell.y0 <= collapsed_cell.y1 or
-                     collapsed_cell.y0 <= neighbor_cell.y1 <= collapsed_cell.y1)):
-                log('[OE] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
-                                                                              neighbor_cell=neighbor_cell))
-                collapsed_cell = collapse_overlapping(collapsed_cell, neighbor_cell)
-                log('[OE] resulting cell {cell}'.format(cell=collapsed_cell))
-                collapsed = True
-
-            # Collapse overlapping cell on the left
-            if (neighbor_cell.x1 >= collapsed_cell.x0 and
-                    (collapsed_cell.y0 <= neighbor_cell.y0 <= collapsed_cell.y1 or
-                     collapsed_cell.y0 <= neighbor_cell.y1 <= collapsed_cell.y1)):
-                log('[OW] collapsing cells {cell} and {neighbor_cell}'.format(cell=collapsed_cell,
-                                                                              neighbor_cell=neighbor_cell))
-                collapsed_cell = collapse_overlapping(collapsed_cell, neighbor_cell)
-                log('[OW] resulting cell {cell}'.format(cell=collapsed_cell))
-                collapsed = True
-
-            if collapsed:
-                ignored_cells.append(cell)
-                ignored_cells.append(neighbor_cell)
-                converged = False
-            else:
-                log('No match found for neighbor cell {cell}'.format(cell=neighbor_cell))
-
+        j = first
+        while j < end:
+            neighbor_cell = cells[j]
+            if not ignored[j] and not same_cell(cell, neighbor_cell) and not apart(collapsed_cell, neighbor_cell):
+                collapsed_cell, collapsed = collapse(collapsed_cell, neighbor_cell)
+                if collapsed:
+                    ignore(cell)
+                    ignore(neighbor_cell)
+                    converged = False
+            j = following[j]
+        while first < end and ignored[first]:
+            first = following[first]
         collapsed_cells.append(collapsed_cell)
-
-    if converged:
-        log('Converged. All cells collapsed....')
-        return collapsed_cells
-    else:
-        log('Final nb cells found: {ntables}'.format(ntables=len(collapsed_cells)))
-        for cell in collapsed_cells:
-            log(cell)
-        # Not converged yet, make a recursive call to ourselves with cells collapsed so far.
-        return find_outer_edges(collapsed_cells, nth_recursion=nth_recursion)
+    return collapsed_cells, converged
+
+
+def apart(cell, neighbor_cell):
+    """
+
+    :param cell:
+    :param neighbor_cell:
+    :return: True if the vertical extents of the cells are at least ADJ_DISTANCE apart, no rule applies to them
+    """
+    return (min(neighbor_cell.y0, neighbor_cell.y1) - max(cell.y0, cell.y1) >= ADJ_DISTANCE or
+            min(cell.y0, cell.y1) - max(neighbor_cell.y0, neighbor_cell.y1) >= ADJ_DISTANCE)
+
+
+def adjacent_north(cell, neighbor_cell):
+    return (adjacent(neighbor_cell.y0, cell.y1) and
+            (adjacent(neighbor_cell.x0, cell.x0) or adjacent(neighbor_cell.x1, cell.x1)))
+
+
+def adjacent_east(cell, neighbor_cell):
+    return (adjacent(neighbor_cell.x0, cell.x1) and
+            (adjacent(neighbor_cell.y0, cell.y0) or adjacent(neighbor_cell.y1, cell.y1)))
+
+
+def collapse(cell, neighbor_cell):
+    """
+    Collapse a neighbor cell into a cell with each rule that applies to them, in turn, each rule applying to the
+    result of the previous ones. The inner and outer cell rules add the rows and columns of one cell to the other
+    in place.
+
+    :param cell:
+    :param neighbor_cell:
+    :return: Tuple (collapsed Cell, True if a rule applied)
+    """
+    collapsed_cell = cell
+    collapsed = False
+
+    # Collapse adjacent cell on West side
+    if adjacent_east(neighbor_cell, collapsed_cell):
+        collapsed_cell = collapse_west(collapsed_cell, neighbor_cell)
+        collapsed = True
+
+    # Collapse adjacent cell on East side
+    if adjacent_east(collapsed_cell, neighbor_cell):
+        collapsed_cell = collapse_east(collapsed_cell, neighbor_cell)
+        collapsed = True
+
+    # Collapse adjacent cell on South side
+    if adjacent_north(neighbor_cell, collapsed_cell):
+        collapsed_cell = collapse_south(collapsed_cell, neighbor_cell)
+        collapsed = True
+
+    # Collapse adjacent cell on North side
+    if adjacent_north(collapsed_cell, neighbor_cell):
+        collapsed_cell = collapse_north(collapsed_cell, neighbor_cell)
+        collapsed = True
+
+    # Collapse inner cell
+    if ((collapsed_cell.x0 <= neighbor_cell.x0 <= neighbor_cell.x1 <= collapsed_cell.x1) and
+            (collapsed_cell.y0 <= neighbor_cell.y0 <= neighbor_cell.y1 <= collapsed_cell.y1)):
+        collapsed_cell.columns += neighbor_cell.columns
+        collapsed_cell.rows += neighbor_cell.rows
+        collapsed = True
+
+    # Collapse outer cell
+    if ((neighbor_cell.x0 <= collapsed_cell.x0 <= collapsed_cell.x1 <= neighbor_cell.x1) and
+            (neighbor_cell.y0 <= collapsed_cell.y0 <= collapsed_cell.y1 <= neighbor_cell.y1)):
+        neighbor_cell.columns += collapsed_cell.columns
+        neighbor_cell.rows += collapsed_cell.rows
+        collapsed_cell = neighbor_cell
+        collapsed = True
+
+    # Collapse overlapping cell on the right
+    if (neighbor_cell.x0 <= collapsed_cell.x1 and
+            (collapsed_cell.y0 <= neighbor_cell.y0 <= collapsed_cell.y1 or
+             collapsed_cell.y0 <= neighbor_cell.y1 <= collapsed_cell.y1)):
+        collapsed_cell = collapse_overlapping(collapsed_cell, neighbor_cell)
+        collapsed = True
+
+    # Collapse overlapping cell on the left
+    if (neighbor_cell.x1 >= collapsed_cell.x0 and
+            (collapsed_cell.y0 <= neighbor_cell.y0 <= collapsed_cell.y1 or
+             collapsed_cell.y0 <= neighbor_cell.y1 <= collapsed_cell.y1)):
+        collapsed_cell = collapse_overlapping(collapsed_cell, neighbor_cell)
+        collapsed = True
+
+    return collapsed_cell, collapsed
 
 
 def collapse_overlapping(cell, neighbor_cell):
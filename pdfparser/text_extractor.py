@@ -1,17 +1,20 @@
 # -*- coding: utf8 -*-
-import re
+import multiprocessing as mp
+from contextlib import closing
 from cStringIO import StringIO
 from json import JSONEncoder
 
 from xml.etree.ElementTree import Element, SubElement, tostring
 from pdfminer.converter import TextConverter, PDFPageAggregator
-from pdfminer.layout import LAParams, LTTextBox, LTTextLine, LTFigure, LTRect, LTChar
+from pdfminer.layout import LAParams, LTTextBox, LTTextLine, LTFigure, LTRect, LTChar, LTContainer, LTText
 from pdfminer.pdfdocument import PDFDocument
-from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+from pdfminer.pdfinterp import PDFPageInterpreter
 from pdfminer.pdfpage import PDFPage
 from pdfminer.pdfparser import PDFParser
 
-from pdfparser import _log_level, _config
+from pdfparser import _log_level, _config, patterns
+from pdfparser.font_cache import CachingResourceManager
+from pdfparser.page_geometry import PageText, reading_order, columns, Y0
 from pdfparser.pdf_fragment_type import FragmentType
 from pdfparser.pdf_page_filter import PDFPageFilter
 from pdfparser.report import Report
@@ -22,6 +25,21 @@ rec_def = None
 text_def = None
 text_keys = {'Text', 'Summary'}
 
+# fragment types a page can still be given once an annex was found
+ANNEX_FRAGMENT_TYPES = {FragmentType.ANNEX, FragmentType.TABLE_OF_CONTENTS, FragmentType.GLOSSARY,
+                        FragmentType.BIBLIOGRAPHY, FragmentType.PARTICIPANTS_LIST}
+
+# to increase whenever a change alters the extracted text, invalidates the extraction cache. Changes of the text:
+#   2: table cells collapsed by a sweep, table boxes always bounding their cells, rows and columns of the tables
+#      counted differently, hence a different choice of the tables filtered out on some pages
+#   3: minx0/maxx1 computed per page while the pages are streamed
+#   4: table boxes, rows and columns collapsed as in version 1 again
+EXTRACTOR_VERSION = '4'
+
+PAGE_PROCESSES = _config.getint('MAIN', 'PAGE_PROCESSES')
+PAGE_PARALLEL_MIN_PAGES = _config.getint('MAIN', 'PAGE_PARALLEL_MIN_PAGES')
+PAGE_RANGES_PER_PROCESS = 4  # more ranges than processes, so a slow range does not hold back the others
+
 
 class ExtractMode:
     def __init__(self):
@@ -42,12 +60,13 @@ class OutputFormat:
 
 class PDFTextExtractor:
 
-    def __init__(self, report=None, single_page=None, logger=None):
+    def __init__(self, report=None, single_page=None, logger=None, page_processes=None):
         # todo: review this dynamic import
         if not logger:
             from pdfparser import logger
         self.logger = logger
         self.filter_tables = _config.getboolean('MAIN', 'filter_tables')
+        self.page_processes = PAGE_PROCESSES if page_processes is None else page_processes
 
         self.contents = dict()
         self.report = report if report else Report()
@@ -55,10 +74,42 @@ class PDFTextExtractor:
         self.previous_p = None
         self.annex_found = False
         self.single_page = int(single_page) if single_page else -1
+        self.wanted = None
+        self.raw_pages = dict()  # k=page number, v=raw text rendered from the layout, kept while no text is found
         self.minx0 = None
         self.maxx1 = None
 
-    def extract_text(self, pdf_file_path, mode=None, format=None):
+    def reset(self, report=None):
+        """
+        Clear the per-document state so the same extractor can be reused for another document
+
+        :param report:
+        :return: None
+        """
+        self.contents = dict()
+        self.report = report if report else Report()
+        self.pdf_filter.reset(report=self.report)
+        self.previous_p = None
+        self.annex_found = False
+        self.raw_pages = dict()
+        self.minx0 = None
+        self.maxx1 = None
+
+    def extract_text(self, pdf_file_path, mode=None, format=None, cache=None, wanted=None, content_hash=None):
+        """
+
+        :param pdf_file_path: path of the pdf file, or pdf file object open for reading in binary mode, e.g. an
+        upload held in memory. A file object is read from its start and left open
+        :param mode: ExtractMode, layout by default
+        :param format: OutputFormat, json by default
+        :param cache: ExtractionCache, consulted before parsing the file and updated afterwards
+        :param content_hash: sha1 hex digest of the content of the file if known, spares reading the file to hash it
+        for the cache
+        :param wanted: fragment types the caller uses, None for all. Layout extraction stops as soon as the
+        remaining pages can only produce unwanted fragments, i.e. after the annexes start, or after the summary
+        ends when the summary is wanted without the text (the text being then the fallback of a missing summary)
+        :return: extracted text in the given format
+        """
         # TODO: See if possible to detect that page is in landscape mode instead of regular portrait mode
         #       (eg. IMP19953820ENG)
         # TODO: Take pdf 'type' into account (see JT03366237)
@@ -67,14 +118,19 @@ class PDFTextExtractor:
         output = None
         output_format = format if format else OutputFormat.JSON
         mode = mode if mode else ExtractMode.LAYOUT
-
-        if mode is ExtractMode.LAYOUT:
-            self.logger.info('Layout based extraction.')
-            self.convert_pdf_layout_to_text(pdf_file_path)
-
-        if mode is ExtractMode.TEXT or self.should_force_raw_extraction():
-            self.logger.info('Raw text extraction.')
-            self.convert_pdf_to_txt(pdf_file_path)
+        self.wanted = set(wanted) if wanted else None
+
+        if cache and self.single_page == -1:
+            cache_key = cache.key(pdf_file_path, mode, wanted=self.wanted, content_hash=content_hash)
+            contents = cache.get(cache_key)
+            if contents is not None:
+                self.logger.info('Extraction found in cache: {}'.format(cache_key))
+                self.contents = contents
+            else:
+                self.convert_pdf(pdf_file_path, mode)
+                cache.put(cache_key, self.contents)
+        else:
+            self.convert_pdf(pdf_file_path, mode)
 
         if output_format is OutputFormat.TEXT:
             output = ''
@@ -97,6 +153,15 @@ class PDFTextExtractor:
 
         return output
 
+    def convert_pdf(self, pdf_file_path, mode):
+        if mode is ExtractMode.LAYOUT:
+            self.logger.info('Layout based extraction.')
+            self.convert_pdf_layout_to_text(pdf_file_path)
+
+        if mode is ExtractMode.TEXT or self.should_force_raw_extraction():
+            self.logger.info('Raw text extraction.')
+            self.convert_pdf_to_txt(pdf_file_path)
+
     def should_force_raw_extraction(self):
         """
 
@@ -104,16 +169,51 @@ class PDFTextExtractor:
         """
         if self.single_page != -1:
             return False
+        elif self.summary_preferred() and self.contents.get(FragmentType.SUMMARY):
+            return False
         elif FragmentType.TEXT not in self.contents or len(self.contents[FragmentType.TEXT]) == 0:
             return True
         else:
             return False
 
+    def summary_preferred(self):
+        """
+
+        :return: True if the summary is wanted, and the text only if no summary is found
+        """
+        return bool(self.wanted) and FragmentType.SUMMARY in self.wanted and FragmentType.TEXT not in self.wanted
+
+    def skip_remaining_pages(self, page_txt, previous_fragment_type):
+        """
+
+        :param page_txt: text of the next page
+        :param previous_fragment_type: fragment type of the previous page
+        :return: True if the remaining pages can only produce fragments nobody wants
+        """
+        if not self.wanted:
+            return False
+        if self.annex_found and not self.wanted & ANNEX_FRAGMENT_TYPES:
+            self.logger.info('Annex found, skipping remaining pages')
+            return True
+        if self.summary_preferred() and previous_fragment_type is FragmentType.SUMMARY and \
+                not any(self.pdf_filter.match_summary(fragment.strip()) for fragment in page_txt.values()):
+            self.logger.info('End of summary, skipping remaining pages')
+            return True
+        return False
+
     def convert_pdf_to_txt(self, path):
-        rsrcmgr = PDFResourceManager()
+        """
+        Raw text extraction
+
+        Pages already laid out by the layout extraction are rendered from their layout objects (see raw_pages),
+        only the other pages are interpreted again.
+        :param path:
+        :return: None
+        """
+        rsrcmgr = CachingResourceManager()
         codec = 'utf-8'
         laparams = LAParams()
-        fp = file(path, 'rb')
+        fp = open_pdf(path)
         password = ""
         maxpages = 0
         caching = True
@@ -121,32 +221,37 @@ class PDFTextExtractor:
 
         for page_no, page in enumerate(PDFPage.get_pages(fp, pagenos, maxpages=maxpages, password=password,
                                                          caching=caching, check_extractable=True)):
-            retstr = StringIO()
-
-            page_text = ''
-            device = TextConverter(rsrcmgr, retstr, codec=codec, laparams=laparams)
-            try:
-                PDFPageInterpreter(rsrcmgr, device).process_page(page)
-            except TypeError:
-                self.logger.error('TypeError: "NoneType" object has no attribute "__getitem__"')
+            if page_no in self.raw_pages:
+                page_text = self.raw_pages[page_no]
             else:
-                page_text = retstr.getvalue().decode(encoding='utf-8')
-            finally:
-                device.close()
-                retstr.close()
+                retstr = StringIO()
+
+                page_text = ''
+                device = TextConverter(rsrcmgr, retstr, codec=codec, laparams=laparams)
+                try:
+                    PDFPageInterpreter(rsrcmgr, device).process_page(page)
+                except TypeError:
+                    self.logger.error('TypeError: "NoneType" object has no attribute "__getitem__"')
+                else:
+                    page_text = retstr.getvalue().decode(encoding='utf-8')
+                finally:
+                    device.close()
+                    retstr.close()
 
             self.logger.info('=' * 20)
             self.logger.info('Processing page {page_nb}'.format(page_nb=page_no))
             self.logger.info('=' * 20)
             self.add_text_content(page_text, fragment_type=FragmentType.TEXT)
 
-        fp.close()
+        self.raw_pages = dict()
+        if fp is not path:
+            fp.close()
 
     def convert_pdf_layout_to_text(self, pdf_doc):
         fp = None
         try:
             # open the pdf file
-            fp = open(pdf_doc, 'rb')
+            fp = open_pdf(pdf_doc)
             # create a parser object associated with the file object
             parser = PDFParser(fp)
             # create a PDFDocument object that stores the document structure
@@ -158,18 +263,27 @@ class PDFTextExtractor:
                 self.logger.info("-"*20)
                 self.logger.info("Parsing PDF content")
                 self.logger.info("-"*20)
-                pages = self.parse_pages(doc)
+                # the page processes open the file by its path
+                nb_pages = self.count_parallel_pages(doc) if isinstance(pdf_doc, basestring) else 0
+                if nb_pages:
+                    pages = self.parse_pages_parallel(pdf_doc, nb_pages)
+                else:
+                    pages = self.parse_pages(doc)
 
                 fragment_type = FragmentType.UNKNOWN
                 if self.single_page != -1:  # TODO: See if single page extraction is still working...
                     fragment_type = FragmentType.TEXT
-                for page_nb, (page_text, page_cells) in enumerate(pages):
-                    if self.single_page != -1:
-                        page_nb = self.single_page+1
-                    self.logger.debug('-'*20)
-                    self.logger.debug('Processing page {page_nb}'.format(page_nb=page_nb))
-                    self.logger.debug('-'*20)
-                    fragment_type = self.process_page(page_text, page_cells, fragment_type, page_nb)
+                # each page is classified as soon as it is parsed
+                with closing(pages):
+                    for page_nb, (page_text, page_cells) in enumerate(pages):
+                        if self.skip_remaining_pages(page_text, fragment_type):
+                            break
+                        if self.single_page != -1:
+                            page_nb = self.single_page+1
+                        self.logger.debug('-'*20)
+                        self.logger.debug('Processing page {page_nb}'.format(page_nb=page_nb))
+                        self.logger.debug('-'*20)
+                        fragment_type = self.process_page(page_text, page_cells, fragment_type, page_nb)
                 # Add any leftover text
                 if self.previous_p:
                     self.contents[FragmentType.TEXT].extend({self.previous_p})
@@ -180,20 +294,28 @@ class PDFTextExtractor:
             # the file doesn't exist or similar problem
             self.logger.error("Error while processing pdf file.")
         finally:
-            # close the pdf file
-            if fp:
+            # close the pdf file, if opened here
+            if fp and fp is not pdf_doc:
                 fp.close()
 
-    def parse_pages(self, doc):
-        """With an open PDFDocument object, get the pages and parse each one
+    def parse_pages(self, doc, first_page=0, last_page=None):
+        """Generator function which gets the pages of an open PDFDocument object and parses them one at a time
+
+        Only the text and cells of the current page are held: the layout objects of a page are released
+        as soon as the next one is laid out.
+        :param doc: PDFDocument
+        :param first_page: number of the first page to parse
+        :param last_page: number of the page after the last one to parse, None to parse up to the end
+        :return: Tuple (page_text, page_cells)
         """
-        rsrcmgr = PDFResourceManager()
+        rsrcmgr = CachingResourceManager()
         laparams = LAParams()
         device = PDFPageAggregator(rsrcmgr, laparams=laparams)
         interpreter = PDFPageInterpreter(rsrcmgr, device)
-        pages = []
         for page_number, page in enumerate(PDFPage.create_pages(doc)):
-            if self.single_page != -1 and page_number != self.single_page:
+            if last_page is not None and page_number >= last_page:
+                break
+            if page_number < first_page or (self.single_page != -1 and page_number != self.single_page):
                 continue
             if _log_level > 2:
                 self.logger.debug('\n'+'-'*50)
@@ -204,14 +326,83 @@ class PDFTextExtractor:
                 # receive the LTPage object for this page
                 layout = device.get_result()
                 # layout is an LTPage object which may contain child objects like LTTextBox, LTFigure, LTImage, etc.
-                pages.append(self.parse_page_layout(layout))
+                parsed_page = self.parse_page_layout(layout)
+                self.keep_raw_text(page_number, layout)
             except TypeError:
                 self.logger.error('TypeError: "NoneType" object has no attribute "__getitem__"')
+            else:
+                yield parsed_page
+
+    def keep_raw_text(self, page_number, layout):
+        """
+        Render the raw text of the page while the raw text extraction may still be needed, so that the fallback
+        does not interpret the page again
 
-        return pages
+        :param page_number:
+        :param layout: LTPage
+        :return: None
+        """
+        if self.should_force_raw_extraction():
+            self.raw_pages[page_number] = render_text(layout)
+        elif self.raw_pages:
+            self.raw_pages = dict()
+
+    def count_parallel_pages(self, doc):
+        """
+        Page-parallel parsing applies to multi-page extraction of documents of at least PAGE_PARALLEL_MIN_PAGES
+        pages, from a process allowed to have children (i.e. not a worker of the bulk summarizer pool).
+
+        :param doc: PDFDocument
+        :return: number of pages of the document if it should be parsed in parallel, 0 otherwise
+        """
+        if self.page_processes < 2 or self.single_page != -1 or mp.current_process().daemon:
+            return 0
+        nb_pages = sum(1 for _ in PDFPage.create_pages(doc))
+        return nb_pages if nb_pages >= PAGE_PARALLEL_MIN_PAGES else 0
+
+    def parse_pages_parallel(self, pdf_doc, nb_pages):
+        """
+        Generator function which runs the layout analysis of page ranges in parallel processes, and produces
+        the pages in order as the ranges complete.
+
+        The pages are identical to those of parse_pages: the text of each page is rebuilt by inserting the boxes
+        in the order they were found, cells are rebuilt from their coordinates and minx0/maxx1 are set to the
+        values a sequential parse has when the page is produced.
+        :param pdf_doc: path of the pdf file
+        :param nb_pages: number of pages of the document
+        :return: Tuple (page_text, page_cells)
+        """
+        nb_ranges = min(nb_pages, self.page_processes * PAGE_RANGES_PER_PROCESS)
+        bounds = [nb_pages * i // nb_ranges for i in range(nb_ranges + 1)]
+        page_ranges = [(pdf_doc, bounds[i], bounds[i + 1]) for i in range(nb_ranges)]
+        self.logger.info('Parsing {} pages in {} ranges with {} processes'.format(nb_pages, nb_ranges,
+                                                                                 self.page_processes))
+        pool = mp.Pool(processes=self.page_processes)
+        try:
+            for range_pages, raw_pages in pool.imap(parse_page_range, page_ranges):
+                if self.should_force_raw_extraction():
+                    self.raw_pages.update(raw_pages)
+                elif self.raw_pages:
+                    self.raw_pages = dict()
+                for text_items, cells_coord, minx0, maxx1 in range_pages:
+                    page_text = PageText()
+                    for coord, text in text_items:
+                        page_text[coord] = text
+                    page_cells = [Cell(x0, y0, x1, y1) for x0, y0, x1, y1 in cells_coord]
+                    self.minx0 = minx0
+                    if not self.maxx1 or (maxx1 and maxx1 > self.maxx1):
+                        self.maxx1 = maxx1
+                    yield page_text, page_cells
+        finally:
+            pool.terminate()
+            pool.join()
 
     def parse_page_layout(self, lt_objs):
-        """Iterate through the list of LT* objects and capture the text data contained in each"""
+        """Iterate through the list of LT* objects and capture the text data contained in each
+
+        minx0 is set to the leftmost text position of the page, maxx1 to the rightmost text position
+        of the pages parsed so far.
+        """
 
         self.minx0 = None
         txt_x0 = None
@@ -222,7 +413,7 @@ class PDFTextExtractor:
             rec_def = open('rec_def.log', mode='w')
             text_def = open('text_def.log', mode='w')
 
-        page_text = dict()  # k=(x0, y0, x1, y1) of the bbox, v=text within that bbox
+        page_text = PageText()  # k=(x0, y0, x1, y1) of the bbox, v=text within that bbox
         page_cells = []
         for lt_obj in lt_objs:
             if isinstance(lt_obj, LTTextBox) or isinstance(lt_obj, LTTextLine):
@@ -245,7 +436,7 @@ class PDFTextExtractor:
                 y0 = lt_obj.bbox[1]
                 x1 = lt_obj.bbox[2]
                 y1 = lt_obj.bbox[3]
-                cell = Cell(x0, y0, x1, y1, logger=self.logger)
+                cell = Cell(x0, y0, x1, y1)
                 if cell.rows > 0 or cell.columns > 0:  # ignore 'lines' (i.e. cell without content within)
                     page_cells.append(cell)
                     if _log_level > 1:
@@ -291,59 +482,17 @@ class PDFTextExtractor:
         # TODO: Do some systematic tests to compare the quality of the text extracted from layout
         #       with that of text extracted with "regular" text extraction.
         # TODO: what about very special cases like statistical reports with no text at all? See JT00021419
-        # TODO: refactor to submit page only once and validate every options all at the same time.
-        # ==> then only decide what type of fragment (i.e. annex or participants list... see JT00124770)
         self.logger.debug('Enter page validation')
 
-        coord = None
-
-        while True:
-
-            # cover is expected to be first page only
-            is_cover = False if page_nb > 0 else self.pdf_filter.is_cover(page_txt)
-            if is_cover:
-                self.logger.debug('MATCH - {Cover Page} found.')
-                current_fragment_type = FragmentType.COVER_PAGE
-                break
-
-            is_toc = self.pdf_filter.is_toc(page_txt, previous_fragment_type)
-            if is_toc:
-                self.logger.debug('MATCH - {Table Of Contents} found.')
-                current_fragment_type = FragmentType.TABLE_OF_CONTENTS
-                break
-
-            # do not report summary found within annex
-            is_summary = False if self.report.annex != 0 else self.pdf_filter.is_summary(page_txt)
-            if is_summary:
-                self.logger.debug('MATCH - {Summary} found.')
-                current_fragment_type = FragmentType.SUMMARY
-                break
-
-            is_glossary = self.pdf_filter.is_glossary(page_txt, previous_fragment_type)
-            if is_glossary:
-                self.logger.debug('MATCH - {Glossary} found.')
-                current_fragment_type = FragmentType.GLOSSARY
-                break
-
-            is_bibliography, coord = self.pdf_filter.is_bibliography(page_txt, previous_fragment_type)
-            if is_bibliography:
-                self.logger.debug('MATCH - {Bibliography} found.')
-                current_fragment_type = FragmentType.BIBLIOGRAPHY
-                break
-
-            is_participants_list, coord = self.pdf_filter.is_participants_list(page_txt, previous_fragment_type)
-            if is_participants_list:
-                self.logger.debug('MATCH - {Participants List} found.')
-                current_fragment_type = FragmentType.PARTICIPANTS_LIST
-                break
-
-            is_annex = self.pdf_filter.is_annex(page_txt)
-            if is_annex:
-                self.logger.debug('MATCH - {Annex} found.')
-                current_fragment_type = FragmentType.ANNEX
+        # cover is expected to be first page only, do not report summary found within annex
+        current_fragment_type, coord = self.pdf_filter.classify_page(page_txt, previous_fragment_type,
+                                                                     cover_allowed=page_nb == 0,
+                                                                     summary_allowed=self.report.annex == 0)
+        if current_fragment_type:
+            self.logger.debug('MATCH - {{{}}} found.'.format(current_fragment_type))
+            if current_fragment_type == FragmentType.ANNEX:
                 self.annex_found = True
-                break
-
+        else:
             # Remove any contents found within tables
             # TODO: keep text from table to identify potential "section" (e.g. Summary or Annex)
             # TODO: make the actual definition of what is a "table" clearer!
@@ -358,7 +507,6 @@ class PDFTextExtractor:
                 current_fragment_type = FragmentType.ANNEX
             else:
                 current_fragment_type = FragmentType.TEXT
-            break
 
         self.logger.debug('Exit page validation')
 
@@ -380,10 +528,6 @@ class PDFTextExtractor:
     def add_fragment(self, fragment_txt, fragment_type):
         content_list = list()
         # TODO: investigate problematic page continuation (i.e. page 10) for french document: JT03366982
-        ptrn_continued = re.compile('^(?<!\n)([a-zéèêçàù]|[A-Z]{2,})', re.UNICODE)
-        # TODO: add all french capitalized accentuated
-        ptrn_punct = re.compile('([\.]+|[\?!:])', re.UNICODE)
-        ptrn_useless_crlf = re.compile('(?<!\.)\n(?![A-Z][a-z])', re.UNICODE)
 
         if _log_level > 1:
             self.logger.debug('[add_fragment] Fragment type:{type}'.format(type=fragment_type))
@@ -394,15 +538,15 @@ class PDFTextExtractor:
             for i, p in enumerate(fragment_txt):
                 if _log_level > 1:
                     self.logger.debug(u'[START] {i}th sentence: {p}'.format(i=i, p=p))
-                p = re.sub(ptrn_useless_crlf, ' ', p)
-                p = re.sub(' +', ' ', p)
-                p = re.sub('^\s*', '', string=p)
+                p = patterns.USELESS_CRLF.sub(' ', p)
+                p = patterns.SPACES.sub(' ', p)
+                p = patterns.LEADING_SPACES.sub('', p)
                 p = p.strip()
                 if not len(p):
                     self.logger.debug('nothing left...')
                     continue
                 if self.previous_p:
-                    if re.match(ptrn_continued, p[0]) and fragment_type is not FragmentType.SUMMARY:
+                    if patterns.PARAGRAPH_CONTINUED.match(p[0]) and fragment_type is not FragmentType.SUMMARY:
                         if _log_level > 1:
                             self.logger.debug(u'continued. p[0]:{p}'.format(p=p))
                             self.logger.debug(u'adding previous. :{p}'.format(p=self.previous_p))
@@ -419,7 +563,7 @@ class PDFTextExtractor:
                 else:
                     if _log_level > 2:
                         self.logger.debug('p[-1]: '+p)
-                    if re.match('[\.\!\?\]]', p[-1]):
+                    if patterns.SENTENCE_END.match(p[-1]):
                         content_list.append(p)
                         self.previous_p = None
                         continue
@@ -428,7 +572,8 @@ class PDFTextExtractor:
                         continue
 
                 # Only for last of page and first of next page...(i.e. if there are notes, we're screwed!!!)
-                if i == (len(fragment_txt)-1) and not re.match(ptrn_punct, p[-1]) and not re.match('[0-9]+ \w+.*', p):
+                if i == (len(fragment_txt)-1) and not patterns.PUNCTUATION.match(p[-1]) and \
+                        not patterns.START_WITH_NUMBER.match(p):
                     if _log_level > 1:
                         self.logger.debug(u'not finished. p[0]:{p}'.format(p=p))
                     self.previous_p = p
@@ -436,8 +581,8 @@ class PDFTextExtractor:
                 else:
                     if _log_level > 2:
                         self.logger.debug(u'[END] i != len(fragment_txt)-1 ? ==> {i} != {l} ?'.format(i=i, l=len(fragment_txt)-1))
-                        self.logger.debug(u'[END] match(ptrn_punct): {m}'.format(m=re.match(ptrn_punct, p[-1])))
-                        self.logger.debug(u'[END] match(ptrn_start_with_number): {m}'.format(m=re.match('[0-9]+ \w+.*', p)))
+                        self.logger.debug(u'[END] match(ptrn_punct): {m}'.format(m=patterns.PUNCTUATION.match(p[-1])))
+                        self.logger.debug(u'[END] match(ptrn_start_with_number): {m}'.format(m=patterns.START_WITH_NUMBER.match(p)))
                         self.logger.debug(u'[END] {i}th sentence: {p}'.format(i=i, p=p))
                     #content_list.append(p)
                     self.previous_p = None
@@ -445,8 +590,8 @@ class PDFTextExtractor:
                 content_list.append(p)
         else:
             for p in fragment_txt:
-                p = re.sub('(?<!\.)\n(?![A-Z])', ' ', p)
-                p = re.sub(' +', ' ', p)
+                p = patterns.CRLF.sub(' ', p)
+                p = patterns.SPACES.sub(' ', p)
                 p = p.strip()
                 if not len(p):
                     continue
@@ -483,14 +628,12 @@ class PDFTextExtractor:
         return h
 
     def strip_paragraph_numbers(self, fragment_txt):
-        filter_paragraph_lead_numbers = re.compile('((^|\n)([0-9]+\.)+[0-9]{0,3}\W?)')
-        filter_paragraph_inserted_numbers = re.compile('((?<=\n)\W?([0-9]+\.)+(?![A-Z]))')
         for i, txt in enumerate(fragment_txt):
             txt = txt.strip()
             # remove paragraph numbers, e.g. "23."
             # sometimes wrongly inserted within the text from incorrect layout analysis
-            result = re.sub(filter_paragraph_lead_numbers, ' ', txt)
-            result = re.sub(filter_paragraph_inserted_numbers, ' ', result)
+            result = patterns.PARAGRAPH_LEAD_NUMBERS.sub(' ', txt)
+            result = patterns.PARAGRAPH_INSERTED_NUMBERS.sub(' ', result)
             if _log_level > 2:
                 self.logger.debug(u'[strip_paragraph_numbers] regexp on [{substring}]'.format(substring=txt))
                 self.logger.debug(u'[strip_paragraph_numbers] result: [{result}]'.format(result=result))
@@ -498,31 +641,18 @@ class PDFTextExtractor:
         return fragment_txt
 
     def strip_header(self, fragment_txt):
-        ptrn_classif = re.compile('^\W*For Official Use\W*$|'
-                                  '^\W*Confidential\W*$|'
-                                  '^\W*Unclassified\W*$|'
-                                  '^\W*A Usage Officiel\W*$|'
-                                  '^\W*Confidentiel\W*$|'
-                                  '^\W*Non classifi.{1,2}\W*$|'
-                                  '^\W*Diffusion Restreinte\W*$|'
-                                  '^\W*Restricted Diffusion\W*$|'
-                                  '^\W*Restricted\W*$|'
-                                  '^\W*general distribution\W*$', re.IGNORECASE)
-        ptrn_cote = re.compile('^\W*([A-Z]+?[\(\)/0-9]+[A-Z]*?)+\W*$')
-
         classif_idx = None
         for i, txt in enumerate(fragment_txt):
             txt = txt.strip()
             if len(txt) == 0:
                 continue
-            # if re.search(ptrn_cote, txt) or re.search(ptrn_classif, txt):
-            if re.search(ptrn_cote, txt):
+            if patterns.HEADER_COTE.search(txt):
                 self.logger.debug(u'found header {txt} at index: {i}'.format(txt=txt, i=i))
-                self.logger.debug(u'cote pattern match: {m}'.format(m=re.search(ptrn_cote, txt).string))
+                self.logger.debug(u'cote pattern match: {m}'.format(m=patterns.HEADER_COTE.search(txt).string))
                 continue
-            elif re.search(ptrn_classif, txt):
+            elif patterns.HEADER_CLASSIFICATION.search(txt):
                 self.logger.debug(u'found header {txt} at index: {i}'.format(txt=txt, i=i))
-                self.logger.debug(u'classif pattern match: {m}'.format(m=re.search(ptrn_classif, txt).string))
+                self.logger.debug(u'classif pattern match: {m}'.format(m=patterns.HEADER_CLASSIFICATION.search(txt).string))
                 continue
             else:
                 classif_idx = i
@@ -537,12 +667,10 @@ class PDFTextExtractor:
         :param fragment_txt:
         :return:
         """
-        ptrn_classif = re.compile('For Official Use|Confidential|Unclassified|A Usage Officiel|'
-                                  'Confidentiel|Non classifié', re.IGNORECASE)
         classif_idx = None
         for i, txt in enumerate(fragment_txt):
             txt = txt.strip()
-            if re.search(ptrn_classif, txt):
+            if patterns.LEADING_CLASSIFICATION.search(txt):
                 self.logger.debug('found classification at index: {i}'.format(i=i))
                 classif_idx = i
                 break
@@ -558,12 +686,10 @@ class PDFTextExtractor:
         :param fragment_txt:
         :return:
         """
-        # ptrn_cote = re.compile('[\w]+/[[\w/]+]?\(\d{2,4}\)\d*.*|[\w]+\(\d{2,4}\)\d*.*')
-        ptrn_cote = re.compile('([\w]+?[\(\)/0-9]+[\w]*?)+')
         cote_idx = None
         for i, txt in enumerate(fragment_txt):
             txt = txt.strip()
-            if re.search(ptrn_cote, txt):
+            if patterns.LEADING_COTE.search(txt):
                 self.logger.debug('found cote at index: {i}'.format(i=i))
                 cote_idx = i
                 break
@@ -584,7 +710,7 @@ class PDFTextExtractor:
         page_number_idx = None
         for i in range(len(fragment_txt)-1, 0, -1):
             txt = fragment_txt[i].strip()
-            if re.match('\s*?\d+\s*?', txt):
+            if patterns.PAGE_NUMBER.match(txt):
                 self.logger.debug(u'found page number at index: {i} text:{t}'.format(i=i, t=txt))
                 page_number_idx = i
                 break
@@ -607,26 +733,150 @@ class PDFTextExtractor:
     def remove_empty_lines(self, fragment_txt):
         result = list()
         for p in fragment_txt:
-            p = re.sub(' +', ' ', p)
+            p = patterns.SPACES.sub(' ', p)
             p = p.strip()
             if len(p):
                 result.append(p)
         return result
 
     def get_fragment_text(self, page_txt):
-        txt = [(round(-coord[1], 0), round(coord[0], 0), str_array)
-               for coord, str_array in page_txt.items()]
-        return self.re_order_text(txt)
+        return self.ordered_text(page_txt)
 
     def get_previous_fragment_text(self, page_txt, split_coord):
-        txt = [(round(-coord[1], 0), round(coord[0], 0), str_array)
-               for coord, str_array in page_txt.items() if coord[1] > split_coord[1]]
-        return self.re_order_text(txt)
+        _, coords, _ = columns(page_txt)
+        return self.ordered_text(page_txt, coords[:, Y0] > split_coord[1])
 
     def get_next_fragment_text(self, page_txt, split_coord):
-        txt = [(round(-coord[1], 0), round(coord[0], 0), str_array)
-               for coord, str_array in page_txt.items() if coord[1] <= split_coord[1]]
-        return self.re_order_text(txt)
+        _, coords, _ = columns(page_txt)
+        return self.ordered_text(page_txt, coords[:, Y0] <= split_coord[1])
+
+    def ordered_text(self, page_txt, mask=None):
+        """
+        Texts of the page in reading order, same order as re_order_text on the rounded coordinates
+
+        :param page_txt:
+        :param mask: boolean array selecting the boxes of the page, None for all boxes
+        :return: list of texts
+        """
+        txt = reading_order(page_txt, mask)
+        if _log_level > 1:
+            self.logger.debug('-' * 20)
+            self.logger.debug('Sorted page text:')
+            self.logger.debug('-' * 20)
+            for elem in txt:
+                self.logger.debug('{elem}'.format(elem=elem))
+        return txt
+
+
+class PageRangeExtractor(PDFTextExtractor):
+    """
+    Layout analysis of a range of pages, run in a child process by PDFTextExtractor.parse_pages_parallel
+
+    Records the order in which text boxes are found, so the parent process can rebuild identical page dicts.
+    """
+
+    def __init__(self, first_page, last_page, logger=None):
+        PDFTextExtractor.__init__(self, logger=logger, page_processes=0)
+        self.first_page = first_page
+        self.last_page = last_page
+        self.text_order = []
+        self.text_found = False
+
+    def keep_raw_text(self, page_number, layout):
+        """
+        Only the parent process knows whether the raw text extraction will be needed, its contents being empty
+        here: the raw text is rendered only while no page of the range holds a text box, as for scanned pages, which
+        the fallback is likely to need. The raw text extraction interprets again the pages not rendered.
+
+        :param page_number:
+        :param layout: LTPage
+        :return: None
+        """
+        if self.text_found:
+            return
+        if self.text_order:
+            self.text_found = True
+            self.raw_pages = dict()
+        else:
+            self.raw_pages[page_number] = render_text(layout)
+
+    def parse_pages(self, doc, first_page=0, last_page=None):
+        return PDFTextExtractor.parse_pages(self, doc, first_page=self.first_page, last_page=self.last_page)
+
+    def parse_page_layout(self, lt_objs):
+        """
+
+        :param lt_objs: LTPage
+        :return: Tuple (text items, cells coordinates, minx0, maxx1), maxx1 being the maximum over the page only
+        """
+        self.text_order = []
+        self.maxx1 = None
+        page_text, page_cells = PDFTextExtractor.parse_page_layout(self, lt_objs)
+        text_items = []
+        for coord in self.text_order:
+            if coord in page_text:
+                text_items.append((coord, page_text.pop(coord)))
+        cells_coord = [(cell.x0, cell.y0, cell.x1, cell.y1) for cell in page_cells]
+        return text_items, cells_coord, self.minx0, self.maxx1
+
+    def extract_object_text_hash(self, h, lt_obj):
+        self.text_order.append(tuple(lt_obj.bbox[:4]))
+        return PDFTextExtractor.extract_object_text_hash(self, h, lt_obj)
+
+
+def parse_page_range(page_range):
+    """
+    Layout analysis of a range of pages of a pdf file
+
+    :param page_range: Tuple (pdf file path, first page, page after the last one)
+    :return: Tuple (pages, raw_pages): list of tuples (text items, cells coordinates, minx0, maxx1), one per page,
+    and raw text of the pages by page number, for a range without text only (see PageRangeExtractor.keep_raw_text)
+    """
+    pdf_doc, first_page, last_page = page_range
+    extractor = PageRangeExtractor(first_page, last_page)
+    with open(pdf_doc, 'rb') as fp:
+        parser = PDFParser(fp)
+        doc = PDFDocument(parser)
+        parser.set_document(doc)
+        return list(extractor.parse_pages(doc)), extractor.raw_pages
+
+
+def open_pdf(pdf_file):
+    """
+
+    :param pdf_file: path of a pdf file, or pdf file object open for reading in binary mode
+    :return: file object of the pdf file, at its start. The caller closes it if it was opened from a path
+    """
+    if hasattr(pdf_file, 'read'):
+        pdf_file.seek(0)
+        return pdf_file
+    return open(pdf_file, 'rb')
+
+
+def render_text(ltpage, codec='utf-8'):
+    """
+    Render the text of a page the way pdfminer TextConverter does, from the layout objects of the page
+
+    Both rely on the same layout analysis, the drawings and images kept by PDFPageAggregator do not
+    change the grouping of the text.
+    :param ltpage: LTPage
+    :param codec: characters which can not be encoded are dropped, as TextConverter does
+    :return: page text
+    """
+    texts = []
+
+    def render(item):
+        if isinstance(item, LTContainer):
+            for child in item:
+                render(child)
+        elif isinstance(item, LTText):
+            texts.append(item.get_text())
+        if isinstance(item, LTTextBox):
+            texts.append(u'\n')
+
+    render(ltpage)
+    texts.append(u'\f')
+    return u''.join(texts).encode(codec, 'ignore').decode(codec)
 
 
 def to_bytestring(s, enc='utf-8'):
@@ -1,15 +1,17 @@
 
-class Cell:
+import numpy as np
+
+from pdfparser.page_geometry import Box, X0, Y0, X1, Y1
+
+
+class Cell(Box):
+
+    __slots__ = ('rows', 'columns')
 
     def __init__(self, x0, y0, x1, y1, rows=1, columns=1):
-        self.x0 = x0
-        self.y0 = y0
-        self.x1 = x1
-        self.y1 = y1
+        Box.__init__(self, x0, y0, x1, y1)
         self.rows = rows
         self.columns = columns
-        self.width = self.get_width()
-        self.height = self.get_height()
 
     def __repr__(self):
         return ('[x0: {self.x0}, y0: {self.y0}, x1: {self.x1}, y1: {self.y1}, '
@@ -26,15 +28,11 @@ class Cell:
         if cell.y1 > self.y1:
             self.y1 = cell.y1
 
-        # TODO: replace this with @property !!!
-        self.width = self.get_width()
-        self.height = self.get_height()
-
     def get_width(self):
-        return abs(self.x0 - self.x1)
+        return self.width
 
     def get_height(self):
-        return abs(self.y0 - self.y1)
+        return self.height
 
 
 class Row:
@@ -106,6 +104,79 @@ class Table:
 
 
 def find_table_cells(cells):
+    """
+    Find the text cells laid out as tables: rows of more than two cells, in tables of more than two rows, the cells
+    narrower than the page divided by 2.5.
+
+    :param cells: list of Cell, sorted from the top to the bottom of the page as with compare_cells
+    :return: iterable of the table cells, in the order of the list
+    """
+    if not cells:
+        return ()
+    coords = np.array([(cell.x0, cell.y0, cell.x1, cell.y1) for cell in cells], dtype=float)
+    if not (coords[:, Y1] > coords[:, Y0]).all():
+        return find_table_cells_sequential(cells)
+    return (cell for cell, selected in zip(cells, sorted_table_cells(coords)) if selected)
+
+
+def table_cells_mask(coords):
+    """
+    find_table_cells() over the boxes of a page
+
+    :param coords: array of box coordinates, one row per box, in any order
+    :return: boolean array, True for the table cells
+    """
+    mask = np.zeros(len(coords), dtype=bool)
+    if not len(coords):
+        return mask
+    # same order as sorting the cells with compare_cells, reversed
+    order = np.lexsort((coords[:, Y1], coords[:, X1], coords[:, X0], coords[:, Y0]))[::-1]
+    if (coords[:, Y1] > coords[:, Y0]).all():
+        mask[order] = sorted_table_cells(coords[order])
+    else:
+        cells = [Cell(*coord) for coord in coords[order].tolist()]
+        table_cells = set(id(cell) for cell in find_table_cells_sequential(cells))
+        mask[order] = [id(cell) in table_cells for cell in cells]
+    return mask
+
+
+def sorted_table_cells(coords):
+    """
+    Table cells of boxes of positive height, sorted from the top to the bottom of the page.
+
+    A row ends with a box whose top is below the bottom of the previous box: for boxes of positive height, the bottom
+    of the previous box is the lowest of the row, and Row.aligned() then accepts every other box. The rows of more
+    than two cells followed by a shorter row make up a table, the rows after the last short row are ignored, as the
+    last row of the page does not close a table.
+
+    :param coords: array of box coordinates, one row per box, sorted as with compare_cells, reversed
+    :return: boolean array, True for the table cells
+    """
+    new_row = np.empty(len(coords), dtype=bool)
+    new_row[0] = True
+    new_row[1:] = coords[1:, Y1] < coords[:-1, Y0]
+    row_indexes = np.cumsum(new_row) - 1
+    row_sizes = np.bincount(row_indexes)
+
+    # rows of at most two cells close the table made of the longer rows before them, but the last row
+    long_rows = row_sizes > 2
+    closing_rows = ~long_rows
+    closing_rows[-1] = False
+    row_tables = np.cumsum(closing_rows) - closing_rows
+    table_sizes = np.bincount(row_tables[long_rows], minlength=closing_rows.sum() + 1)
+    table_rows = long_rows & (row_tables < closing_rows.sum()) & (table_sizes[row_tables] > 2)
+
+    page_width = coords[:, X1].max() - coords[:, X0].min()
+    return table_rows[row_indexes] & (np.abs(coords[:, X0] - coords[:, X1]) < page_width / 2.5)
+
+
+def find_table_cells_sequential(cells):
+    """
+    find_table_cells() walking the cells one by one, whatever their height
+
+    :param cells: list of Cell, sorted from the top to the bottom of the page as with compare_cells
+    :return: iterable of the table cells
+    """
     # TODO: ensure cells are sorted correctly, do not assume caller has done it already !
     # TODO: implement logic based on columns in addition to rows !!!
     global_cell = None
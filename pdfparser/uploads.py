@@ -0,0 +1,164 @@
+# -*- coding: utf8 -*-
+"""
+PDF files uploaded to the REST service, read as they arrive.
+
+Small uploads are kept in memory, larger ones are spooled to a file of a folder bounded in size. The content is
+hashed on the way, so that the extraction and the summary of an upload are cached by content. The file of an upload
+is removed once summarized; the files left by a job lost with its process are removed once stale.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from cStringIO import StringIO
+
+BLOCK_SIZE = 64 * 1024  # bytes read at once from an upload
+
+
+class UploadTooLarge(Exception):
+    """
+    Raised when an upload exceeds the maximum size
+    """
+    pass
+
+
+class UploadFolderFull(Exception):
+    """
+    Raised when the upload folder has no room for an upload of the maximum size
+    """
+    pass
+
+
+class NotAPdf(Exception):
+    """
+    Raised when an upload is empty or does not start like a PDF file
+    """
+    pass
+
+
+class Upload:
+    """
+    PDF file uploaded, held in memory or spooled to a file of the upload folder
+
+    Passed to the job summarizing it, the file being removed once summarized.
+    """
+
+    def __init__(self, content_hash, size, data=None, path=None):
+        """
+
+        :param content_hash: sha1 hex digest of the content
+        :param size: number of bytes
+        :param data: content, if held in memory
+        :param path: path of the file of the upload folder holding the content otherwise
+        """
+        self.content_hash = content_hash
+        self.size = size
+        self.data = data
+        self.path = path
+
+    def open(self):
+        """
+
+        :return: file object of the content, to be closed by the caller
+        """
+        return StringIO(self.data) if self.data is not None else open(self.path, 'rb')
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class UploadFolder:
+    """
+    Folder of the uploads too large to be kept in memory
+    """
+
+    def __init__(self, folder, folder_size, max_size, memory_size, max_age, clock=None, logger=None):
+        """
+
+        :param folder: created if needed
+        :param folder_size: maximum number of bytes of the files of the folder
+        :param max_size: maximum number of bytes of an upload
+        :param memory_size: number of bytes of an upload kept in memory, beyond it the upload is spooled to a file
+        :param max_age: number of seconds after which a file of the folder is stale
+        :param clock: function returning the current time, for testing purposes
+        :param logger:
+        """
+        if not logger:
+            from pdfparser import logger
+        self.logger = logger
+        self.folder = folder
+        self.folder_size = folder_size
+        self.max_size = max_size
+        self.memory_size = memory_size
+        self.max_age = max_age
+        self.clock = clock if clock else time.time
+
+    def spool(self, stream):
+        """
+        Read an upload as it arrives, hashing it on the way: kept in memory up to memory_size bytes, written to a file
+        of the folder beyond. Nothing is left in the folder if the upload fails.
+
+        :param stream: input stream of the upload
+        :return: Upload
+        :raise UploadTooLarge: beyond max_size bytes
+        :raise UploadFolderFull: if the folder has no room for an upload of max_size bytes
+        :raise NotAPdf: if the content is not a PDF file
+        """
+        sha1 = hashlib.sha1()
+        blocks, size, spool, spool_path = [], 0, None, None
+        try:
+            for block in iter(lambda: stream.read(BLOCK_SIZE), ''):
+                if size == 0 and not block.startswith('%PDF-'):
+                    raise NotAPdf('Content not starting with a PDF header')
+                size += len(block)
+                if size > self.max_size:
+                    raise UploadTooLarge('Upload of more than {} bytes'.format(self.max_size))
+                sha1.update(block)
+                if spool is None and size > self.memory_size:
+                    if self.used_size() + self.max_size > self.folder_size:
+                        raise UploadFolderFull('No room in {}'.format(self.folder))
+                    fd, spool_path = tempfile.mkstemp(dir=self.folder, suffix='.pdf')
+                    spool = os.fdopen(fd, 'wb')
+                    spool.writelines(blocks)
+                    blocks = []
+                if spool is None:
+                    blocks.append(block)
+                else:
+                    spool.write(block)
+            if size == 0:
+                raise NotAPdf('Empty content')
+        except BaseException:
+            if spool is not None:
+                spool.close()
+                os.remove(spool_path)
+            raise
+        if spool is None:
+            return Upload(sha1.hexdigest(), size, data=''.join(blocks))
+        spool.close()
+        return Upload(sha1.hexdigest(), size, path=spool_path)
+
+    def used_size(self):
+        """
+        Remove the stale files of the folder, left by a job lost with its process
+
+        :return: number of bytes of the remaining files
+        """
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+        total, stale = 0, self.clock() - self.max_age
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            try:
+                if os.path.getmtime(path) < stale:
+                    self.logger.warning('Removing stale upload {}'.format(path))
+                    os.remove(path)
+                else:
+                    total += os.path.getsize(path)
+            except OSError:
+                pass  # removed concurrently
+        return total
+
+
+if __name__ == '__main__':
+    pass
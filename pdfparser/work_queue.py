@@ -0,0 +1,305 @@
+# -*- coding: utf8 -*-
+"""
+Work queue shared by several summarizer nodes.
+
+A coordinator hands out batches of documents to the worker nodes with a lease. Worker nodes renew the
+lease (heartbeat) while they process the batch and report the results when done. Batches whose lease
+expired, e.g. because the node died, are queued again for another node.
+The queue is served over TCP with a multiprocessing manager. The manager unpickles what its clients send: its
+authentication key is a secret shared by the nodes, read from the environment or from a local file (read_authkey),
+never from the configuration of the repository.
+"""
+import collections
+import os
+import socket
+import threading
+import time
+from multiprocessing.managers import BaseManager
+
+
+AUTHKEY_VARIABLE = 'PDF_SUMMARIZER_AUTHKEY'  # environment variable holding the authentication key
+
+
+def read_authkey(authkey_file=None):
+    """
+    Authentication key of the coordinator and the worker nodes: the value of the environment variable
+    AUTHKEY_VARIABLE, else the first line of the given file
+
+    :param authkey_file: path of a local file, out of the repository, holding the key. None or empty for none
+    :return: authentication key
+    :raise ValueError: if no key is found
+    """
+    authkey = os.environ.get(AUTHKEY_VARIABLE)
+    if not authkey and authkey_file:
+        try:
+            with open(authkey_file, 'rb') as key_file:
+                authkey = key_file.readline().strip()
+        except IOError as ex:
+            raise ValueError('Unable to read the authentication key from {} - {}'.format(authkey_file, ex))
+    if not authkey:
+        raise ValueError('No authentication key: set the environment variable {} or the AUTHKEY_FILE option of '
+                         'the WORK_QUEUE section'.format(AUTHKEY_VARIABLE))
+    return authkey
+
+
+class LeaseQueue:
+    """
+    Batches of documents handed out with leases
+
+    All methods are thread safe: the manager server calls them from one thread per connected node.
+    """
+
+    def __init__(self, lease_duration, clock=None):
+        """
+
+        :param lease_duration: number of seconds a lease remains valid without heartbeat
+        :param clock: function returning the current time, for testing purposes
+        """
+        self.lease_duration = lease_duration
+        self.clock = clock if clock else time.time
+        self.lock = threading.Lock()
+        self.batches = dict()  # k=batch id, v=documents of the batch
+        self.waiting = collections.deque()  # batch ids waiting for a node, oldest first
+        self.leases = dict()  # k=lease id, v=(batch id, worker id, expiry time)
+        self.results = list()
+        self.nb_batches = 0
+        self.nb_leases = 0
+        self.closed = False
+
+    def put(self, documents):
+        """
+        Add a batch of documents to the queue
+
+        :param documents: list of documents
+        :return: batch id
+        """
+        with self.lock:
+            self.nb_batches += 1
+            batch_id = self.nb_batches
+            self.batches[batch_id] = documents
+            self.waiting.append(batch_id)
+            return batch_id
+
+    def close(self):
+        """
+        No more batches will be added: the queue is finished once the remaining batches are completed
+
+        :return: None
+        """
+        with self.lock:
+            self.closed = True
+
+    def nb_waiting(self):
+        with self.lock:
+            return len(self.waiting)
+
+    def nb_leased(self):
+        with self.lock:
+            return len(self.leases)
+
+    def finished(self):
+        with self.lock:
+            return self.closed and not self.batches
+
+    def acquire(self, worker_id):
+        """
+        Lease the oldest waiting batch
+
+        :param worker_id: identifies the node, for logging purposes
+        :return: Tuple (lease id, documents), (None, None) if no batch is waiting
+        """
+        with self.lock:
+            while self.waiting:
+                batch_id = self.waiting.popleft()
+                if batch_id not in self.batches:
+                    continue  # completed by a late node after its lease had expired
+                self.nb_leases += 1
+                lease_id = '{}-{}'.format(batch_id, self.nb_leases)
+                self.leases[lease_id] = (batch_id, worker_id, self.clock() + self.lease_duration)
+                return lease_id, self.batches[batch_id]
+            return None, None
+
+    def heartbeat(self, lease_id):
+        """
+        Extend the lease
+
+        :param lease_id:
+        :return: False if the lease already expired, i.e. the batch may have been handed out to another node
+        """
+        with self.lock:
+            if lease_id not in self.leases:
+                return False
+            batch_id, worker_id, _ = self.leases[lease_id]
+            self.leases[lease_id] = (batch_id, worker_id, self.clock() + self.lease_duration)
+            return True
+
+    def complete(self, lease_id, results):
+        """
+        Report the results of a batch
+
+        Results of an expired lease are still accepted while the batch is outstanding, since the documents have
+        been processed: the batch is then dropped if it is waiting for another node, and the results of a node
+        it was handed out to again are dropped. The results of a batch are accepted only once.
+        :param lease_id:
+        :param results: list of results
+        :return: False if the lease had expired
+        """
+        with self.lock:
+            batch_id = int(lease_id.split('-')[0])
+            if self.batches.pop(batch_id, None) is not None:
+                self.results.extend(results)
+            return self.leases.pop(lease_id, None) is not None
+
+    def requeue_expired(self):
+        """
+        Queue again, first in line, the batches whose lease expired
+
+        :return: number of batches queued again
+        """
+        with self.lock:
+            now = self.clock()
+            expired = [lease_id for lease_id, (_, _, expires) in self.leases.items() if expires < now]
+            for lease_id in expired:
+                batch_id, _, _ = self.leases.pop(lease_id)
+                if batch_id in self.batches:
+                    self.waiting.appendleft(batch_id)
+            return len(expired)
+
+    def pop_results(self):
+        """
+
+        :return: results reported since the last call
+        """
+        with self.lock:
+            results, self.results = self.results, list()
+            return results
+
+
+class WorkQueueServer(BaseManager):
+    pass
+
+
+class WorkQueueClient(BaseManager):
+    pass
+
+
+WorkQueueClient.register('get_queue')
+
+
+def serve(queue, address, authkey):
+    """
+    Serve the queue over TCP from a background thread
+
+    :param queue: LeaseQueue
+    :param address: Tuple (host, port)
+    :param authkey: shared secret of the coordinator and the worker nodes
+    :return: manager server, its address attribute holds the actual port when port 0 is given
+    """
+    WorkQueueServer.register('get_queue', callable=lambda: queue)
+    manager = WorkQueueServer(address=address, authkey=authkey)
+    server = manager.get_server()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def connect(address, authkey):
+    """
+
+    :param address: Tuple (host, port) of the coordinator
+    :param authkey: shared secret of the coordinator and the worker nodes
+    :return: proxy of the coordinator LeaseQueue
+    """
+    manager = WorkQueueClient(address=address, authkey=authkey)
+    manager.connect()
+    return manager.get_queue()
+
+
+def parse_address(address):
+    """
+
+    :param address: 'host:port'
+    :return: Tuple (host, port)
+    """
+    host, port = address.rsplit(':', 1)
+    return host, int(port)
+
+
+class Heartbeat(threading.Thread):
+    """
+    Renew a lease at regular interval until stopped
+    """
+
+    def __init__(self, queue, lease_id, interval, logger):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.queue = queue
+        self.lease_id = lease_id
+        self.interval = interval
+        self.logger = logger
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                if not self.queue.heartbeat(self.lease_id):
+                    self.logger.warning('Lease {} expired'.format(self.lease_id))
+                    return
+            except (EOFError, IOError, socket.error):
+                self.logger.warning('Coordinator not reachable, heartbeat of lease {} stopped'.format(self.lease_id))
+                return
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def run_worker_node(queue, process_batch, worker_id, lease_duration, poll_interval, logger=None):
+    """
+    Process batches leased from the coordinator until the queue is finished
+
+    :param queue: LeaseQueue, or its proxy
+    :param process_batch: function processing a list of documents and returning the list of results
+    :param worker_id: identifies the node
+    :param lease_duration: number of seconds a lease remains valid, heartbeats are sent three times as often
+    :param poll_interval: number of seconds to wait when no batch is available
+    :param logger:
+    :return: number of batches processed
+    """
+    if not logger:
+        from pdfparser import logger
+    nb_batches = 0
+    while True:
+        try:
+            lease_id, documents = queue.acquire(worker_id)
+            if lease_id is None:
+                if queue.finished():
+                    logger.info('Work queue finished')
+                    break
+                time.sleep(poll_interval)
+                continue
+        except (EOFError, IOError, socket.error):
+            logger.info('Coordinator not reachable, stopping')
+            break
+
+        logger.info('Lease {} acquired, {} documents'.format(lease_id, len(documents)))
+        heartbeat = Heartbeat(queue, lease_id, lease_duration / 3.0, logger)
+        heartbeat.start()
+        try:
+            results = process_batch(documents)
+        finally:
+            heartbeat.stop()
+        try:
+            if not queue.complete(lease_id, results):
+                logger.warning('Lease {} had expired, results kept unless the batch was completed by another node'
+                               .format(lease_id))
+        except (EOFError, IOError, socket.error):
+            logger.error('Coordinator not reachable, results of lease {} lost'.format(lease_id))
+            break
+        nb_batches += 1
+    return nb_batches
+
+
+if __name__ == '__main__':
+    pass
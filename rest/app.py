@@ -1,16 +1,27 @@
+import gzip
+import hashlib
+import io
+import json
 import logging
 import os
 import re
+import tempfile
+import time
 
 from logging.handlers import TimedRotatingFileHandler
 
-from flask import Flask, jsonify, abort, request, make_response
+from flask import Flask, Response, jsonify, abort, request, make_response, url_for
 from json.decoder import JSONDecoder
 
 import pdfparser
 import pdfparser.summarizer as pdfsummarizer
 import pdfparser.text_extractor as text_extractor
 from pdfparser import logger, _config
+from pdfparser.budget import time_limit, limit_memory
+from pdfparser.extraction_cache import default_cache
+from pdfparser.jobs import JobManager, JobStatus, QueueFull, PoolUnavailable, report_progress
+from pdfparser.lru_cache import LRUCache
+from pdfparser.uploads import UploadFolder, UploadTooLarge, UploadFolderFull, NotAPdf
 
 fh = TimedRotatingFileHandler(filename=os.path.join(_config.get('LOGGING', 'output_dir'), 'rest_pdf_summarizer.log'),
                               when='D',
@@ -30,8 +41,74 @@ PDF_ROOT_FOLDER = _config.get('SUMMARIZER', 'PDF_ROOT_FOLDER')
 OUTPUT_FOLDER = _config.get('REST', 'OUTPUT_FOLDER')
 EXTRACT_MODE = text_extractor.ExtractMode.LAYOUT
 EXTRACT_SUMMARY = _config.getboolean('SUMMARIZER', 'EXTRACT_SUMMARY')
+# the only fragments read by get_text_from_json
+WANTED_FRAGMENTS = [text_extractor.FragmentType.SUMMARY if EXTRACT_SUMMARY else text_extractor.FragmentType.TEXT]
 NB_PROCESSES = _config.getint('SUMMARIZER', 'NB_PROCESSES')
 CHUNK_SIZE = _config.getint('SUMMARIZER', 'CHUNK_SIZE')
+DOCUMENT_TIMEOUT = _config.getint('SUMMARIZER', 'DOCUMENT_TIMEOUT')
+DOCUMENT_MAX_MEMORY = _config.getint('SUMMARIZER', 'DOCUMENT_MAX_MEMORY')
+WORKER_MAX_TASKS = _config.getint('SUMMARIZER', 'WORKER_MAX_TASKS')
+JOB_PROCESSES = _config.getint('REST', 'JOB_PROCESSES')
+JOB_QUEUE_SIZE = _config.getint('REST', 'JOB_QUEUE_SIZE')  # jobs queued or running, beyond it requests get 429
+JOB_KEEP = _config.getint('REST', 'JOB_KEEP')  # finished jobs kept for polling
+SYNC_TIMEOUT = _config.getint('REST', 'SYNC_TIMEOUT')  # seconds generate waits for its job before answering 202
+RETRY_AFTER = _config.getint('REST', 'RETRY_AFTER')  # seconds the clients are asked to wait when the queue is full
+SUMMARY_CACHE_SIZE = _config.getint('REST', 'SUMMARY_CACHE_SIZE')  # summaries kept in memory, 0 disables the cache
+SUMMARY_CACHE_BYTES = _config.getint('REST', 'SUMMARY_CACHE_BYTES')  # total size of the summaries kept in memory
+GZIP = _config.getboolean('REST', 'GZIP')  # summaries compressed for the clients accepting gzip
+GZIP_MIN_SIZE = _config.getint('REST', 'GZIP_MIN_SIZE')  # bytes below which a response is not worth compressing
+BATCH_MAX_SIZE = _config.getint('REST', 'BATCH_MAX_SIZE')  # documents of a batch, beyond it the batch gets 400
+BATCH_JOBS = _config.getint('REST', 'BATCH_JOBS')  # jobs of a batch queued or running at once
+UPLOAD_FOLDER = _config.get('REST', 'UPLOAD_FOLDER')  # uploaded PDF files too large to be kept in memory
+UPLOAD_FOLDER_SIZE = _config.getint('REST', 'UPLOAD_FOLDER_SIZE')  # bytes of the files of UPLOAD_FOLDER
+UPLOAD_MAX_SIZE = _config.getint('REST', 'UPLOAD_MAX_SIZE')  # bytes of an uploaded PDF file, beyond it 413
+UPLOAD_MEMORY_SIZE = _config.getint('REST', 'UPLOAD_MEMORY_SIZE')  # bytes of an upload kept in memory
+UPLOAD_MAX_AGE = _config.getint('REST', 'UPLOAD_MAX_AGE')  # seconds after which a file of UPLOAD_FOLDER is stale
+UPLOAD_PREFIX = 'upload:'  # the document path of an upload is the prefix followed by the sha1 of its content
+extraction_cache = default_cache(logger=logger)
+# Summaries served recently, by summary_key: a hit costs no access to OUTPUT_FOLDER. The entries are tuples
+# (summary, etag). A summary removed from OUTPUT_FOLDER is still served until evicted or the service restarted.
+summary_cache = LRUCache(SUMMARY_CACHE_SIZE, max_bytes=SUMMARY_CACHE_BYTES, sizeof=lambda entry: len(entry[0]))
+uploads = UploadFolder(UPLOAD_FOLDER, UPLOAD_FOLDER_SIZE, UPLOAD_MAX_SIZE, UPLOAD_MEMORY_SIZE, UPLOAD_MAX_AGE,
+                       logger=logger)
+
+
+def run_job(pdf_path, backend, upload=None):
+    """
+    Summary job, run in a job process within DOCUMENT_TIMEOUT seconds and DOCUMENT_MAX_MEMORY MB on top of what
+    the process uses when the job starts
+
+    :param pdf_path: path of PDF file to summarize
+    :param backend: name of the summarizer backend, None for the configured one
+    :param upload: Upload to summarize instead of the file of PDF_ROOT_FOLDER, removed once summarized
+    :return: summary
+    """
+    try:
+        limit_memory(DOCUMENT_MAX_MEMORY)
+        with time_limit(DOCUMENT_TIMEOUT):
+            return generate(pdf_path, backend, upload)
+    finally:
+        if upload:
+            upload.remove()
+
+
+def summary_key(pdf_path, backend, upload=None):
+    """
+    Key of the summary computed by a job: concurrent requests for the same summary share a single job
+
+    :param pdf_path: path of PDF file to summarize, UPLOAD_PREFIX and the hash of the content for an upload
+    :param backend: name of the summarizer backend, None for the configured one
+    :param upload: Upload summarized, if any
+    :return: Tuple (normalized path, backend name)
+    """
+    return os.path.normpath(pdf_path), backend or pdfsummarizer.BACKEND
+
+
+# Summaries are computed in JOB_PROCESSES worker processes, out of the threads of the web server
+jobs = JobManager(run_job, JOB_PROCESSES, JOB_QUEUE_SIZE, keep_finished=JOB_KEEP,
+                  job_timeout=2 * DOCUMENT_TIMEOUT if DOCUMENT_TIMEOUT else None, job_key=summary_key,
+                  maxtasksperchild=WORKER_MAX_TASKS if WORKER_MAX_TASKS > 0 else None,
+                  logger=logger)
 
 app = Flask(__name__, static_url_path='', static_folder=_config.get('MAIN', 'static_folder'))
 
@@ -56,6 +133,38 @@ def bad_request(error):
     return make_response(jsonify({'error': 'Bad Request'}), error.code)
 
 
+@app.errorhandler(413)
+def request_entity_too_large(error):
+    """
+
+    :param error:
+    :return:
+    """
+    return make_response(jsonify({'error': 'Request Entity Too Large'}), error.code)
+
+
+@app.errorhandler(429)
+def too_many_requests(error):
+    """
+
+    :param error:
+    :return:
+    """
+    response = make_response(jsonify({'error': 'Too Many Requests'}), error.code)
+    response.headers['Retry-After'] = str(RETRY_AFTER)
+    return response
+
+
+@app.errorhandler(503)
+def service_unavailable(error):
+    """
+
+    :param error:
+    :return:
+    """
+    return make_response(jsonify({'error': 'Service Unavailable'}), error.code)
+
+
 @app.route('/')
 def root():
     """Serve root HTML file for single page application
@@ -68,32 +177,339 @@ def root():
 @app.route('/summarizer/1.0/generate', methods=['POST'])
 def generate_summary():
     """
+    Summary of a document, waiting for its job at most SYNC_TIMEOUT seconds
+
+    A job still running after SYNC_TIMEOUT seconds is answered with 202 and the status of the job,
+    whose result may then be polled like the result of a job submitted to /summarizer/1.0/jobs.
+
+    :return:
+    """
+    document_path, backend = parse_summary_request()
+    logging.info('get_document_details for: ' + document_path)
+    cached = cached_summary(document_path, backend)
+    if cached:
+        return summary_response(document_path, *cached)
+    return wait_summary(document_path, backend, submit_job(document_path, backend))
+
+
+@app.route('/summarizer/1.0/upload', methods=['POST'])
+def upload_summary():
+    """
+    Summary of a PDF file sent as the body of the request, e.g. a file out of PDF_ROOT_FOLDER
+
+    The backend is given by the optional query parameter backend. The summary is identified by the hash of the
+    content: the document path of the response is UPLOAD_PREFIX followed by the hash, the extraction and the summary
+    are cached under it. Answered like /summarizer/1.0/generate, 413 if the file exceeds UPLOAD_MAX_SIZE bytes.
 
     :return:
     """
+    backend = request.args.get('backend')
+    if backend is not None and backend not in pdfsummarizer.BACKENDS:
+        abort(400)
+    if request.content_length is not None and request.content_length > UPLOAD_MAX_SIZE:
+        abort(413)
+    try:
+        upload = uploads.spool(request.stream)
+    except UploadTooLarge:
+        abort(413)
+    except UploadFolderFull as ex:
+        logger.warning('Upload refused: {}'.format(ex))
+        abort(429)
+    except NotAPdf:
+        abort(400)
+    document_path = UPLOAD_PREFIX + upload.content_hash
+    logger.info('Upload of {} bytes: {}'.format(upload.size, document_path))
+    cached = summary_cache.get(summary_key(document_path, backend))
+    if cached:
+        upload.remove()
+        return summary_response(document_path, *cached)
+    try:
+        job = submit_job(document_path, backend, upload)
+    except Exception:
+        upload.remove()
+        raise
+    if job.args[2] is not upload:
+        upload.remove()  # the same content is being summarized by another job
+    return wait_summary(document_path, backend, job)
+
+
+@app.route('/summarizer/1.0/generate_batch', methods=['POST'])
+def generate_summary_batch():
+    """
+    Summaries of a list of documents, streamed as one JSON line per document (NDJSON) as soon as it is summarized
+
+    The documents already summarized are answered first, the others are summarized by jobs, at most BATCH_JOBS at once
+    so that a batch leaves room in the queue for the single requests. A line holds the document path and either its
+    summary or the error of its job.
+
+    :return:
+    """
+    if not request.json or not isinstance(request.json.get('document_paths'), list):
+        abort(400)
+    document_paths = request.json['document_paths']
+    if len(document_paths) > BATCH_MAX_SIZE or not all(isinstance(path, basestring) for path in document_paths):
+        abort(400)
+    backend = request.json.get('backend')
+    if backend is not None and backend not in pdfsummarizer.BACKENDS:
+        abort(400)
+    logger.info('Batch of {} documents'.format(len(document_paths)))
+    return Response(summary_lines(document_paths, backend), mimetype='application/x-ndjson')
+
+
+@app.route('/summarizer/1.0/jobs', methods=['POST'])
+def submit_summary_job():
+    """
+    Queue the summary of a document
+
+    :return: 202 and the status of the job, 429 if the queue is full
+    """
+    document_path, backend = parse_summary_request()
+    return job_response(submit_job(document_path, backend), 202)
+
+
+@app.route('/summarizer/1.0/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+
+    :param job_id:
+    :return: status and progress of the job
+    """
+    return job_response(get_job(job_id), 200)
+
+
+@app.route('/summarizer/1.0/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """
+
+    :param job_id:
+    :return: summary of the document, 202 and the status of the job if not finished, 500 if the job failed
+    """
+    job = get_job(job_id)
+    if job.status == JobStatus.FAILED:
+        return job_response(job, 500)
+    if job.status != JobStatus.DONE:
+        return job_response(job, 202)
+    return summary_response(job.args[0], *cache_summary(job.args[0], job.args[1], job.result))
+
+
+@app.route('/summarizer/1.0/stats', methods=['GET'])
+def service_stats():
+    """
+
+    :return: counters of the summary cache (hit ratio, evictions...) and number of jobs by status
+    """
+    return jsonify({'summary_cache': summary_cache.stats(), 'jobs': jobs.stats()})
+
+
+def parse_summary_request():
+    """
+
+    :return: Tuple (document path, backend name) of the request, backend None for the configured one
+    """
     if not request.json or 'document_path' not in request.json:
         abort(400)
+    # optional name of the summarizer backend, the configured one by default
+    backend = request.json.get('backend')
+    if backend is not None and backend not in pdfsummarizer.BACKENDS:
+        abort(400)
+    return request.json['document_path'], backend
 
-    document_path = request.json['document_path']
-    logging.info('get_document_details for: ' + document_path)
+
+def submit_job(document_path, backend, upload=None):
+    """
+
+    :param document_path:
+    :param backend:
+    :param upload: Upload to summarize, if any
+    :return: Job
+    """
     try:
-        summary = generate(document_path)
-        return jsonify({'result': {'document_path': document_path,
-                                   'summary': summary}})
-    except Exception as ex:
+        return jobs.submit(document_path, backend, upload)
+    except QueueFull as ex:
+        logger.warning('Summary of {} refused: {}'.format(document_path, ex))
+        abort(429)
+    except PoolUnavailable as ex:
+        logger.error('Summary of {} refused: {}'.format(document_path, ex))
+        abort(503)
+
+
+def wait_summary(document_path, backend, job):
+    """
+    Wait for the job of a summary at most SYNC_TIMEOUT seconds
+
+    :param document_path:
+    :param backend:
+    :param job:
+    :return: summary of the document, 202 and the status of the job if still running, 400 if the job failed
+    """
+    if not jobs.wait(job, SYNC_TIMEOUT):
+        return job_response(job, 202)
+    if job.status == JobStatus.FAILED:
         abort(400)
+    return summary_response(document_path, *cache_summary(document_path, backend, job.result))
+
+
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        abort(404)
+    return job
+
+
+def job_response(job, status_code):
+    response = make_response(jsonify({'job': job.as_dict()}), status_code)
+    response.headers['Location'] = url_for('job_status', job_id=job.id)
+    return response
+
+
+def cached_summary(document_path, backend):
+    """
+    Summary of a document already computed: from summary_cache, else from OUTPUT_FOLDER for the configured backend
+
+    :param document_path:
+    :param backend: name of the summarizer backend, None for the configured one
+    :return: Tuple (summary, etag), None if the document is not summarized yet
+    """
+    cached = summary_cache.get(summary_key(document_path, backend))
+    if cached is None and saved_backend(backend):
+        summary = load_saved_summary(document_path)
+        if summary:
+            cached = cache_summary(document_path, backend, summary)
+    return cached
+
 
+def cache_summary(document_path, backend, summary):
+    """
+
+    :param document_path:
+    :param backend: name of the summarizer backend, None for the configured one
+    :param summary:
+    :return: Tuple (summary, etag) stored in summary_cache
+    """
+    cached = summary, hashlib.sha1(summary).hexdigest()
+    summary_cache.put(summary_key(document_path, backend), cached)
+    return cached
+
+
+def summary_response(document_path, summary, etag):
+    """
+    Response of a summary, 304 without body if the client holds the summary already (If-None-Match). The ETag is
+    weak, the same summary being served with or without gzip.
+
+    :param document_path:
+    :param summary:
+    :param etag: hash of the summary
+    :return:
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        response = jsonify({'result': {'document_path': document_path,
+                                       'summary': summary}})
+        compress(response)
+    response.set_etag(etag, weak=True)
+    return response
 
-def generate(pdf_path):
+
+def compress(response):
+    """
+    Compress the body of a response with gzip, if enabled and accepted by the client
+
+    :param response:
+    :return: None
+    """
+    if not GZIP:
+        return
+    response.vary.add('Accept-Encoding')
+    if len(response.data) < GZIP_MIN_SIZE or not request.accept_encodings['gzip']:
+        return
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=6) as gzip_file:
+        gzip_file.write(response.data)
+    response.data = buf.getvalue()
+    response.headers['Content-Encoding'] = 'gzip'
+
+
+def summary_lines(document_paths, backend):
+    """
+    Generator of the NDJSON lines of a batch, in the order the summaries are available
+
+    :param document_paths:
+    :param backend: name of the summarizer backend, None for the configured one
+    :return:
+    """
+    to_summarize = []
+    for document_path in document_paths:
+        cached = cached_summary(document_path, backend)
+        if cached:
+            yield summary_line(document_path, summary=cached[0])
+        else:
+            to_summarize.append(document_path)
+    to_summarize.reverse()
+    pending = []  # tuples (document path, job)
+    while to_summarize or pending:
+        while to_summarize and len(pending) < BATCH_JOBS:
+            try:
+                pending.append((to_summarize[-1], jobs.submit(to_summarize[-1], backend)))
+            except QueueFull:
+                break  # room again once a job finishes
+            except PoolUnavailable as ex:
+                for document_path in [path for path, _ in pending] + to_summarize[::-1]:
+                    yield summary_line(document_path, error=str(ex))
+                return
+            to_summarize.pop()
+        if not pending:
+            # queue full of the jobs of other requests
+            time.sleep(0.1)
+            continue
+        finished = jobs.wait_any([job for _, job in pending])
+        for document_path, job in [(path, job) for path, job in pending if job in finished]:
+            if job.status == JobStatus.DONE:
+                yield summary_line(document_path, summary=cache_summary(document_path, backend, job.result)[0])
+            else:
+                yield summary_line(document_path, error=job.error)
+        pending = [(path, job) for path, job in pending if job not in finished]
+
+
+def summary_line(document_path, summary=None, error=None):
+    """
+
+    :param document_path:
+    :param summary:
+    :param error: error of the summary, if failed
+    :return: NDJSON line of a document of a batch
+    """
+    if error is not None:
+        return json.dumps({'document_path': document_path, 'error': error}) + '\n'
+    return json.dumps({'document_path': document_path, 'summary': summary}) + '\n'
+
+
+def saved_backend(backend):
+    """
+
+    :param backend: name of the summarizer backend, None for the configured one
+    :return: True if the summaries of the backend are saved to OUTPUT_FOLDER
+    """
+    return backend in (None, pdfsummarizer.BACKEND)
+
+
+def generate(pdf_path, backend=None, upload=None):
     """
     Generate summary for given pdf file
 
     First, "clean" text is extracted, then individual sentences are passed to
     PDFSummarizer library to produce the summary
 
+    The saved summaries are those of the configured backend: the summaries of another backend are neither read from
+    nor written to OUTPUT_FOLDER, nor the summaries of the uploads.
+
     :param pdf_path: path of PDF file to summarize
+    :param backend: name of the summarizer backend, None for the configured one
+    :param upload: Upload to summarize instead of the file of PDF_ROOT_FOLDER
     :return:
     """
+    saved = saved_backend(backend) and upload is None
+    pdf_file = None
     logger.info('=' * 40)
     logger.info('Processing file {jt}'.format(jt=pdf_path))
     logger.info('found at {pdf_path}'.format(pdf_path=pdf_path))
@@ -101,34 +517,45 @@ def generate(pdf_path):
 
     try:
         # First check if summary was already generated
-        summary = load_saved_summary(pdf_path)
+        summary = load_saved_summary(pdf_path) if saved else None
         if summary:
             return summary
 
-        pdf_file_path = os.path.join(PDF_ROOT_FOLDER, pdf_path)
-        logger.debug('Complete file path: {}'.format(pdf_file_path))
+        if upload:
+            # read in place, from memory or from its file of UPLOAD_FOLDER
+            pdf_file = upload.open()
+        else:
+            pdf_file = os.path.join(PDF_ROOT_FOLDER, pdf_path)
+            logger.debug('Complete file path: {}'.format(pdf_file))
+        report_progress('extracting', 0.1)
 
         extractor = text_extractor.PDFTextExtractor(logger=logger)
-        json_result = extractor.extract_text(pdf_file_path, mode=EXTRACT_MODE)
+        json_result = extractor.extract_text(pdf_file, mode=EXTRACT_MODE, cache=extraction_cache,
+                                             wanted=WANTED_FRAGMENTS,
+                                             content_hash=upload.content_hash if upload else None)
         logger.debug("Extracted text:")
         logger.debug(json_result)
         pdf_txt = get_text_from_json(json_result)
         sentences = extract_sentences(pdf_txt)
         logger.debug("Nb sentences extracted: {}".format(len(sentences)))
-        summarizer = pdfsummarizer.PDFSummarizer()
+        report_progress('summarizing', 0.7)
+        summarizer = pdfsummarizer.PDFSummarizer(backend=backend)
         results = summarizer.generate_summary(sentences)
         summary = results
         logger.debug('summary:' + ''.join(summary))
-        try:
-            save_summary(pdf_path, summary)
-        except Exception as ex:
-            logger.exception('[EXCEPTION] while saving summary: {}'.format(ex))
+        if saved:
+            try:
+                save_summary(pdf_path, summary)
+            except Exception as ex:
+                logger.exception('[EXCEPTION] while saving summary: {}'.format(ex))
         return summary
 
     except Exception as ex:
         logger.exception("[EXCEPTION] while processing file {}\n{}".format(pdf_path, ex))
         raise ex
     finally:
+        if upload and pdf_file is not None:
+            pdf_file.close()
         logger.info('-' * 20)
         logger.info('End processing file {jt}'.format(jt=pdf_path))
         logger.info('-' * 20)
@@ -148,9 +575,28 @@ def load_saved_summary(pdf_path):
 
 
 def save_summary(pdf_path, summary):
+    """
+    Save the summary of a document. The summary is written to a temporary file first, then renamed, so that
+    concurrent readers never see a partial summary.
+
+    :param pdf_path: path of PDF file summarized
+    :param summary:
+    :return: None
+    """
     create_folders(pdf_path)
-    with open(os.path.join(OUTPUT_FOLDER, pdf_path), mode='wb') as out_file:
-        out_file.write(summary)
+    summary_path = os.path.join(OUTPUT_FOLDER, pdf_path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(summary_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out_file:
+            out_file.write(summary)
+        if os.path.exists(summary_path):
+            os.remove(tmp_path)  # saved concurrently, renaming over it fails on Windows
+        else:
+            os.rename(tmp_path, summary_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 
 def create_folders(pdf_path):
@@ -162,7 +608,12 @@ def create_folders(pdf_path):
             logger.debug('{} already exists'.format(complete_folder))
         else:
             logger.debug('{} does not exist. Creating.'.format(complete_folder))
-            os.mkdir(complete_folder)
+            try:
+                os.mkdir(complete_folder)
+            except OSError:
+                if not os.path.isdir(complete_folder):
+                    raise
+                logger.debug('{} created concurrently'.format(complete_folder))
 
 
 def extract_sentences(pdf_text):
@@ -1,9 +1,16 @@
 #!env/bin/python2.7
 import os
+from multiprocessing import freeze_support
 from rest import app as rest_api
 from pdfparser import _config
 
 if __name__ == '__main__':
+    freeze_support()
     host = _config.get('REST', 'HOST')
     port = _config.get('REST', 'PORT')
-    rest_api.app.run(threaded=True, host=host, port=int(os.environ.get("PORT", port)), debug=False)
+    # job processes started before the threads of the server
+    rest_api.jobs.start()
+    try:
+        rest_api.app.run(threaded=True, host=host, port=int(os.environ.get("PORT", port)), debug=False)
+    finally:
+        rest_api.jobs.stop()
@@ -0,0 +1,87 @@
+"""
+Minimal pdf writer producing sample documents for the extraction tests
+"""
+import random
+
+WORDS = ('economic growth policy trade agriculture members committee report countries development finance '
+         'ministers energy investment tax labour market education health').split()
+
+
+def write_pdf(path, pages):
+    """
+    Write a pdf file with one Helvetica text line per (x, y, text) and rectangles per (x, y, width, height)
+
+    :param path: location of the pdf file
+    :param pages: list of tuples (lines, rectangles)
+    :return: None
+    """
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for lines, rectangles in pages:
+        text = ' '.join('1 0 0 1 {} {} Tm ({}) Tj'.format(x, y, line.replace('(', '\\(').replace(')', '\\)'))
+                        for x, y, line in lines)
+        content = 'BT /F1 11 Tf {} ET'.format(text)
+        for x, y, width, height in rectangles:
+            content += ' {} {} {} {} re S'.format(x, y, width, height)
+        objects.append('<< /Length {} >>\nstream\n{}\nendstream'.format(len(content), content))
+        objects.append('<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                       '/Resources << /Font << /F1 3 0 R >> >> /Contents {} 0 R >>'.format(len(objects)))
+        kids.append(len(objects))
+    objects[1] = '<< /Type /Pages /Kids [{}] /Count {} >>'.format(' '.join('{} 0 R'.format(k) for k in kids),
+                                                                   len(kids))
+    output = '%PDF-1.4\n'
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(output))
+        output += '{} 0 obj\n{}\nendobj\n'.format(i + 1, obj)
+    xref = len(output)
+    output += 'xref\n0 {}\n0000000000 65535 f \n'.format(len(objects) + 1)
+    for offset in offsets:
+        output += '{:010d} 00000 n \n'.format(offset)
+    output += 'trailer\n<< /Size {} /Root 1 0 R >>\nstartxref\n{}\n%%EOF\n'.format(len(objects) + 1, xref)
+    with open(path, 'wb') as pdf_file:
+        pdf_file.write(output)
+
+
+def text_pages(nb_pages, seed=0, annex_page=None, summary_page=None, table_page=None):
+    """
+    Pages of random paragraphs, with a page number at the bottom
+
+    :param nb_pages:
+    :param seed: seed of the random generator
+    :param annex_page: number of the page starting with an annex title
+    :param summary_page: number of the page starting with a summary title
+    :param table_page: number of the page holding a table
+    :return: list of tuples (lines, rectangles) for write_pdf
+    """
+    generator = random.Random(seed)
+    pages = []
+    for page_nb in range(nb_pages):
+        lines, rectangles = [], []
+        y = 780
+        if page_nb == summary_page:
+            lines.append((72, y, 'SUMMARY'))
+            y -= 30
+        if page_nb == annex_page:
+            lines.append((72, y, 'ANNEX 1'))
+            y -= 30
+        for paragraph in range(6):
+            for line_nb in range(4):
+                line = ' '.join(generator.choice(WORDS) for _ in range(10))
+                if line_nb == 3:
+                    line += '.'
+                lines.append((72 + paragraph, y, line.capitalize() if line_nb == 0 else line))
+                y -= 14
+            y -= 14
+        if page_nb == table_page:
+            for row in range(3):
+                for column in range(3):
+                    rectangles.append((100 + column * 120, 150 + row * 20, 120, 20))
+                    lines.append((105 + column * 120, 155 + row * 20, '{}{}'.format(row, column)))
+        lines.append((290, 40, str(page_nb + 1)))
+        pages.append((lines, rectangles))
+    return pages
+
+
+if __name__ == '__main__':
+    pass
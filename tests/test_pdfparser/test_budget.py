@@ -0,0 +1,84 @@
+import logging
+import multiprocessing as mp
+import time
+import unittest
+
+from pdfparser.budget import DocumentTimeout, time_limit, limit_memory, virtual_memory
+
+
+def allocate(megabytes, limit, results):
+    limit_memory(limit)
+    try:
+        data = ' ' * (megabytes * 1024 * 1024)
+        results.put(len(data) > 0)
+    except MemoryError:
+        results.put('MemoryError')
+
+
+def allocate_twice(megabytes, limit, results):
+    limit_memory(limit)
+    kept = ' ' * (megabytes * 1024 * 1024)
+    # re-armed from the current usage, the memory kept does not count against the second allocation
+    limit_memory(limit)
+    try:
+        data = ' ' * (megabytes * 1024 * 1024)
+        results.put(len(data) + len(kept) > 0)
+    except MemoryError:
+        results.put('MemoryError')
+
+
+class BudgetTestCase(unittest.TestCase):
+
+    def test_time_limit(self):
+        started = time.time()
+        with self.assertRaises(DocumentTimeout):
+            with time_limit(0.2):
+                while True:
+                    try:
+                        time.sleep(0.01)
+                    except Exception:
+                        # the timeout must not be swallowed by generic exception handlers
+                        pass
+        self.assertTrue(time.time() - started < 2)
+
+    def test_time_limit_not_exceeded(self):
+        with time_limit(5):
+            result = sum(range(1000))
+        self.assertEqual(499500, result)
+        # timer is disarmed when leaving the block
+        time.sleep(0.1)
+
+    def test_time_limit_disabled(self):
+        with time_limit(0):
+            time.sleep(0.05)
+
+    def test_limit_memory(self):
+        if virtual_memory() is None:
+            self.skipTest('/proc not available')
+        results = mp.Queue()
+        process = mp.Process(target=allocate, args=(512, 64, results))
+        process.start()
+        process.join()
+        self.assertEqual('MemoryError', results.get(timeout=5))
+
+        process = mp.Process(target=allocate, args=(16, 256, results))
+        process.start()
+        process.join()
+        self.assertEqual(True, results.get(timeout=5))
+
+    def test_limit_memory_rearmed(self):
+        if virtual_memory() is None:
+            self.skipTest('/proc not available')
+        results = mp.Queue()
+        process = mp.Process(target=allocate_twice, args=(48, 64, results))
+        process.start()
+        process.join()
+        self.assertEqual(True, results.get(timeout=5))
+
+    def test_limit_memory_disabled(self):
+        self.assertIsNone(limit_memory(0))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
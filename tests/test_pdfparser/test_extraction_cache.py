@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from cStringIO import StringIO
+
+import pdfparser.text_extractor as extractor
+from pdfparser.extraction_cache import ExtractionCache, file_hash
+from pdfparser.pdf_fragment_type import FragmentType
+from test_pdfparser.sample_pdf import write_pdf, text_pages
+
+
+class ExtractionCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = ExtractionCache(os.path.join(self.folder, 'cache'))
+        self.pdf_path = os.path.join(self.folder, 'JT01.pdf')
+        write_pdf(self.pdf_path, text_pages(3))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_key(self):
+        copy_path = os.path.join(self.folder, 'JT02.pdf')
+        shutil.copy(self.pdf_path, copy_path)
+        other_path = os.path.join(self.folder, 'JT03.pdf')
+        write_pdf(other_path, text_pages(3, seed=1))
+
+        key = self.cache.key(self.pdf_path, extractor.ExtractMode.LAYOUT)
+        self.assertTrue(key.startswith(file_hash(self.pdf_path)))
+        self.assertEqual(key, self.cache.key(copy_path, extractor.ExtractMode.LAYOUT))
+        self.assertNotEqual(key, self.cache.key(other_path, extractor.ExtractMode.LAYOUT))
+        self.assertNotEqual(key, self.cache.key(self.pdf_path, extractor.ExtractMode.TEXT))
+        self.assertNotEqual(key, self.cache.key(self.pdf_path, extractor.ExtractMode.LAYOUT,
+                                                wanted={FragmentType.TEXT}))
+
+    def test_put_get(self):
+        key = self.cache.key(self.pdf_path, extractor.ExtractMode.LAYOUT)
+        self.assertIsNone(self.cache.get(key))
+        contents = {FragmentType.TEXT: [u'R\xe9sum\xe9 of the text.'], FragmentType.ANNEX: []}
+        self.cache.put(key, contents)
+        self.assertEqual(contents, self.cache.get(key))
+        self.assertTrue(all(type(fragment_type) is str for fragment_type in self.cache.get(key)))
+        # storing again leaves a single entry
+        self.cache.put(key, contents)
+        self.assertEqual([key + '.json.z'], os.listdir(os.path.dirname(self.cache.path(key))))
+
+    def test_corrupted_entry(self):
+        key = self.cache.key(self.pdf_path, extractor.ExtractMode.LAYOUT)
+        self.cache.put(key, {FragmentType.TEXT: [u'text']})
+        with open(self.cache.path(key), 'wb') as entry:
+            entry.write('garbage')
+        self.assertIsNone(self.cache.get(key))
+
+    def test_extract_text(self):
+        pdf_extractor = extractor.PDFTextExtractor(page_processes=0)
+        expected = pdf_extractor.extract_text(self.pdf_path, cache=self.cache)
+
+        def convert_pdf(pdf_file_path, mode):
+            self.fail('pdf parsed again')
+
+        pdf_extractor = extractor.PDFTextExtractor(page_processes=0)
+        pdf_extractor.convert_pdf = convert_pdf
+        actual = pdf_extractor.extract_text(self.pdf_path, cache=self.cache)
+        self.assertEqual(json.loads(expected), json.loads(actual))
+        self.assertTrue(len(pdf_extractor.contents[FragmentType.TEXT]) > 0)
+
+    def test_file_object(self):
+        expected = extractor.PDFTextExtractor(page_processes=0).extract_text(self.pdf_path)
+        with open(self.pdf_path, 'rb') as pdf_file:
+            content = StringIO(pdf_file.read())
+        content_hash = file_hash(self.pdf_path)
+        self.assertEqual(self.cache.key(self.pdf_path, extractor.ExtractMode.LAYOUT),
+                         self.cache.key(content, extractor.ExtractMode.LAYOUT, content_hash=content_hash))
+        actual = extractor.PDFTextExtractor(page_processes=0).extract_text(content, cache=self.cache,
+                                                                           content_hash=content_hash)
+        self.assertEqual(json.loads(expected), json.loads(actual))
+        self.assertFalse(content.closed)
+        # cached under the key of the file
+        self.assertIsNotNone(self.cache.get(self.cache.key(self.pdf_path, extractor.ExtractMode.LAYOUT)))
+
+        # hashed when no hash is given, the file object is left at its position
+        content.seek(10)
+        self.assertEqual(content_hash, file_hash(content))
+        self.assertEqual(10, content.tell())
+        actual = extractor.PDFTextExtractor(page_processes=0).extract_text(content, cache=self.cache)
+        self.assertEqual(json.loads(expected), json.loads(actual))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
@@ -0,0 +1,71 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+import pdfparser.font_cache as font_cache
+import pdfparser.text_extractor as extractor
+from pdfminer.pdftypes import PDFStream
+from pdfminer.psparser import LIT
+from pdfparser.lru_cache import LRUCache
+from test_pdfparser.sample_pdf import write_pdf, text_pages
+
+
+class FontKeyTestCase(unittest.TestCase):
+
+    def test_font_key(self):
+        spec = {'Type': LIT('Font'), 'Subtype': LIT('Type1'), 'BaseFont': LIT('Helvetica'), 'FirstChar': 32}
+        same = dict(reversed(spec.items()))
+        self.assertEqual(font_cache.font_key(spec), font_cache.font_key(same))
+        other = dict(spec, BaseFont=LIT('Courier'))
+        self.assertNotEqual(font_cache.font_key(spec), font_cache.font_key(other))
+
+    def test_font_file(self):
+        spec = {'Subtype': LIT('Type1'), 'FontFile': PDFStream({'Length': 4}, 'abcd')}
+        other = {'Subtype': LIT('Type1'), 'FontFile': PDFStream({'Length': 4}, 'abce')}
+        self.assertNotEqual(font_cache.font_key(spec), font_cache.font_key(other))
+
+    def test_unhashable(self):
+        spec = {'Subtype': LIT('Type1'), 'Widths': object()}
+        self.assertIsNone(font_cache.font_key(spec))
+
+
+class CachingResourceManagerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.pdf_paths = []
+        for seed in range(2):
+            pdf_path = os.path.join(self.folder, 'JT0{}.pdf'.format(seed))
+            write_pdf(pdf_path, text_pages(2, seed=seed))
+            self.pdf_paths.append(pdf_path)
+        self.cache = font_cache.font_cache
+        font_cache.font_cache = LRUCache(8)
+
+    def tearDown(self):
+        font_cache.font_cache = self.cache
+        shutil.rmtree(self.folder)
+
+    def extract(self, pdf_path, mode):
+        pdf_extractor = extractor.PDFTextExtractor(page_processes=0)
+        return json.loads(pdf_extractor.extract_text(pdf_path, mode=mode))
+
+    def test_shared_fonts(self):
+        for mode in (extractor.ExtractMode.LAYOUT, extractor.ExtractMode.TEXT):
+            font_cache.font_cache = LRUCache(0)
+            expected = [self.extract(pdf_path, mode) for pdf_path in self.pdf_paths]
+            font_cache.font_cache = LRUCache(8)
+            actual = [self.extract(pdf_path, mode) for pdf_path in self.pdf_paths]
+            self.assertEqual(expected, actual)
+            # the Helvetica font of the first document is reused by the second one
+            stats = font_cache.font_cache.stats()
+            self.assertEqual(1, stats['size'])
+            self.assertEqual(1, stats['misses'])
+            self.assertEqual(1, stats['hits'])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
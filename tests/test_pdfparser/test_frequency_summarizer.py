@@ -0,0 +1,41 @@
+import logging
+import unittest
+
+from sumy.nlp.stemmers import Stemmer
+from sumy.nlp.tokenizers import Tokenizer
+from sumy.parsers.plaintext import PlaintextParser
+
+from pdfparser.frequency_summarizer import FrequencySummarizer
+
+
+def parse(text):
+    return PlaintextParser.from_string(text, Tokenizer('english')).document
+
+
+class FrequencySummarizerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.summarizer = FrequencySummarizer(Stemmer('english'))
+        self.summarizer.stop_words = ['the', 'of', 'and', 'was']
+
+    def test_rate_sentences(self):
+        document = parse('Ministers discussed the budget.\n'
+                         'The budgets of the ministers.\n'
+                         'Lunch was served.\n'
+                         'The and of.')
+        # stems: minist 2, discuss 1, budget 2, lunch 1, serv 1
+        self.assertEqual([(2 + 1 + 2) / 2.0 / 3, (2 + 2) / 2.0 / 2, (1 + 1) / 2.0 / 2, 0.0],
+                         self.summarizer.rate_sentences(document))
+        self.assertEqual(document.sentences[1:2], self.summarizer(document, 1))
+        self.assertEqual(document.sentences[:2], self.summarizer(document, 2))
+
+    def test_no_words(self):
+        document = parse('The and of.\nOf the.')
+        self.assertEqual([0.0, 0.0], self.summarizer.rate_sentences(document))
+        self.assertEqual(document.sentences[:1], self.summarizer(document, 1))
+        self.assertEqual((), self.summarizer(parse(''), 1))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
@@ -0,0 +1,135 @@
+import logging
+import time
+import unittest
+
+from pdfparser.jobs import JobManager, JobStatus, QueueFull, PoolUnavailable, report_progress
+
+
+def square(value):
+    return value * value
+
+
+def fail(value):
+    raise ValueError(value)
+
+
+def slow(seconds):
+    report_progress('sleeping', 0.5)
+    time.sleep(seconds)
+    return seconds
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class JobManagerTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        self.manager.stop()
+
+    def test_submit(self):
+        self.manager = JobManager(square, 2, 10)
+        jobs = [self.manager.submit(value) for value in range(5)]
+        for value, job in enumerate(jobs):
+            self.assertTrue(self.manager.wait(job, timeout=10))
+            self.assertEqual(JobStatus.DONE, job.status)
+            self.assertEqual(value * value, job.result)
+            self.assertEqual(1.0, job.progress)
+        self.assertIs(jobs[0], self.manager.get(jobs[0].id))
+        self.assertIsNone(self.manager.get('unknown'))
+        self.assertEqual({JobStatus.QUEUED: 0, JobStatus.RUNNING: 0, JobStatus.DONE: 5, JobStatus.FAILED: 0,
+                          'coalesced': 0}, self.manager.stats())
+        self.assertEqual(0, self.manager.nb_pending)
+
+    def test_failure(self):
+        self.manager = JobManager(fail, 1, 10)
+        job = self.manager.submit('broken')
+        self.assertTrue(self.manager.wait(job, timeout=10))
+        self.assertEqual(JobStatus.FAILED, job.status)
+        self.assertEqual("ValueError('broken',)", job.error)
+        self.assertEqual(JobStatus.FAILED, job.as_dict()['status'])
+
+    def test_queue_full(self):
+        self.manager = JobManager(slow, 1, 2)
+        first, second = self.manager.submit(0.5), self.manager.submit(0.1)
+        self.assertRaises(QueueFull, self.manager.submit, 0.1)
+        self.assertTrue(wait_for(lambda: first.stage == 'sleeping'))
+        self.assertEqual(JobStatus.RUNNING, first.status)
+        self.assertEqual(0.5, first.progress)
+        self.assertTrue(self.manager.wait(first, timeout=10))
+        # room again for a job
+        third = self.manager.submit(0.0)
+        self.assertTrue(self.manager.wait(second, timeout=10) and self.manager.wait(third, timeout=10))
+        self.assertEqual([0.5, 0.1, 0.0], [first.result, second.result, third.result])
+
+    def test_coalesce(self):
+        self.manager = JobManager(slow, 1, 1, job_key=lambda seconds: round(seconds, 1))
+        job = self.manager.submit(0.3)
+        # same computation, no room needed in the queue
+        self.assertIs(job, self.manager.submit(0.3))
+        self.assertIs(job, self.manager.submit(0.31))
+        self.assertRaises(QueueFull, self.manager.submit, 0.1)
+        self.assertTrue(self.manager.wait(job, timeout=10))
+        self.assertEqual(0.3, job.result)
+        self.assertEqual(2, self.manager.stats()['coalesced'])
+        # finished: computed again
+        other = self.manager.submit(0.3)
+        self.assertIsNot(job, other)
+        self.assertTrue(self.manager.wait(other, timeout=10))
+        self.assertEqual({}, self.manager.in_flight)
+
+    def test_wait_any(self):
+        self.manager = JobManager(slow, 2, 10)
+        long_job, short_job = self.manager.submit(1.0), self.manager.submit(0.1)
+        self.assertEqual([short_job], self.manager.wait_any([long_job, short_job], timeout=10))
+        self.assertEqual([], self.manager.wait_any([long_job], timeout=0.1))
+        self.assertEqual([long_job], self.manager.wait_any([long_job], timeout=10))
+        self.assertEqual([long_job, short_job], self.manager.wait_any([long_job, short_job]))
+        self.assertEqual([], self.manager.wait_any([]))
+
+    def test_keep_finished(self):
+        self.manager = JobManager(square, 1, 10, keep_finished=2)
+        jobs = [self.manager.submit(value) for value in range(3)]
+        for job in jobs:
+            self.manager.wait(job, timeout=10)
+        self.assertIsNone(self.manager.get(jobs[0].id))
+        self.assertIs(jobs[2], self.manager.get(jobs[2].id))
+
+    def test_lost_job(self):
+        clock = FakeClock()
+        self.manager = JobManager(slow, 1, 10, job_timeout=60, clock=clock)
+        job = self.manager.submit(1.0)
+        self.assertTrue(wait_for(lambda: job.status == JobStatus.RUNNING))
+        clock.now = 30.0
+        self.assertEqual(JobStatus.RUNNING, self.manager.get(job.id).status)
+        clock.now = 61.0
+        self.assertEqual(JobStatus.FAILED, self.manager.get(job.id).status)
+        self.assertEqual(0, self.manager.nb_pending)
+        # the late result is ignored
+        time.sleep(1.5)
+        self.assertEqual(JobStatus.FAILED, job.status)
+        self.assertIsNone(job.result)
+
+    def test_stop(self):
+        self.manager = JobManager(square, 1, 10)
+        self.manager.start()
+        self.manager.stop()
+        self.assertRaises(PoolUnavailable, self.manager.submit, 1)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
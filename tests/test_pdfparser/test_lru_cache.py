@@ -0,0 +1,62 @@
+import logging
+import unittest
+
+from pdfparser.lru_cache import LRUCache
+
+
+class LRUCacheTestCase(unittest.TestCase):
+
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(1, cache.get('a'))
+        cache.put('c', 3)
+        # b is the least recently used entry
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(3, cache.get('c'))
+        self.assertEqual(2, len(cache))
+        stats = cache.stats()
+        self.assertEqual((3, 1, 1), (stats['hits'], stats['misses'], stats['evictions']))
+        self.assertEqual(0.75, stats['hit_ratio'])
+
+    def test_put_existing(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('a', 2)
+        self.assertEqual(1, len(cache))
+        self.assertEqual(2, cache.get('a'))
+        cache.remove('a')
+        self.assertEqual('none', cache.get('a', 'none'))
+
+    def test_disabled(self):
+        cache = LRUCache(0)
+        cache.put('a', 1)
+        self.assertEqual(0, len(cache))
+        self.assertIsNone(cache.get('a'))
+
+    def test_max_bytes(self):
+        cache = LRUCache(10, max_bytes=10)
+        cache.put('a', 'x' * 4)
+        cache.put('b', 'x' * 4)
+        self.assertEqual('x' * 4, cache.get('a'))
+        cache.put('c', 'x' * 4)
+        # b is the least recently used entry, evicted for the 12 bytes to fit in 10
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((2, 8), (len(cache), cache.stats()['bytes']))
+        cache.put('a', 'x')
+        self.assertEqual(5, cache.stats()['bytes'])
+        # larger than the whole cache: not cached, nothing evicted
+        cache.put('d', 'x' * 11)
+        self.assertIsNone(cache.get('d'))
+        self.assertEqual((2, 5, 1), (len(cache), cache.stats()['bytes'], cache.stats()['evictions']))
+        cache.remove('c')
+        self.assertEqual(1, cache.stats()['bytes'])
+        cache.clear()
+        self.assertEqual((0, 0), (len(cache), cache.stats()['bytes']))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
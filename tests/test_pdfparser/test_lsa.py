@@ -0,0 +1,131 @@
+import logging
+import random
+import unittest
+import warnings
+
+import numpy as np
+
+from sumy.nlp.stemmers import Stemmer
+from sumy.nlp.tokenizers import Tokenizer
+from sumy.parsers.plaintext import PlaintextParser
+from sumy.summarizers.lsa import LsaSummarizer
+
+from pdfparser.lsa import SparseLsaSummarizer, TermFrequencies, truncated_svd
+
+STOP_WORDS = frozenset(['the', 'of', 'and', 'a', 'to', 'in'])
+
+
+def random_text(generator, nb_lines):
+    """
+    Lines of sentences of random words, with a few headings
+
+    :param generator: random generator
+    :param nb_lines:
+    :return: text
+    """
+    vocabulary = [''.join(generator.choice('abcdefghijklmnopqrstu') for _ in range(generator.randint(3, 9)))
+                  for _ in range(400)] + sorted(STOP_WORDS)
+    lines = []
+    for _ in range(nb_lines):
+        if generator.random() < 0.05:
+            lines.append(generator.choice(vocabulary).upper())
+        else:
+            lines.append(' '.join(generator.choice(vocabulary) for _ in range(generator.randint(1, 15))) + '.')
+    return '\n'.join(lines)
+
+
+def topical_text(generator, nb_lines, nb_topics):
+    """
+    Lines of sentences drawing their words from one of a few topics
+
+    :param generator: random generator
+    :param nb_lines:
+    :param nb_topics:
+    :return: text
+    """
+    topics = [[''.join(generator.choice('abcdefghijklmnopqrstu') for _ in range(generator.randint(3, 9)))
+               for _ in range(30)] for _ in range(nb_topics)]
+    return '\n'.join(' '.join(generator.choice(topic) for _ in range(generator.randint(5, 15))) + '.'
+                     for topic in (generator.choice(topics) for _ in range(nb_lines)))
+
+
+def summarizers(reduction_ratio=1.0):
+    stemmer = Stemmer('english')
+    reference, sparse = LsaSummarizer(stemmer), SparseLsaSummarizer(stemmer, reduction_ratio)
+    reference.stop_words = sparse.stop_words = STOP_WORDS
+    return reference, sparse
+
+
+def reference_svd(summarizer, document):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        matrix = summarizer._create_matrix(document, summarizer._create_dictionary(document))
+    matrix = summarizer._compute_term_frequency(matrix)
+    return matrix, np.linalg.svd(matrix, full_matrices=False)
+
+
+class SparseLsaTestCase(unittest.TestCase):
+
+    def test_rank_sentences(self):
+        generator = random.Random(1)
+        reference, sparse = summarizers()
+        for _ in range(20):
+            document = PlaintextParser.from_string(random_text(generator, generator.randint(5, 80)),
+                                                   Tokenizer('english')).document
+            _, (_, sigma, v_matrix) = reference_svd(reference, document)
+            ranks = sparse.rank_sentences(document)
+            np.testing.assert_allclose(reference._compute_ranks(sigma, v_matrix), ranks, atol=1e-9)
+
+            summary = sparse(document, 5)
+            self.assertEqual(min(5, len(document.sentences)), len(summary))
+            # same summary as sumy, up to the order of the sentences of equal ranks
+            selected = [i for i, sentence in enumerate(document.sentences) if sentence in summary]
+            others = [i for i in range(len(ranks)) if i not in selected]
+            if others:
+                self.assertGreaterEqual(ranks[selected].min(), ranks[others].max() - 1e-9)
+
+    def test_summary(self):
+        text = ('Ministers discussed the budget of the organisation.\n'
+                'The budget of the organisation grows and the ministers agree to the budget.\n'
+                'Lunch was served.\n'
+                'Ministers of finance and ministers of trade met in Paris to discuss the trade budget.\n'
+                'It rained.')
+        document = PlaintextParser.from_string(text, Tokenizer('english')).document
+        reference, sparse = summarizers()
+        self.assertEqual(reference(document, 2), sparse(document, 2))
+        self.assertEqual((), sparse(PlaintextParser.from_string('The and of.', Tokenizer('english')).document, 2))
+
+    def test_term_frequencies(self):
+        generator = random.Random(2)
+        reference, sparse = summarizers()
+        document = PlaintextParser.from_string(random_text(generator, 60), Tokenizer('english')).document
+        dense, _ = reference_svd(reference, document)
+        matrix = sparse.term_frequencies(document)
+        self.assertEqual(dense.shape, matrix.shape)
+        block = np.random.RandomState(0).standard_normal((matrix.shape[1], 4))
+        # rows are permuted: compare the products invariant to the order of the words
+        np.testing.assert_allclose(np.sort(dense.dot(block), axis=0), np.sort(matrix.dot(block), axis=0))
+        np.testing.assert_allclose(dense.T.dot(np.ones((dense.shape[0], 2))), matrix.tdot(np.ones((matrix.shape[0], 2))))
+        np.testing.assert_allclose(np.linalg.norm(dense, axis=0), matrix.column_norms())
+
+        # sentence without any word of the dictionary
+        empty = TermFrequencies(np.array([0, 1]), np.array([0, 0]), np.array([2.0, 1.0]), (3, 2))
+        np.testing.assert_allclose([np.sqrt(1.0 ** 2 + 0.7 ** 2 + 0.4 ** 2), 0.0], empty.column_norms())
+
+    def test_truncated_svd(self):
+        generator = random.Random(3)
+        reference, sparse = summarizers(reduction_ratio=0.05)
+        document = PlaintextParser.from_string(topical_text(generator, 300, 8), Tokenizer('english')).document
+        _, (_, sigma, v_matrix) = reference_svd(reference, document)
+        dimensions = int(min(v_matrix.shape) * 0.05)
+        truncated_sigma, _ = truncated_svd(sparse.term_frequencies(document), dimensions)
+        self.assertEqual(dimensions, len(truncated_sigma))
+        # the constant term and the topics, above the noise of the random words
+        np.testing.assert_allclose(sigma[:8], truncated_sigma[:8], rtol=1e-2)
+        expected = np.sqrt(((sigma[:dimensions, None] * v_matrix[:dimensions]) ** 2).sum(axis=0))
+        np.testing.assert_allclose(expected, sparse.rank_sentences(document), rtol=1e-2)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
@@ -0,0 +1,158 @@
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+import pdfparser.manifest as manifest
+from pdfparser.manifest import JobManifest, DocumentStatus, file_stats
+
+
+class JobManifestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.manifest = JobManifest(os.path.join(self.folder, 'manifest.sqlite'))
+
+    def tearDown(self):
+        self.manifest.close()
+        shutil.rmtree(self.folder)
+
+    def test_register(self):
+        info = ('JT01', '2014_11_03', '/pdfs/2014/11/03/JT01.pdf')
+        self.manifest.register(info, 'olis', size=1024, mtime=12.5)
+        self.manifest.commit()
+        self.assertTrue(self.manifest.contains('/pdfs/2014/11/03/JT01.pdf'))
+        self.assertFalse(self.manifest.contains('/pdfs/2014/11/03/JT02.pdf'))
+
+        document = self.manifest.get('/pdfs/2014/11/03/JT01.pdf')
+        self.assertEqual('JT01', document['jt'])
+        self.assertEqual(DocumentStatus.PENDING, document['status'])
+        self.assertEqual(1024, document['size'])
+        self.assertEqual(0, document['attempts'])
+
+        # registering again leaves the document untouched
+        self.manifest.register(info, 'olis', status=DocumentStatus.DONE)
+        self.assertEqual(DocumentStatus.PENDING, self.manifest.get('/pdfs/2014/11/03/JT01.pdf')['status'])
+
+    def test_record(self):
+        info = ('JT01', '2014_11_03', '/pdfs/2014/11/03/JT01.pdf')
+        self.manifest.register(info, 'olis')
+        self.manifest.record('/pdfs/2014/11/03/JT01.pdf', DocumentStatus.FAILED, output_file='/out/JT01.pdf',
+                             started=10.0, finished=12.5, error='IOError')
+
+        document = self.manifest.get('/pdfs/2014/11/03/JT01.pdf')
+        self.assertEqual(DocumentStatus.FAILED, document['status'])
+        self.assertEqual('/out/JT01.pdf', document['output_file'])
+        self.assertEqual(2.5, document['duration'])
+        self.assertEqual(1, document['attempts'])
+        self.assertEqual('IOError', document['error'])
+
+        self.manifest.record('/pdfs/2014/11/03/JT01.pdf', DocumentStatus.DONE, started=20.0, finished=21.0)
+        document = self.manifest.get('/pdfs/2014/11/03/JT01.pdf')
+        self.assertEqual(DocumentStatus.DONE, document['status'])
+        self.assertEqual('/out/JT01.pdf', document['output_file'])
+        self.assertEqual(2, document['attempts'])
+        self.assertIsNone(document['error'])
+
+    def test_iter_documents(self):
+        for i in range(1200):
+            self.manifest.register(('JT{:04d}'.format(i), 'folder', '/pdfs/{}/JT{:04d}.pdf'.format(i % 2, i)), 'olis')
+        self.manifest.register(('JT9999', 'folder', '/pdfs/0/JT9999.pdf'), 'olis', status=DocumentStatus.DONE)
+        self.manifest.commit()
+
+        documents = list(self.manifest.iter_documents([DocumentStatus.PENDING]))
+        self.assertEqual(1200, len(documents))
+        self.assertEqual(('JT0000', 'folder', '/pdfs/0/JT0000.pdf'), documents[0])
+
+        documents = list(self.manifest.iter_documents([DocumentStatus.PENDING], path_prefix='/pdfs/1/'))
+        self.assertEqual(600, len(documents))
+        self.assertEqual(600, self.manifest.count([DocumentStatus.PENDING], path_prefix='/pdfs/1/'))
+        self.assertEqual(601, self.manifest.count([DocumentStatus.PENDING, DocumentStatus.DONE],
+                                                  path_prefix='/pdfs/0/'))
+
+    def test_iter_documents_largest_first(self):
+        self.manifest.register(('JT01', 'folder', '/pdfs/JT01.pdf'), 'olis', size=100)
+        self.manifest.register(('JT02', 'folder', '/pdfs/JT02.pdf'), 'olis', size=3000)
+        self.manifest.register(('JT03', 'folder', '/pdfs/JT03.pdf'), 'olis', size=None)
+        self.manifest.register(('JT04', 'folder', '/pdfs/JT04.pdf'), 'olis', size=200)
+        self.manifest.commit()
+
+        documents = list(self.manifest.iter_documents([DocumentStatus.PENDING], largest_first=True,
+                                                      with_size=True))
+        self.assertEqual([('JT02', 3000), ('JT04', 200), ('JT01', 100), ('JT03', None)],
+                         [(info[0], size) for info, size in documents])
+        self.assertEqual(3300, self.manifest.total_size([DocumentStatus.PENDING]))
+        self.assertEqual(0, self.manifest.total_size([DocumentStatus.FAILED]))
+
+    def test_iter_documents_largest_first_pages(self):
+        sizes = [500, 100, None, 500, 300, 100, 500, None, 0]
+        for i, size in enumerate(sizes):
+            self.manifest.register(('JT{:02d}'.format(i), 'folder', '/pdfs/JT{:02d}.pdf'.format(i)), 'olis',
+                                   size=size)
+        self.manifest.commit()
+        page_size, manifest.PAGE_SIZE = manifest.PAGE_SIZE, 2
+        try:
+            documents = []
+            for info, size in self.manifest.iter_documents([DocumentStatus.PENDING], largest_first=True,
+                                                           with_size=True):
+                documents.append((info[0], size))
+                # recorded between pages, from the connection of the manifest
+                self.manifest.record(info[2], DocumentStatus.DONE)
+        finally:
+            manifest.PAGE_SIZE = page_size
+        self.assertEqual([('JT00', 500), ('JT03', 500), ('JT06', 500), ('JT04', 300), ('JT01', 100), ('JT05', 100),
+                          ('JT08', 0), ('JT02', None), ('JT07', None)], documents)
+        self.assertEqual(9, self.manifest.count([DocumentStatus.DONE]))
+
+    def test_iter_documents_by_year(self):
+        self.manifest.register(('JT01', 'Y:_2014_11', 'Y:\\2014\\11\\JT01.pdf'), 'report', year=2014)
+        self.manifest.register(('JT02', 'Y:_2015_01', 'Y:\\2015\\01\\JT02.pdf'), 'report', year=2015)
+        self.manifest.register(('JT03', '2015_01', '/pdfs/2015/01/JT03.pdf'), 'olis')
+        self.manifest.commit()
+
+        documents = list(self.manifest.iter_documents([DocumentStatus.PENDING], source='report', year=2015))
+        self.assertEqual([('JT02', 'Y:_2015_01', 'Y:\\2015\\01\\JT02.pdf')], documents)
+        self.assertEqual(2, self.manifest.count([DocumentStatus.PENDING], source='report'))
+
+    def test_scanned(self):
+        self.assertFalse(self.manifest.is_scanned('olis:/pdfs'))
+        self.manifest.mark_scanned('olis:/pdfs')
+        self.assertTrue(self.manifest.is_scanned('olis:/pdfs'))
+
+        # persisted across connections
+        self.manifest.close()
+        self.manifest = JobManifest(os.path.join(self.folder, 'manifest.sqlite'))
+        self.assertTrue(self.manifest.is_scanned('olis:/pdfs'))
+
+    def test_non_ascii_path(self):
+        info = ('JT01', 'folder', '/pdfs/r\xc3\xa9sum\xc3\xa9/JT01.pdf')
+        self.manifest.register(info, 'olis')
+        self.manifest.commit()
+        self.assertEqual([info], list(self.manifest.iter_documents([DocumentStatus.PENDING],
+                                                                   path_prefix='/pdfs/r\xc3\xa9sum\xc3\xa9')))
+
+    def test_path_prefix_sibling_folders(self):
+        for month in ['1', '10', '11']:
+            self.manifest.register(('JT' + month, '2014_' + month, '/pdfs/2014/{}/JT{}.pdf'.format(month, month)),
+                                   'olis')
+        self.manifest.commit()
+        for path_prefix in ['/pdfs/2014/1', '/pdfs/2014/1/']:
+            self.assertEqual([('JT1', '2014_1', '/pdfs/2014/1/JT1.pdf')],
+                             list(self.manifest.iter_documents([DocumentStatus.PENDING], path_prefix=path_prefix)))
+            self.assertEqual(1, self.manifest.count([DocumentStatus.PENDING], path_prefix=path_prefix))
+        self.assertEqual(3, self.manifest.count([DocumentStatus.PENDING], path_prefix='/pdfs/2014'))
+
+    def test_file_stats(self):
+        file_path = os.path.join(self.folder, 'JT01.pdf')
+        with open(file_path, mode='wb') as pdf_file:
+            pdf_file.write('%PDF-1.4')
+        size, mtime = file_stats(file_path)
+        self.assertEqual(8, size)
+        self.assertIsNotNone(mtime)
+        self.assertEqual((None, None), file_stats(os.path.join(self.folder, 'missing.pdf')))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
@@ -0,0 +1,117 @@
+import logging
+import random
+import unittest
+
+import numpy as np
+
+import pdfparser.page_geometry as page_geometry
+import pdfparser.table_edges_extractor as table_extractor
+import pdfparser.text_table_extractor as text_table_extractor
+from pdfparser.page_geometry import PageText
+from pdfparser.pdf_page_filter import PDFPageFilter
+
+
+def random_page(generator, nb_boxes):
+    page_txt = PageText()
+    for i in range(nb_boxes):
+        # half units and repeated positions exercise the rounding and the ties on the text
+        x0 = generator.choice([generator.uniform(50, 500), generator.randint(100, 110) + 0.5])
+        y0 = generator.choice([generator.uniform(40, 800), float(generator.randint(400, 405))])
+        page_txt[(x0, y0, x0 + generator.uniform(1, 300), y0 + generator.uniform(5, 12))] = \
+            generator.choice([u'text {}'.format(i), u'same', u'R\xe9sum\xe9'])
+    return page_txt
+
+
+class PageGeometryTestCase(unittest.TestCase):
+
+    def test_round_half_away(self):
+        values = [-2.5, -1.5, -0.5, -0.49999999999999994, 0.0, 0.5, 1.5, 2.5, 2.4999, 13.7, -13.2]
+        self.assertEqual([round(value, 0) for value in values],
+                         list(page_geometry.round_half_away(np.array(values))))
+
+    def test_box(self):
+        box = page_geometry.Box(10.0, 20.0, 30.5, 40.5)
+        self.assertEqual((20.5, 20.5), (box.width, box.height))
+        self.assertEqual((10.0, 20.0, 30.5, 40.5), box.coord)
+        box.x1 = 40.0
+        self.assertEqual(30.0, box.width)
+        # cells only store their coordinates, rows and columns
+        for cell in [box, table_extractor.Cell(1.0, 2.0, 3.5, 4.5), text_table_extractor.Cell(1.0, 2.0, 3.5, 4.5)]:
+            self.assertFalse(hasattr(cell, '__dict__'))
+            self.assertRaises(AttributeError, setattr, cell, 'logger', None)
+
+    def test_reading_order(self):
+        generator = random.Random(0)
+        for nb_boxes in (0, 1, 10, 2000):
+            page_txt = random_page(generator, nb_boxes)
+            expected = [text for _, _, text in sorted((round(-coord[1], 0), round(coord[0], 0), text)
+                                                      for coord, text in page_txt.items())]
+            self.assertEqual(expected, page_geometry.reading_order(page_txt))
+            self.assertEqual(expected, page_geometry.reading_order(dict(page_txt)))
+            split = 402.0
+            _, coords, _ = page_geometry.columns(page_txt)
+            expected = [text for _, _, text in sorted((round(-coord[1], 0), round(coord[0], 0), text)
+                                                      for coord, text in page_txt.items() if coord[1] > split)]
+            self.assertEqual(expected, page_geometry.reading_order(page_txt, coords[:, 1] > split))
+
+    def test_remove(self):
+        page_txt = random_page(random.Random(1), 500)
+        keys, coords, texts = page_txt.columns()
+        mask = coords[:, 1] < 400
+        page_geometry.remove_boxes(page_txt, mask)
+        self.assertEqual(500 - mask.sum(), len(page_txt))
+        # the view matches the remaining boxes, in the iteration order of the dict
+        keys, coords, texts = page_txt.columns()
+        self.assertEqual(page_txt.keys(), keys)
+        self.assertEqual(page_txt.values(), texts)
+        self.assertTrue((np.array(keys) == coords).all())
+        # other changes drop the view
+        page_txt[(1.0, 2.0, 3.0, 4.0)] = u'new'
+        self.assertEqual(page_txt.keys(), page_txt.columns()[0])
+
+    def test_filter_tables(self):
+        generator = random.Random(2)
+        page_txt = random_page(generator, 2000)
+        tables = [table_extractor.Cell(60.0, 100.0, 400.0, 500.0, rows=4, columns=4),
+                  table_extractor.Cell(300.0, 450.0, 560.0, 800.0, rows=4, columns=4)]
+        page_filter = PDFPageFilter(logger=logging.getLogger('test_page_geometry'))
+        expected = dict((coord, text) for coord, text in page_txt.items()
+                        if not page_filter.text_is_within_table(coord, tables))
+        _, coords, _ = page_txt.columns()
+        within_tables = tables[0].contains_fractions(coords) | tables[1].contains_fractions(coords)
+        page_geometry.remove_boxes(page_txt, within_tables)
+        self.assertTrue(0 < len(expected) < 2000)
+        self.assertEqual(expected, dict(page_txt))
+
+    def test_filter_notes(self):
+        page_txt = random_page(random.Random(3), 200)
+        separator = table_extractor.Cell(72.0, 120.0, 200.0, 121.0)
+        page_filter = PDFPageFilter(logger=logging.getLogger('test_page_geometry'))
+        expected = dict((coord, text) for coord, text in page_txt.items()
+                        if not page_filter.text_below_notes_separator(coord, separator))
+        # the separator is found among the cells of the page: leftmost and narrower than the text
+        page_filter.filter_notes(page_txt, [separator], 72.0, 600.0)
+        self.assertTrue(0 < len(expected) < 200)
+        self.assertEqual(expected, dict(page_txt))
+
+    def test_filter_text_tables(self):
+        generator = random.Random(4)
+        page_txt = random_page(generator, 300)
+        # grid of short numbers, as on statistical pages
+        for row in range(20):
+            for column in range(8):
+                x0, y0 = 60.0 + column * 60, 100.0 + row * 12
+                page_txt[(x0, y0, x0 + 20, y0 + 8)] = u'{}.{}'.format(row, column)
+        expected = dict(page_txt)
+        text_cells = [text_table_extractor.Cell(*coord) for coord in expected.keys()]
+        text_cells.sort(key=text_table_extractor.compare_cells, reverse=True)
+        for cell in text_table_extractor.find_table_cells_sequential(text_cells):
+            expected.pop((cell.x0, cell.y0, cell.x1, cell.y1))
+        PDFPageFilter(logger=logging.getLogger('test_page_geometry')).filter_text_tables(page_txt)
+        self.assertTrue(len(expected) < 460)
+        self.assertEqual(expected, dict(page_txt))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
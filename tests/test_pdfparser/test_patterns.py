@@ -0,0 +1,44 @@
+# -*- coding: utf8 -*-
+import logging
+import re
+import unittest
+
+from pdfparser import patterns
+
+TITLE_PATTERNS = [(patterns.TOC_TITLE, re.search), (patterns.TOC_EXACT, re.search),
+                  (patterns.GLOSSARY_TITLE, re.search), (patterns.PARTICIPANTS_EXACT_2, re.match),
+                  (patterns.PARTICIPANTS_FIND_2, re.search), (patterns.ANNEX_TITLE, re.search),
+                  (patterns.SUMMARY_TITLE, re.search), (patterns.BIBLIOGRAPHY_TITLE, re.search),
+                  (patterns.PARTICIPANTS_EXACT_1, re.match), (patterns.PARTICIPANTS_FIND_1, re.search)]
+
+
+class PatternsTestCase(unittest.TestCase):
+
+    def test_section_title(self):
+        fragments = ['Lorem ipsum dolor sit amet, consectetur adipiscing elit.', 'TABLE OF CONTENTS',
+                     'Table des mati\xc3\xa8res', 'SUMMARY', 'Executive summary', 'R\xc3\xa9sum\xc3\xa9',
+                     'ABSTRACT/RESUME', 'GLOSSARY OF TERMS', 'Abbreviations', 'Bibliography', 'References',
+                     'PRESENTS', 'The members PRESENT', 'list of participants', 'The list of participants',
+                     'List of Participants / Liste des Participants', 'ANNEX 1', 'Annex 2', 'APPENDIX B',
+                     'TECHNICAL ANNEX', 'Chapter blablabla    ................ 23', '', u'R\xe9sum\xe9',
+                     'See the summary of the annex 1.', 'Document ABSTRACT/R\xc3\xa9sum\xc3\xa9 ',
+                     'The LIST OF PARTICIPANTS', 'see Liste des Participants / List of Presence']
+        for txt in fragments:
+            expected = any(apply(pattern, txt) for pattern, apply in TITLE_PATTERNS)
+            self.assertEqual(expected, patterns.section_title(txt) is not None, msg=repr(txt))
+        self.assertEqual('toc_title', patterns.section_title('TABLE OF CONTENTS'))
+        self.assertEqual('participants_exact_1', patterns.section_title('list of participants'))
+        # match() of the pattern: the title must start the text
+        self.assertIsNone(patterns.section_title('The list of participants'))
+
+    def test_combine(self):
+        combined = patterns.combine(('a', re.compile('x|y')), ('b', re.compile('^z')))
+        self.assertEqual('a', combined.search('-y').lastgroup)
+        self.assertEqual('b', combined.match('z').lastgroup)
+        self.assertIsNone(combined.search('-z'))
+        self.assertRaises(ValueError, patterns.combine, ('a', re.compile('x')), ('b', re.compile('z', re.I)))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
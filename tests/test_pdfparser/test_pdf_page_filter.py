@@ -1,5 +1,6 @@
 # -*- coding: utf8 -*-
 import logging
+import random
 import unittest
 
 import pdfparser.pdf_page_filter as filter
@@ -1024,9 +1025,17 @@ class PdfPageFilterTestCase(unittest.TestCase):
         actual = filter.PDFPageFilter().match_annex_title(txt)
         self.assertEqual(expected, actual)
 
-    @unittest.skip('Not yet implemented')
     def test_filter_text_tables(self):
-        self.assertTrue(False, 'Not yet implemented')
+        paragraphs = {(72.0, 700.0, 520.0, 710.0): u'Table 1. Growth rates',
+                      (72.0, 640.0, 520.0, 650.0): u'Growth picked up in most countries.',
+                      (72.0, 626.0, 520.0, 636.0): u'Unemployment fell.'}
+        page_txt = dict(paragraphs)
+        for row in range(3):
+            for column in range(3):
+                page_txt[(72.0 + column * 100, 690.0 - row * 12, 100.0 + column * 100, 698.0 - row * 12)] = \
+                    u'{}.{}'.format(row, column)
+        filter.PDFPageFilter().filter_text_tables(page_txt)
+        self.assertEqual(paragraphs, page_txt)
 
     @unittest.skip('Not yet implemented')
     def test_filter_tables(self):
@@ -1065,6 +1074,72 @@ class PdfPageFilterTestCase(unittest.TestCase):
         actual = filter.PDFPageFilter().text_is_within_table(coord, outer_edges)
         self.assertEquals(expected, actual)
 
+
+class ClassifyPageTestCase(unittest.TestCase):
+
+    FRAGMENTS = ['Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n ',
+                 '\n Consulares nobilitarunt et praefecturae.',
+                 'CTPA/CFA/WP10(2011)39/CONF', 'For Official Use',
+                 u'Organisation for Economic Co-operation and Development',
+                 'ORGANISATION FOR ECONOMIC', 'ET DE DEVELOPPEMENT ECONOMIQUES',
+                 'TABLE OF CONTENTS', 'Chapter blablabla    ................ 23',
+                 'SUMMARY', 'EXECUTIVE SUMMARY',
+                 'GLOSSARY', 'ATM \xe2\x80\x93 Agriculture Trade and Markets division of TAD\n'
+                             'COAG \xe2\x80\x93 Committee for Agriculture of the OECD',
+                 'Bibliography', 'OECD (2010c), The OECD Innovation Strategy, Paris: OECD.',
+                 '\n\t  PRESENT  \n', 'Ms. Agustina VIERHELLER \nAssistante \n',
+                 'Dr. Tom GEERINCKX \nPolicy Advisor \n', 'nicolas.vahleas@oecd.org \n',
+                 'ANNEX 1', 'APPENDIX B']
+    PREVIOUS_TYPES = [FragmentType.UNKNOWN, FragmentType.TEXT, FragmentType.TABLE_OF_CONTENTS,
+                      FragmentType.GLOSSARY, FragmentType.BIBLIOGRAPHY, FragmentType.PARTICIPANTS_LIST]
+
+    @staticmethod
+    def cascade(page_filter, page_txt, previous_fragment_type, page_nb, in_annex):
+        """Section detection as done before classify_page, one detector after the other"""
+        if page_nb == 0 and page_filter.is_cover(page_txt):
+            return FragmentType.COVER_PAGE, None
+        if page_filter.is_toc(page_txt, previous_fragment_type):
+            return FragmentType.TABLE_OF_CONTENTS, None
+        if not in_annex and page_filter.is_summary(page_txt):
+            return FragmentType.SUMMARY, None
+        if page_filter.is_glossary(page_txt, previous_fragment_type):
+            return FragmentType.GLOSSARY, None
+        found, coord = page_filter.is_bibliography(page_txt, previous_fragment_type)
+        if found:
+            return FragmentType.BIBLIOGRAPHY, coord
+        found, coord = page_filter.is_participants_list(page_txt, previous_fragment_type)
+        if found:
+            return FragmentType.PARTICIPANTS_LIST, coord
+        if page_filter.is_annex(page_txt):
+            return FragmentType.ANNEX, None
+        return None, None
+
+    def test_same_as_cascade(self):
+        generator = random.Random(0)
+        logger = logging.getLogger('classify_page')
+        logger.setLevel(logging.INFO)
+        for _ in range(400):
+            page_txt = dict((coord, generator.choice(self.FRAGMENTS)) for coord in range(generator.randint(0, 8)))
+            previous_fragment_type = generator.choice(self.PREVIOUS_TYPES)
+            page_nb, in_annex = generator.randint(0, 1), generator.random() < 0.2
+            expected_filter = filter.PDFPageFilter(logger=logger)
+            expected = self.cascade(expected_filter, page_txt, previous_fragment_type, page_nb, in_annex)
+            actual_filter = filter.PDFPageFilter(logger=logger)
+            actual = actual_filter.classify_page(page_txt, previous_fragment_type, cover_allowed=page_nb == 0,
+                                                 summary_allowed=not in_annex)
+            self.assertEqual(expected, actual, msg='{} {} {}'.format(page_txt, previous_fragment_type, page_nb))
+            self.assertEqual(vars(expected_filter.report), vars(actual_filter.report))
+
+    def test_priority(self):
+        page_txt = {0: 'ANNEX 1', 1: 'Bibliography', 2: 'SUMMARY'}
+        page_filter = filter.PDFPageFilter()
+        self.assertEqual((FragmentType.SUMMARY, None), page_filter.classify_page(page_txt, FragmentType.TEXT))
+        self.assertEqual((1, 0), (page_filter.report.summary, page_filter.report.annex))
+        self.assertEqual((FragmentType.BIBLIOGRAPHY, 1),
+                         page_filter.classify_page(page_txt, FragmentType.TEXT, summary_allowed=False))
+        self.assertEqual((None, None), page_filter.classify_page({0: 'Some text'}, FragmentType.TEXT))
+
+
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
     unittest.main()
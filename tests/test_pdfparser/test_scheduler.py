@@ -0,0 +1,41 @@
+import logging
+import unittest
+
+from pdfparser.scheduler import chunk_by_cost, document_cost
+
+
+class SchedulerTestCase(unittest.TestCase):
+
+    def test_document_cost(self):
+        self.assertEqual(1024, document_cost(1024))
+        self.assertEqual(1, document_cost(None))
+        self.assertEqual(1, document_cost(0))
+
+    def test_chunk_by_cost(self):
+        sizes = [600, 400] + [10] * 100
+        documents = [('JT{}'.format(i), size) for i, size in enumerate(sizes)]
+        chunks = list(chunk_by_cost(documents, sum(sizes), nb_workers=2, max_chunk_size=50))
+
+        # every document dispatched exactly once, in the original order
+        self.assertEqual([info for info, _ in documents], [info for chunk in chunks for info in chunk])
+        # largest documents are dispatched alone, first
+        self.assertEqual(['JT0'], chunks[0])
+        self.assertEqual(['JT1'], chunks[1])
+        # chunks get shorter as the queue drains
+        lengths = [len(chunk) for chunk in chunks[2:]]
+        self.assertEqual(sorted(lengths, reverse=True), lengths)
+        self.assertTrue(lengths[0] > lengths[-1])
+
+    def test_chunk_by_cost_max_chunk_size(self):
+        documents = [('JT{}'.format(i), 10) for i in range(100)]
+        chunks = list(chunk_by_cost(documents, 1000, nb_workers=1, max_chunk_size=5))
+        self.assertEqual(100, sum(len(chunk) for chunk in chunks))
+        self.assertTrue(all(len(chunk) <= 5 for chunk in chunks))
+
+    def test_chunk_by_cost_empty(self):
+        self.assertEqual([], list(chunk_by_cost([], 0, nb_workers=2, max_chunk_size=10)))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
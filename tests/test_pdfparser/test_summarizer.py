@@ -1,10 +1,24 @@
 # -*- coding: utf8 -*-
 import logging
+import os
+import shutil
+import tempfile
 import unittest
 
+from nltk import PunktSentenceTokenizer
+
+import pdfparser.summarizer as summarizer
+from pdfparser.frequency_summarizer import FrequencySummarizer
 from pdfparser.summarizer import remove_repetition, PDFSummarizer
 
 
+class FirstSentencesSummarizer:
+    stop_words = frozenset()
+
+    def __call__(self, document, sentences_count):
+        return document.sentences[:1]
+
+
 class SummarizerTestCase(unittest.TestCase):
 
     def test_generate_summary(self):
@@ -34,6 +48,63 @@ class SummarizerTestCase(unittest.TestCase):
         text = remove_repetition(text)
 
         self.assertEqual(4, len(text))
+    def test_get_resources(self):
+        folder = tempfile.mkdtemp()
+        stop_words_folder, resources = summarizer.STOP_WORDS_FOLDER, dict(summarizer._resources)
+        try:
+            with open(os.path.join(folder, 'english.txt'), 'w') as stop_words:
+                stop_words.write('the\nof\n\nand \n')
+            summarizer.STOP_WORDS_FOLDER = folder
+            summarizer._resources.clear()
+
+            english = summarizer.get_resources('english')
+            self.assertIs(english, summarizer.get_resources('english'))
+            self.assertEqual(frozenset(['the', 'of', 'and']), english.stop_words)
+            self.assertEqual(english.stop_words, english.summarizer.stop_words)
+            pdf_summarizer = PDFSummarizer()
+            self.assertIs(english.summarizer, pdf_summarizer.summarizer)
+            self.assertIs(english.sentence_tokenizer, pdf_summarizer.sentence_tokenizer)
+            self.assertEqual([u'The delegates agreed.', u'The meeting ended.'],
+                             summarizer.extract_sentences(u'The delegates agreed. The meeting ended.'))
+        finally:
+            summarizer.STOP_WORDS_FOLDER = stop_words_folder
+            summarizer._resources.clear()
+            summarizer._resources.update(resources)
+            shutil.rmtree(folder)
+
+    def test_backends(self):
+        sentences = [u'Ministers discussed the budget of the organisation.',
+                     u'The budget of the organisation grows and the ministers agree to the budget.',
+                     u'Lunch was served.'] * 4
+        stop_words_folder, resources = summarizer.STOP_WORDS_FOLDER, dict(summarizer._resources)
+        try:
+            summarizer.STOP_WORDS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                                                        'data', 'stopwords')
+            summarizer._resources.clear()
+
+            pdf_summarizer = PDFSummarizer()
+            self.assertEqual(pdf_summarizer.generate_summary(sentences, backend='lsa-sumy'),
+                             pdf_summarizer.generate_summary(sentences, backend='lsa'))
+            for backend in summarizer.BACKENDS:
+                summary = pdf_summarizer.generate_summary(sentences, backend=backend)
+                self.assertIn('the budget', summary)
+            self.assertIsInstance(PDFSummarizer(backend='fast').summarizer, FrequencySummarizer)
+            self.assertRaises(ValueError, pdf_summarizer.generate_summary, sentences, backend='dense')
+
+            summarizer.register_backend('first', lambda stemmer: FirstSentencesSummarizer())
+            self.assertEqual('Ministers discussed the budget of the organisation.',
+                             PDFSummarizer(backend='first').generate_summary(sentences).split('\n')[0])
+        finally:
+            summarizer.BACKENDS.pop('first', None)
+            summarizer.STOP_WORDS_FOLDER = stop_words_folder
+            summarizer._resources.clear()
+            summarizer._resources.update(resources)
+
+    def test_load_sentence_tokenizer(self):
+        self.assertIsInstance(summarizer.load_sentence_tokenizer('english'), PunktSentenceTokenizer)
+        # no model for the language
+        self.assertIsInstance(summarizer.load_sentence_tokenizer('klingon'), PunktSentenceTokenizer)
+
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
@@ -1,8 +1,30 @@
 import logging
+import random
 import unittest
 import pdfparser.table_edges_extractor as extractor
 
 
+def grid(rows, columns, x=50.0, y=100.0, width=40.0, height=12.0, lines=False):
+    cells = []
+    if lines:
+        for i in range(rows + 1):
+            cells.append(extractor.Cell(x, y + i * height, x + columns * width, y + i * height + 0.5))
+        for j in range(columns + 1):
+            cells.append(extractor.Cell(x + j * width, y, x + j * width + 0.5, y + rows * height))
+    else:
+        for i in range(rows):
+            for j in range(columns):
+                cells.append(extractor.Cell(x + j * width, y + i * height, x + (j + 1) * width,
+                                            y + (i + 1) * height))
+    return cells
+
+
+def outline(tables, counts=False):
+    if counts:
+        return sorted((table.x0, table.y0, table.x1, table.y1, table.rows, table.columns) for table in tables)
+    return sorted((table.x0, table.y0, table.x1, table.y1) for table in tables)
+
+
 class EdgesExtractorTestCase(unittest.TestCase):
 
     def test_cell_is_fraction(self):
@@ -94,6 +116,80 @@ class EdgesExtractorTestCase(unittest.TestCase):
         self.assertEqual(3, collapsed.rows)
         self.assertEqual(3, collapsed.columns)
 
+    def test_find_outer_edges_grid(self):
+        # rows and columns as counted by the former pairwise collapse, cells drawn from the bottom row
+        for rows, columns, lines, counts in [(1, 1, False, (1, 1)), (1, 1, True, (7, 4)), (1, 2, False, (4, 5)),
+                                             (2, 2, True, (10, 7)), (3, 3, False, (27, 27)),
+                                             (5, 4, True, (16, 16)), (10, 6, False, (187, 183))]:
+            tables = extractor.find_outer_edges(grid(rows, columns, lines=lines))
+            self.assertEqual(1, len(tables))
+            table = tables[0]
+            size = 0.5 if lines else 0.0
+            self.assertEqual((50.0, 100.0, 50.0 + columns * 40.0 + size, 100.0 + rows * 12.0 + size),
+                             (table.x0, table.y0, table.x1, table.y1))
+            self.assertEqual(counts, (table.rows, table.columns))
+
+    def test_find_outer_edges_overlapping(self):
+        # boxes, rows and columns as counted by the former pairwise collapse, cells in drawing order
+        cells = [extractor.Cell(475.5, 369.8, 489.8, 392.9), extractor.Cell(13.5, 369.7, 91.8, 404.6)]
+        self.assertEqual([(13.5, 369.7, 489.8, 404.6, 9, 9)], outline(extractor.find_outer_edges(cells), counts=True))
+        # frame around a grid
+        cells = [extractor.Cell(48.0, 98.0, 172.0, 138.0)] + grid(3, 3)
+        self.assertEqual([(48.0, 98.0, 172.0, 138.0, 28, 28)], outline(extractor.find_outer_edges(cells), counts=True))
+        # header holding a cell above a grid drawn from its top row
+        cells = [extractor.Cell(50.0, 136.0, 170.0, 150.0), extractor.Cell(60.0, 138.0, 100.0, 148.0)]
+        cells += grid(3, 3)[::-1]
+        self.assertEqual([(50.0, 100.0, 170.0, 150.0, 34, 31)], outline(extractor.find_outer_edges(cells), counts=True))
+        # cells slightly shifted from each other, line at the height of the bottom row
+        cells = [extractor.Cell(50.0, 100.0, 90.0, 112.0), extractor.Cell(90.4, 100.3, 130.0, 112.6),
+                 extractor.Cell(50.2, 112.5, 89.6, 124.0), extractor.Cell(89.8, 112.0, 130.0, 124.4),
+                 extractor.Cell(200.0, 105.0, 260.0, 106.0)]
+        self.assertEqual([(50.0, 100.0, 260.0, 124.4, 10, 11)], outline(extractor.find_outer_edges(cells), counts=True))
+
+    def test_find_outer_edges_tables(self):
+        cells = grid(3, 4) + grid(2, 2, y=200.0, lines=True) + grid(1, 1, x=300.0, y=400.0)
+        self.assertEqual([(50.0, 100.0, 210.0, 136.0), (50.0, 200.0, 130.5, 224.5), (300.0, 400.0, 340.0, 412.0)],
+                         outline(extractor.find_outer_edges(cells)))
+        # cells at the same height are collapsed whatever their horizontal distance
+        cells = grid(3, 4) + grid(1, 1, x=300.0, y=110.0)
+        self.assertEqual([(50.0, 100.0, 340.0, 136.0)], outline(extractor.find_outer_edges(cells)))
+
+    def test_find_outer_edges_adjacent(self):
+        # less than ADJ_DISTANCE apart, aligned on the left
+        below = extractor.Cell(50.0, 100.0, 200.0, 110.0)
+        above = extractor.Cell(50.0, 110.5, 150.0, 120.0)
+        self.assertEqual([(50.0, 100.0, 200.0, 120.0)], outline(extractor.find_outer_edges([above, below])))
+        # not aligned
+        above = extractor.Cell(60.0, 110.5, 150.0, 120.0)
+        self.assertEqual(2, len(extractor.find_outer_edges([above, below])))
+        # further than ADJ_DISTANCE
+        above = extractor.Cell(50.0, 111.5, 150.0, 120.0)
+        self.assertEqual(2, len(extractor.find_outer_edges([above, below])))
+        # line adjacent to a cell of a table, not to the table itself
+        line = extractor.Cell(60.0, 99.5, 260.0, 99.8)
+        self.assertEqual([(50.0, 99.5, 260.0, 136.5)],
+                         outline(extractor.find_outer_edges(grid(3, 4, x=60.0, width=10.0, lines=True) +
+                                                            [line, extractor.Cell(50.0, 100.0, 52.0, 136.5)])))
+
+    def test_find_outer_edges_order(self):
+        generator = random.Random(0)
+        cells = grid(4, 3) + grid(2, 5, y=160.0, lines=True) + grid(1, 2, x=300.0, y=160.6) + grid(3, 3, y=400.0)
+        expected = outline(extractor.find_outer_edges(cells))
+        for _ in range(20):
+            generator.shuffle(cells)
+            self.assertEqual(expected, outline(extractor.find_outer_edges(cells)))
+
+    def test_find_outer_edges_unchanged_cells(self):
+        cells = grid(2, 2)
+        extractor.find_outer_edges(cells)
+        self.assertEqual([(1, 1)] * 4, [(cell.rows, cell.columns) for cell in cells])
+
+    def test_find_outer_edges_large(self):
+        # converges on a page of thousands of cells
+        cells = grid(60, 40, width=5.0, height=4.0) + grid(30, 20, y=400.0, width=5.0, height=4.0, lines=True)
+        self.assertEqual([(50.0, 100.0, 250.0, 340.0), (50.0, 400.0, 150.5, 520.5)],
+                         outline(extractor.find_outer_edges(cells)))
+
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
@@ -1,9 +1,13 @@
 # -*- coding: utf8 -*-
 import logging
+import os
+import shutil
+import tempfile
 import unittest
 
 import pdfparser.text_extractor as extractor
 from pdfparser.pdf_fragment_type import FragmentType
+from test_pdfparser.sample_pdf import write_pdf, text_pages
 
 
 class TextExtractorTestCase(unittest.TestCase):
@@ -389,6 +393,195 @@ class TextExtractorTestCase(unittest.TestCase):
         actual = pdf_extractor.should_force_raw_extraction()
         self.assertEqual(expected, actual)
 
+    def test_reset(self):
+        pdf_extractor = extractor.PDFTextExtractor()
+        pdf_extractor.add_fragment([u'An incomplete sentence'], FragmentType.TEXT)
+        pdf_extractor.annex_found = True
+        pdf_extractor.report.summary = 1
+        pdf_extractor.pdf_filter.tables_text.append(u'repeated')
+        self.assertIsNotNone(pdf_extractor.previous_p)
+
+        pdf_extractor.reset()
+
+        self.assertEqual(0, len(pdf_extractor.contents))
+        self.assertIsNone(pdf_extractor.previous_p)
+        self.assertFalse(pdf_extractor.annex_found)
+        self.assertEqual(0, pdf_extractor.report.summary)
+        self.assertIs(pdf_extractor.report, pdf_extractor.pdf_filter.report)
+        self.assertEqual(0, len(pdf_extractor.pdf_filter.tables_text))
+
+
+class PageParallelTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.folder, 'JT01.pdf')
+        write_pdf(self.pdf_path, text_pages(11, summary_page=1, table_page=4, annex_page=9))
+        self.min_pages = extractor.PAGE_PARALLEL_MIN_PAGES
+        extractor.PAGE_PARALLEL_MIN_PAGES = 5
+
+    def tearDown(self):
+        extractor.PAGE_PARALLEL_MIN_PAGES = self.min_pages
+        shutil.rmtree(self.folder)
+
+    def test_parse_pages_parallel(self):
+        sequential = extractor.PDFTextExtractor(page_processes=0)
+        sequential_json = sequential.extract_text(self.pdf_path)
+        parallel = extractor.PDFTextExtractor(page_processes=3)
+        self.assertEqual(11, parallel.count_parallel_pages(self.open_document()))
+        parallel_json = parallel.extract_text(self.pdf_path)
+
+        self.assertIn(FragmentType.SUMMARY, sequential.contents)
+        self.assertIn(FragmentType.ANNEX, sequential.contents)
+        self.assertEqual(sequential_json, parallel_json)
+        self.assertEqual((sequential.minx0, sequential.maxx1), (parallel.minx0, parallel.maxx1))
+
+    def test_parse_page_range(self):
+        pages, raw_pages = extractor.parse_page_range((self.pdf_path, 4, 6))
+        self.assertEqual(2, len(pages))
+        text_items, cells_coord, minx0, maxx1 = pages[0]
+        self.assertEqual(9, len(cells_coord))
+        self.assertIn(u'00', [text.strip() for _, text in text_items])
+        self.assertEqual(72, round(minx0))
+        self.assertTrue(maxx1 > minx0)
+        # pages with text, the raw text is not rendered
+        self.assertEqual({}, raw_pages)
+
+        self.assertEqual(([], {}), extractor.parse_page_range((self.pdf_path, 11, 12)))
+
+    def test_parse_page_range_without_text(self):
+        write_pdf(self.pdf_path, [([], [])] * 3 + text_pages(1))
+        pages, raw_pages = extractor.parse_page_range((self.pdf_path, 1, 3))
+        self.assertEqual([[], []], [text_items for text_items, _, _, _ in pages])
+        self.assertEqual([1, 2], sorted(raw_pages.keys()))
+        # dropped once a page of the range holds text
+        self.assertEqual({}, extractor.parse_page_range((self.pdf_path, 1, 4))[1])
+
+    def test_parse_pages(self):
+        pdf_extractor = extractor.PDFTextExtractor(page_processes=0)
+        pages = pdf_extractor.parse_pages(self.open_document(), first_page=2)
+        self.assertFalse(isinstance(pages, list))
+        page_text, page_cells = next(pages)
+        self.assertEqual(72, round(pdf_extractor.minx0))
+        self.assertEqual(8, len(list(pages)))
+
+    def test_count_parallel_pages(self):
+        self.assertEqual(0, extractor.PDFTextExtractor(page_processes=1).count_parallel_pages(self.open_document()))
+        self.assertEqual(0, extractor.PDFTextExtractor(page_processes=2, single_page=1)
+                         .count_parallel_pages(self.open_document()))
+        extractor.PAGE_PARALLEL_MIN_PAGES = 12
+        self.assertEqual(0, extractor.PDFTextExtractor(page_processes=2).count_parallel_pages(self.open_document()))
+
+    def open_document(self):
+        fp = open(self.pdf_path, 'rb')
+        self.addCleanup(fp.close)
+        parser = extractor.PDFParser(fp)
+        doc = extractor.PDFDocument(parser)
+        parser.set_document(doc)
+        return doc
+
+
+class WantedFragmentsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.folder, 'JT01.pdf')
+        write_pdf(self.pdf_path, text_pages(10, summary_page=1, annex_page=6))
+        self.full = extractor.PDFTextExtractor(page_processes=0)
+        self.full.extract_text(self.pdf_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_all_wanted(self):
+        self.assertIn(FragmentType.SUMMARY, self.full.contents)
+        self.assertIn(FragmentType.ANNEX, self.full.contents)
+
+    def test_text_wanted(self):
+        pdf_extractor = extractor.PDFTextExtractor(page_processes=0)
+        pdf_extractor.extract_text(self.pdf_path, wanted=[FragmentType.TEXT])
+        self.assertEqual(self.full.contents[FragmentType.TEXT], pdf_extractor.contents[FragmentType.TEXT])
+        self.assertEqual(self.full.contents[FragmentType.SUMMARY], pdf_extractor.contents[FragmentType.SUMMARY])
+        # only the page starting the annexes is processed
+        self.assertEqual(self.full.contents[FragmentType.ANNEX][:len(pdf_extractor.contents[FragmentType.ANNEX])],
+                         pdf_extractor.contents[FragmentType.ANNEX])
+        self.assertTrue(0 < len(pdf_extractor.contents[FragmentType.ANNEX]) * 2 <
+                        len(self.full.contents[FragmentType.ANNEX]))
+
+    def test_summary_wanted(self):
+        pdf_extractor = extractor.PDFTextExtractor(page_processes=0)
+        pdf_extractor.extract_text(self.pdf_path, wanted=[FragmentType.SUMMARY])
+        self.assertEqual(self.full.contents[FragmentType.SUMMARY], pdf_extractor.contents[FragmentType.SUMMARY])
+        self.assertNotIn(FragmentType.ANNEX, pdf_extractor.contents)
+        self.assertTrue(len(pdf_extractor.contents.get(FragmentType.TEXT, [])) <
+                        len(self.full.contents[FragmentType.TEXT]))
+        self.assertFalse(pdf_extractor.should_force_raw_extraction())
+
+    def test_summary_wanted_not_found(self):
+        write_pdf(self.pdf_path, text_pages(10, annex_page=6))
+        text_extractor = extractor.PDFTextExtractor(page_processes=0)
+        text_extractor.extract_text(self.pdf_path, wanted=[FragmentType.TEXT])
+        pdf_extractor = extractor.PDFTextExtractor(page_processes=0)
+        pdf_extractor.extract_text(self.pdf_path, wanted=[FragmentType.SUMMARY])
+        self.assertNotIn(FragmentType.SUMMARY, pdf_extractor.contents)
+        self.assertEqual(text_extractor.contents[FragmentType.TEXT], pdf_extractor.contents[FragmentType.TEXT])
+
+
+class RawTextFallbackTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.folder, 'JT01.pdf')
+        # annexes only: the layout extraction finds no text
+        write_pdf(self.pdf_path, text_pages(4, annex_page=0, table_page=2))
+        self.text_converter = extractor.TextConverter
+
+    def tearDown(self):
+        extractor.TextConverter = self.text_converter
+        shutil.rmtree(self.folder)
+
+    def test_raw_text_from_layout(self):
+        expected = extractor.PDFTextExtractor(page_processes=0)
+        expected.convert_pdf_to_txt(self.pdf_path)
+
+        def text_converter(*args, **kwargs):
+            self.fail('page interpreted again')
+
+        extractor.TextConverter = text_converter
+        pdf_extractor = extractor.PDFTextExtractor(page_processes=0)
+        pdf_extractor.extract_text(self.pdf_path)
+        self.assertEqual(4, len(pdf_extractor.contents[FragmentType.TEXT]))
+        self.assertEqual(expected.contents[FragmentType.TEXT], pdf_extractor.contents[FragmentType.TEXT])
+        self.assertEqual({}, pdf_extractor.raw_pages)
+
+    def test_raw_text_of_skipped_pages(self):
+        expected = extractor.PDFTextExtractor(page_processes=0)
+        expected.convert_pdf_to_txt(self.pdf_path)
+
+        # extraction stops after the annex page, the other pages are interpreted by the fallback
+        pdf_extractor = extractor.PDFTextExtractor(page_processes=0)
+        pdf_extractor.extract_text(self.pdf_path, wanted=[FragmentType.TEXT])
+        self.assertEqual(expected.contents[FragmentType.TEXT], pdf_extractor.contents[FragmentType.TEXT])
+
+    def test_raw_text_dropped(self):
+        write_pdf(self.pdf_path, text_pages(4, annex_page=2))
+        pdf_extractor = extractor.PDFTextExtractor(page_processes=0)
+        pages = pdf_extractor.parse_pages(self.open_document())
+        next(pages)
+        self.assertEqual([0], pdf_extractor.raw_pages.keys())
+        pdf_extractor.add_fragment([u'Some text.'], FragmentType.TEXT)
+        next(pages)
+        self.assertEqual({}, pdf_extractor.raw_pages)
+
+    def open_document(self):
+        fp = open(self.pdf_path, 'rb')
+        self.addCleanup(fp.close)
+        parser = extractor.PDFParser(fp)
+        doc = extractor.PDFDocument(parser)
+        parser.set_document(doc)
+        return doc
+
+
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
     unittest.main()
@@ -1,9 +1,42 @@
 import logging
+import random
 import unittest
 
+import numpy as np
+
+import pdfparser.text_table_extractor as extractor
 from pdfparser.text_table_extractor import Cell, Row, Table
 
 
+def statistical_page(generator, flat=False):
+    """
+    Boxes of a page alternating paragraphs and grids of numbers, sorted as with compare_cells, reversed
+
+    :param generator: random generator
+    :param flat: True to add boxes of zero height
+    :return: list of Cell
+    """
+    cells = []
+    y = 800.0
+    while y > 60:
+        if generator.random() < 0.4:
+            for _ in range(generator.randint(1, 3)):
+                cells.append(Cell(72.0, y - 10, 520.0, y))
+                y -= generator.choice([10.0, 12.0, 14.0])
+        else:
+            columns = generator.randint(1, 6)
+            for _ in range(generator.randint(1, 6)):
+                for column in range(columns):
+                    x0 = 72.0 + column * 70 + generator.uniform(0, 5)
+                    y0 = y - generator.choice([8.0, 9.0, 9.5])
+                    cells.append(Cell(x0, y0, x0 + generator.uniform(10, 200), y0 + generator.choice([8.0, 9.0])))
+                    if flat and generator.random() < 0.2:
+                        cells.append(Cell(x0, y0, x0 + 5, y0))
+                y -= generator.choice([9.0, 12.0, 14.0])
+        y -= generator.choice([0.0, 4.0, 20.0])
+    return sorted(cells, key=extractor.compare_cells, reverse=True)
+
+
 class CellTestCase(unittest.TestCase):
 
     def test_absorb(self):
@@ -217,10 +250,40 @@ class TableTestCase(unittest.TestCase):
 class TextTableExtractorTestCase(unittest.TestCase):
 
     def test_find_table_cells(self):
-        self.fail("Not implemented")
+        heading = Cell(72.0, 700.0, 520.0, 710.0)
+        grid = sorted([Cell(72.0 + column * 100, 690.0 - row * 12, 100.0 + column * 100, 698.0 - row * 12)
+                       for row in range(3) for column in range(3)], key=extractor.compare_cells, reverse=True)
+        paragraph = [Cell(72.0, 640.0, 520.0, 650.0), Cell(72.0, 626.0, 520.0, 636.0)]
+        self.assertEqual(grid, list(extractor.find_table_cells([heading] + grid + paragraph)))
+        # two rows are not enough, the last row of the page does not close a table
+        self.assertEqual([], list(extractor.find_table_cells([heading] + grid[:6] + paragraph)))
+        self.assertEqual([], list(extractor.find_table_cells([heading] + grid + paragraph[:1])))
+        self.assertEqual([], list(extractor.find_table_cells([])))
+
+    def test_find_table_cells_sequential(self):
+        generator = random.Random(0)
+        for flat in (False, True):
+            for _ in range(200):
+                cells = statistical_page(generator, flat)
+                self.assertEqual(list(extractor.find_table_cells_sequential(cells)),
+                                 list(extractor.find_table_cells(cells)))
+
+    def test_table_cells_mask(self):
+        generator = random.Random(1)
+        for flat in (False, True):
+            for _ in range(50):
+                cells = statistical_page(generator, flat)
+                generator.shuffle(cells)
+                coords = np.array([(cell.x0, cell.y0, cell.x1, cell.y1) for cell in cells])
+                cells.sort(key=extractor.compare_cells, reverse=True)
+                expected = set(cell.coord for cell in extractor.find_table_cells_sequential(cells))
+                mask = extractor.table_cells_mask(coords)
+                self.assertEqual(expected, set(tuple(coord) for coord in coords[mask].tolist()))
+        self.assertEqual(0, len(extractor.table_cells_mask(np.empty((0, 4)))))
 
     def test_compare_cells(self):
-        self.fail("Not implemented")
+        cells = [Cell(10, 20, 30, 25), Cell(5, 20, 30, 25), Cell(5, 20, 25, 30), Cell(50, 10, 60, 15)]
+        self.assertEqual([cells[3], cells[2], cells[1], cells[0]], sorted(cells, key=extractor.compare_cells))
 
 
 if __name__ == '__main__':
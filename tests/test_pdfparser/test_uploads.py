@@ -0,0 +1,103 @@
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from cStringIO import StringIO
+
+from pdfparser.uploads import UploadFolder, UploadTooLarge, UploadFolderFull, NotAPdf
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FailingStream:
+    """
+    Stream of a request whose client disconnects after some content
+    """
+
+    def __init__(self, content):
+        self.stream = StringIO(content)
+
+    def read(self, size):
+        block = self.stream.read(size)
+        if not block:
+            raise IOError('Client disconnected')
+        return block
+
+
+def pdf_content(size):
+    return '%PDF-' + 'x' * (size - 5)
+
+
+class UploadFolderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.upload_folder = os.path.join(self.folder, 'uploads')
+        self.clock = FakeClock()
+        self.clock.now = 1e9
+        self.uploads = UploadFolder(self.upload_folder, folder_size=450000, max_size=200000, memory_size=100000,
+                                    max_age=3600, clock=self.clock)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_memory(self):
+        upload = self.uploads.spool(StringIO(pdf_content(1000)))
+        self.assertEqual((1000, None), (upload.size, upload.path))
+        self.assertEqual(pdf_content(1000), upload.open().read())
+        self.assertEqual(upload.content_hash, self.uploads.spool(StringIO(pdf_content(1000))).content_hash)
+        self.assertNotEqual(upload.content_hash, self.uploads.spool(StringIO(pdf_content(1001))).content_hash)
+
+    def test_spooled(self):
+        upload = self.uploads.spool(StringIO(pdf_content(150000)))
+        self.assertIsNone(upload.data)
+        self.assertEqual([os.path.basename(upload.path)], os.listdir(self.upload_folder))
+        with upload.open() as pdf_file:
+            self.assertEqual(pdf_content(150000), pdf_file.read())
+        # a second upload of the same content gets its own file
+        self.assertEqual(upload.content_hash, self.uploads.spool(StringIO(pdf_content(150000))).content_hash)
+        self.assertEqual(300000, self.uploads.used_size())
+        upload.remove()
+        self.assertEqual(150000, self.uploads.used_size())
+
+    def test_too_large(self):
+        self.assertRaises(UploadTooLarge, self.uploads.spool, StringIO(pdf_content(200001)))
+        self.assertEqual([], os.listdir(self.upload_folder))
+        self.assertEqual(200000, self.uploads.spool(StringIO(pdf_content(200000))).size)
+
+    def test_not_a_pdf(self):
+        self.assertRaises(NotAPdf, self.uploads.spool, StringIO('Hello'))
+        self.assertRaises(NotAPdf, self.uploads.spool, StringIO(''))
+
+    def test_folder_full(self):
+        self.uploads.spool(StringIO(pdf_content(150000)))
+        self.uploads.spool(StringIO(pdf_content(150000)))
+        # 300000 bytes used, no room left for an upload of max_size bytes
+        self.assertRaises(UploadFolderFull, self.uploads.spool, StringIO(pdf_content(150000)))
+        self.assertEqual(2, len(os.listdir(self.upload_folder)))
+        # kept in memory, no room needed
+        self.assertEqual(1000, self.uploads.spool(StringIO(pdf_content(1000))).size)
+
+    def test_failure_cleanup(self):
+        self.assertRaises(IOError, self.uploads.spool, FailingStream(pdf_content(150000)))
+        self.assertEqual([], os.listdir(self.upload_folder))
+
+    def test_stale_files(self):
+        stale = self.uploads.spool(StringIO(pdf_content(150000)))
+        os.utime(stale.path, (self.clock.now - 3601, self.clock.now - 3601))
+        recent = self.uploads.spool(StringIO(pdf_content(120000)))
+        self.assertEqual(120000, self.uploads.used_size())
+        self.assertEqual([os.path.basename(recent.path)], os.listdir(self.upload_folder))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
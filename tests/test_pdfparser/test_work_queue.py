@@ -0,0 +1,191 @@
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pdfparser.work_queue import LeaseQueue, serve, connect, parse_address, read_authkey, run_worker_node, \
+    AUTHKEY_VARIABLE
+
+AUTHKEY = 'test'
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def square_batch(documents):
+    return [document * document for document in documents]
+
+
+def run_node(address, worker_id):
+    queue = connect(address, AUTHKEY)
+    run_worker_node(queue, square_batch, worker_id, lease_duration=1, poll_interval=0.05)
+
+
+def run_dying_node(address):
+    queue = connect(address, AUTHKEY)
+    queue.acquire('dying')
+    os._exit(0)
+
+
+class LeaseQueueTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.queue = LeaseQueue(10, clock=self.clock)
+
+    def test_acquire_complete(self):
+        self.queue.put([1, 2])
+        self.queue.put([3])
+        self.queue.close()
+
+        lease_id, documents = self.queue.acquire('node1')
+        self.assertEqual([1, 2], documents)
+        self.assertEqual(1, self.queue.nb_waiting())
+        self.assertEqual(1, self.queue.nb_leased())
+        self.assertTrue(self.queue.complete(lease_id, [1, 4]))
+
+        lease_id, documents = self.queue.acquire('node2')
+        self.assertEqual([3], documents)
+        self.assertEqual((None, None), self.queue.acquire('node1'))
+        self.assertFalse(self.queue.finished())
+        self.queue.complete(lease_id, [9])
+        self.assertTrue(self.queue.finished())
+        self.assertEqual([1, 4, 9], self.queue.pop_results())
+        self.assertEqual([], self.queue.pop_results())
+
+    def test_not_finished_until_closed(self):
+        self.assertFalse(self.queue.finished())
+        self.queue.close()
+        self.assertTrue(self.queue.finished())
+
+    def test_expired_lease_requeued(self):
+        self.queue.put([1])
+        self.queue.put([2])
+        lease_id, _ = self.queue.acquire('node1')
+
+        self.clock.now = 5
+        self.assertEqual(0, self.queue.requeue_expired())
+        self.assertTrue(self.queue.heartbeat(lease_id))
+
+        self.clock.now = 14  # within the renewed lease
+        self.assertEqual(0, self.queue.requeue_expired())
+
+        self.clock.now = 16
+        self.assertEqual(1, self.queue.requeue_expired())
+        self.assertFalse(self.queue.heartbeat(lease_id))
+
+        # the expired batch comes first
+        _, documents = self.queue.acquire('node2')
+        self.assertEqual([1], documents)
+
+    def test_late_completion(self):
+        self.queue.put([1])
+        self.queue.close()
+        lease_id, _ = self.queue.acquire('node1')
+        self.clock.now = 11
+        self.queue.requeue_expired()
+
+        # results reported after expiry are kept and the batch is not handed out again
+        self.assertFalse(self.queue.complete(lease_id, [1]))
+        self.assertEqual((None, None), self.queue.acquire('node2'))
+        self.assertTrue(self.queue.finished())
+        self.assertEqual([1], self.queue.pop_results())
+
+    def test_completion_once(self):
+        self.queue.put([1])
+        self.queue.close()
+        late_lease_id, _ = self.queue.acquire('node1')
+        self.clock.now = 11
+        self.queue.requeue_expired()
+        lease_id, documents = self.queue.acquire('node2')
+        self.assertEqual([1], documents)
+
+        # the late node completes first, the batch is completed once
+        self.assertFalse(self.queue.complete(late_lease_id, ['late']))
+        self.assertTrue(self.queue.complete(lease_id, ['new']))
+        self.assertEqual(['late'], self.queue.pop_results())
+        self.assertEqual(0, self.queue.nb_leased())
+        self.assertTrue(self.queue.finished())
+
+        # reported again after the batch was completed
+        self.assertFalse(self.queue.complete(late_lease_id, ['late']))
+        self.assertEqual([], self.queue.pop_results())
+
+    def test_parse_address(self):
+        self.assertEqual(('localhost', 8086), parse_address('localhost:8086'))
+
+
+class AuthKeyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.environ_key = os.environ.pop(AUTHKEY_VARIABLE, None)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        os.environ.pop(AUTHKEY_VARIABLE, None)
+        if self.environ_key is not None:
+            os.environ[AUTHKEY_VARIABLE] = self.environ_key
+
+    def test_missing(self):
+        self.assertRaises(ValueError, read_authkey)
+        self.assertRaises(ValueError, read_authkey, '')
+        self.assertRaises(ValueError, read_authkey, os.path.join(self.folder, 'missing'))
+        key_path = os.path.join(self.folder, 'authkey')
+        with open(key_path, 'wb') as key_file:
+            key_file.write('\n')
+        self.assertRaises(ValueError, read_authkey, key_path)
+
+    def test_read(self):
+        key_path = os.path.join(self.folder, 'authkey')
+        with open(key_path, 'wb') as key_file:
+            key_file.write('file secret\n')
+        self.assertEqual('file secret', read_authkey(key_path))
+        # the environment comes first
+        os.environ[AUTHKEY_VARIABLE] = 'environment secret'
+        self.assertEqual('environment secret', read_authkey(key_path))
+
+
+class WorkerNodesTestCase(unittest.TestCase):
+
+    def test_worker_nodes(self):
+        queue = LeaseQueue(1)
+        server = serve(queue, ('127.0.0.1', 0), AUTHKEY)
+        for i in range(0, 40, 4):
+            queue.put(range(i, i + 4))
+        queue.close()
+
+        # one node dies with a lease, its batch must be processed by the others
+        dying_node = mp.Process(target=run_dying_node, args=(server.address,))
+        dying_node.start()
+        dying_node.join()
+        nodes = [mp.Process(target=run_node, args=(server.address, 'node{}'.format(i))) for i in range(3)]
+        for node in nodes:
+            node.start()
+
+        results = []
+        deadline = time.time() + 30
+        while not queue.finished() and time.time() < deadline:
+            queue.requeue_expired()
+            results.extend(queue.pop_results())
+            time.sleep(0.05)
+        results.extend(queue.pop_results())
+        for node in nodes:
+            node.join(10)
+
+        self.assertTrue(queue.finished())
+        self.assertEqual([i * i for i in range(40)], sorted(results))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')
+    unittest.main()
@@ -5,6 +5,19 @@ import test_pdfparser.test_text_extractor as text_extractor
 import test_pdfparser.test_pdf_page_filter as pdf_page_filter
 import test_pdfparser.test_summarizer as summarizer
 import test_pdfparser.test_text_table_extractor as text_table_extractor
+import test_pdfparser.test_manifest as manifest
+import test_pdfparser.test_scheduler as scheduler
+import test_pdfparser.test_budget as budget
+import test_pdfparser.test_work_queue as work_queue
+import test_pdfparser.test_extraction_cache as extraction_cache
+import test_pdfparser.test_lru_cache as lru_cache
+import test_pdfparser.test_font_cache as font_cache
+import test_pdfparser.test_patterns as patterns
+import test_pdfparser.test_page_geometry as page_geometry
+import test_pdfparser.test_lsa as lsa
+import test_pdfparser.test_frequency_summarizer as frequency_summarizer
+import test_pdfparser.test_jobs as jobs
+import test_pdfparser.test_uploads as uploads
 
 suite_table_extractor = unittest.TestLoader().loadTestsFromModule(table_extractor)
 suite_text_extractor = unittest.TestLoader().loadTestsFromModule(text_extractor)
@@ -12,9 +25,25 @@ suite_text_extractor = unittest.TestLoader().loadTestsFromModule(text_extractor)
 suite_pdf_page_filter = unittest.TestLoader().loadTestsFromModule(pdf_page_filter)
 suite_summarizer = unittest.TestLoader().loadTestsFromModule(summarizer)
 suite_text_table_extractor = unittest.TestLoader().loadTestsFromModule(text_table_extractor)
+suite_manifest = unittest.TestLoader().loadTestsFromModule(manifest)
+suite_scheduler = unittest.TestLoader().loadTestsFromModule(scheduler)
+suite_budget = unittest.TestLoader().loadTestsFromModule(budget)
+suite_work_queue = unittest.TestLoader().loadTestsFromModule(work_queue)
+suite_extraction_cache = unittest.TestLoader().loadTestsFromModule(extraction_cache)
+suite_lru_cache = unittest.TestLoader().loadTestsFromModule(lru_cache)
+suite_font_cache = unittest.TestLoader().loadTestsFromModule(font_cache)
+suite_patterns = unittest.TestLoader().loadTestsFromModule(patterns)
+suite_page_geometry = unittest.TestLoader().loadTestsFromModule(page_geometry)
+suite_lsa = unittest.TestLoader().loadTestsFromModule(lsa)
+suite_frequency_summarizer = unittest.TestLoader().loadTestsFromModule(frequency_summarizer)
+suite_jobs = unittest.TestLoader().loadTestsFromModule(jobs)
+suite_uploads = unittest.TestLoader().loadTestsFromModule(uploads)
 
 all_tests = unittest.TestSuite([suite_table_extractor,suite_text_extractor, suite_pdf_page_filter, suite_summarizer,
-                                suite_text_table_extractor])
+                                suite_text_table_extractor, suite_manifest, suite_scheduler,
+                                suite_budget, suite_work_queue, suite_extraction_cache, suite_lru_cache,
+                                suite_font_cache, suite_patterns, suite_page_geometry, suite_lsa,
+                                suite_frequency_summarizer, suite_jobs, suite_uploads])
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG, format='%(name)s - %(levelname)s - %(message)s')